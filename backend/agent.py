@@ -3,9 +3,28 @@ import os
 import sys
 import asyncio
 import json
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, List
 from dotenv import load_dotenv
-from persona import get_criminal_mindset_prompt
+from persona import get_criminal_mindset_prompt, prompt_cache, select_persona, wants_persona
+from speech_pipeline import SentenceChunker, stream_speech
+from audio_output import PersistentAudioTrack
+from pcm_cache import PCMCache, iter_pcm_frames
+from audio_mixer import AudioMixer
+from metadata_resolver import RoomMetadataResolver
+from startup_graph import StartupGraph
+from scene_timeline import OPENING_SCHEDULE, Cue, loop_scheduler
+from story_publisher import StoryPublisher
+from chat_budget import ChatContextBudget
+from watson_cache import AnswerCache, SpeechCache, WatsonResponseCache
+from audio_bank import (
+    ASSISTANT_GREETING,
+    DEFAULT_PACK_PATH,
+    MORIARTY_GREETING,
+    VOICES,
+    WATSON_FALLBACK,
+    AudioBank,
+)
 from livekit.agents import (
     Agent,
     AgentSession,
@@ -22,6 +41,13 @@ from livekit.plugins import noise_cancellation, silero
 from livekit.plugins import deepgram, groq, cartesia, silero, openai
 from livekit.agents import ChatContext, ChatMessage, llm
 import aiohttp
+
+# Plugins register their inference runners on import, which must happen in the
+# main process before the worker starts; importing from prewarm is too late.
+try:
+    from livekit.plugins.turn_detector.multilingual import MultilingualModel
+except ImportError:  # sessions fall back to VAD-only endpointing
+    MultilingualModel = None
 from livekit import rtc
 
 logger = logging.getLogger("agent-worker")
@@ -34,7 +60,7 @@ load_dotenv(".env")
 class VoiceAssistant(Agent):
     """Voice AI Assistant Agent"""
     
-    def __init__(self, instructions: Optional[str] = None) -> None:
+    def __init__(self, instructions: Optional[str] = None, budget: Optional[ChatContextBudget] = None) -> None:
         default_instructions = """You are an intelligent voice assistant embedded on a website, helping visitors get the information they need quickly and efficiently.
 
 CORE IDENTITY:
@@ -74,21 +100,128 @@ TONE: Professional yet friendly, helpful, and efficient. You're here to make the
         super().__init__(
             instructions=instructions or default_instructions,
         )
+        self.budget = budget
+        self.turns = 0
+
     async def on_user_turn_completed(
         self, turn_ctx: ChatContext, new_message: ChatMessage,
     ) -> None:
-        pass
+        """Keep the chat history under the token budget before the LLM sees it"""
+        if self.budget is None:
+            return
+        self.turns += 1
+        report = self.budget.compact(turn_ctx)
+        logger.info(
+            f"🧮 Turn {self.turns} context: {report.tokens_before} -> {report.tokens_after} tokens "
+            f"(dropped {report.echoes_dropped} tool echoes, folded {report.turns_folded} turns)"
+        )
+        if report.changed:
+            # turn_ctx is this turn's copy; persist the compacted history for later turns
+            await self.update_chat_ctx(turn_ctx)
 
 
 # Global VAD instance for efficiency
 vad_instance = None
 
+# Module-level state is per job process: livekit-agents runs each job in its own process
+# by default, so these caches are shared across jobs only when the worker reuses a process
+# or runs jobs with the thread executor.
+
+# Room metadata lookups shared by every job in this process
+metadata_resolver = RoomMetadataResolver(ttl=float(os.getenv("ROOM_METADATA_TTL", "5")))
+
+# Decoded playback audio shared by every job in this process
+PLAYBACK_DIR = os.path.join(os.path.dirname(__file__), "playback_audios")
+pcm_cache = PCMCache(max_bytes=int(os.getenv("PCM_CACHE_MAX_BYTES", str(64 * 1024 * 1024))))
+
+# Scripted lines pre-rendered by `python audio_bank.py`; memory-mapped once per process
+audio_bank = AudioBank(os.getenv("SCRIPTED_AUDIO_PACK", DEFAULT_PACK_PATH))
+
+# Watson answers and their synthesized audio; the clip directory is shared by every worker on the host
+watson_cache = WatsonResponseCache(
+    AnswerCache(max_entries=int(os.getenv("WATSON_ANSWER_CACHE_SIZE", "512"))),
+    SpeechCache(
+        directory=os.getenv("WATSON_SPEECH_CACHE_DIR", os.path.join(PLAYBACK_DIR, ".watson_speech")),
+        max_bytes=int(os.getenv("WATSON_SPEECH_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    ),
+)
+
 
 class WatsonActions:
-    def __init__(self, room: rtc.Room, scene_actions: Optional["SceneActions"] = None):
+    def __init__(
+        self,
+        room: rtc.Room,
+        scene_actions: Optional["SceneActions"] = None,
+        voice=None,
+        response_cache: Optional[WatsonResponseCache] = None,
+    ):
         self.room = room
         self.watson_voice_id = "0ad65e7f-006c-47cf-bd31-52279d487913" # Official Watson Voice
+        self.watson_tts_model = "sonic-2"
+        self.watson_voice = f"cartesia/{self.watson_tts_model}:{self.watson_voice_id}"
         self.scene_actions = scene_actions
+        self.response_cache = response_cache
+
+        # Clients are created on first use and reused for every hint this session
+        self._llm: Optional[groq.LLM] = None
+        self._http_session: Optional[aiohttp.ClientSession] = None
+        self._tts: Optional[cartesia.TTS] = None
+        self.latency_samples: List[Dict[str, float]] = []
+
+        # Watson's voice: an input on the agent's mixer, or a track published once per room
+        self.voice_track = voice or PersistentAudioTrack(room, "watson_audio")
+        # Set whenever Watson is not speaking; the main session can gate on it
+        self.speech_finished = asyncio.Event()
+        self.speech_finished.set()
+
+    def _get_llm(self) -> groq.LLM:
+        if self._llm is None:
+            # watson_llm = openai.LLM(model="o3-mini")
+            self._llm = groq.LLM(
+                model="openai/gpt-oss-20b",
+                api_key=os.getenv("GROQ_API_KEY"),
+            )
+        return self._llm
+
+    def _get_tts(self) -> cartesia.TTS:
+        if self._tts is None:
+            self._http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=8, keepalive_timeout=60),
+            )
+            # specific model and voice as requested/fixed
+            self._tts = cartesia.TTS(model=self.watson_tts_model, voice=self.watson_voice_id, http_session=self._http_session)
+        return self._tts
+
+    async def aclose(self) -> None:
+        """Close Watson's voice track and LLM/TTS clients; registered as a job shutdown callback"""
+        await self.voice_track.aclose()
+        for client in (self._tts, self._llm):
+            if client is not None:
+                try:
+                    await client.aclose()
+                except Exception as e:
+                    logger.warning(f"Failed to close Watson client: {e}")
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+        self._tts = None
+        self._llm = None
+        self._http_session = None
+
+    async def wait_for_speech_finished(self) -> None:
+        """Resolve once Watson's current line has finished playing"""
+        await self.speech_finished.wait()
+
+    def latency_summary(self) -> Dict[str, float]:
+        """Average per-stage latency across this session's Watson hints"""
+        if not self.latency_samples:
+            return {}
+        summary: Dict[str, float] = {}
+        keys = {key for sample in self.latency_samples for key in sample}
+        for key in sorted(keys):
+            values = [sample[key] for sample in self.latency_samples if key in sample]
+            summary[key] = round(sum(values) / len(values), 1)
+        summary["hints"] = len(self.latency_samples)
+        return summary
 
     @llm.function_tool(description="Consult Dr. Watson for his medical or military opinion, or just for support.")
     async def ask_watson(self, query: str):
@@ -99,14 +232,10 @@ class WatsonActions:
             query: The question or statement to address to Dr. Watson
         """
         logger.info(f"🎤 Asking Watson: {query}")
+        timings: Dict[str, float] = {}
         
         # 1. Generate Watson's text response using a separate LLM call
-        # We use a transient LLM instance for this to keep it simple
-        # watson_llm = openai.LLM(model="o3-mini")
-        watson_llm = groq.LLM(
-            model="openai/gpt-oss-20b",
-            api_key=os.getenv("GROQ_API_KEY"),
-        )
+        watson_llm = self._get_llm()
         
         system_prompt = """You are Dr. John Watson, Sherlock Holmes's loyal partner.
         - You are British, practical, and grounded.
@@ -121,81 +250,158 @@ class WatsonActions:
         chat_ctx.add_message(role="system", content=system_prompt)
         chat_ctx.add_message(role="user", content=query)
         
-        try:
-            stream = watson_llm.chat(
-                chat_ctx=chat_ctx,
-                conn_options=APIConnectOptions(timeout=60.0)
+        fallback_text = WATSON_FALLBACK
+        llm_start = time.perf_counter()
+        used_fallback = False
+        # Set when the LLM stream breaks off; a truncated answer must not be cached
+        llm_error = False
+
+        # Repeated questions skip the LLM, and usually the TTS as well
+        cache = self.response_cache
+        cached_text = cache.answers.lookup(query) if cache is not None else None
+        text_hit = cached_text is not None
+        tts = self._get_tts()
+        cached_pcm = None
+        if cached_text is not None:
+            cached_pcm = await cache.speech.get(
+                SpeechCache.key(cached_text, self.watson_voice_id, self.watson_tts_model, tts.sample_rate)
             )
-            watson_response_text = ""
-            async for chunk in stream:
-                if chunk.delta and chunk.delta.content:
-                    watson_response_text += chunk.delta.content
-        except Exception as e:
-            logger.error(f"Watson LLM failed: {e}")
-            watson_response_text = "I cannot form a thought right now. The fog is too thick."
-        
-        logger.info(f"Watson says: {watson_response_text}")
+        captured: List[bytes] = []
 
-        if self.scene_actions:
+        async def _text_deltas(text: str):
+            yield text
+
+        async def _llm_deltas():
+            nonlocal llm_error
             try:
-                await self.scene_actions.send_caption("watson", watson_response_text)
+                stream = watson_llm.chat(
+                    chat_ctx=chat_ctx,
+                    conn_options=APIConnectOptions(timeout=60.0)
+                )
+                async for chunk in stream:
+                    if chunk.delta and chunk.delta.content:
+                        if "llm_ttft_ms" not in timings:
+                            timings["llm_ttft_ms"] = (time.perf_counter() - llm_start) * 1000
+                        yield chunk.delta.content
             except Exception as e:
-                logger.warning(f"Failed to publish Watson caption: {e}")
-
-        # 2. Synthesize Audio using Cartesia (Sonic-2)
-        # We need to manually handle the audio source publication
+                llm_error = True
+                logger.error(f"Watson LLM failed: {e}")
+            timings["llm_total_ms"] = (time.perf_counter() - llm_start) * 1000
+
+        async def _prepend(first: str, rest):
+            yield first
+            async for delta in rest:
+                yield delta
+
+        async def _caption(sentence: str) -> None:
+            if self.scene_actions:
+                await self.scene_actions.send_caption("watson", sentence)
+
+        async def _push(frame: rtc.AudioFrame) -> None:
+            if cache is not None:
+                captured.append(bytes(frame.data.cast("B")))
+            await self.voice_track.push(frame)
+
+        # 2. Stream sentences from the LLM straight into Cartesia (Sonic-2),
+        # captioning each one as it is handed to the TTS
+        watson_response_text = ""
+        self.speech_finished.clear()
+        playout = None
         try:
-             # Create source and track for Watson
-            source = rtc.AudioSource(24000, 1)
-            track = rtc.LocalAudioTrack.create_audio_track("watson_audio", source)
-            options = rtc.TrackPublishOptions(source=rtc.TrackSource.SOURCE_MICROPHONE)
-            publication = await self.room.local_participant.publish_track(track, options)
-            
-            # Initialize Cartesia manually
-            # specific model and voice as requested/fixed
-            async with aiohttp.ClientSession() as http_session:
-                tts = cartesia.TTS(model="sonic-2", voice=self.watson_voice_id, http_session=http_session)
+            await self.voice_track.start()
+            playout = self.voice_track.begin_playout()
 
-                stream = tts.synthesize(text=watson_response_text)
-                
-                async for chunk in stream:
-                    # chunk is SynthesizedAudio
-                    # It has .frame which is rtc.AudioFrame
-                    if chunk.frame:
-                        await source.capture_frame(chunk.frame)
-                        
-            # Simple heuristic to prevent Moriarty from speaking over Watson
-            # Approx 15 chars per second
-            estimated_duration = len(watson_response_text) / 15.0
-            logger.info(f"Generated {len(watson_response_text)} chars. Waiting {estimated_duration:.2f}s for playback...")
-            await asyncio.sleep(estimated_duration)
-
-            # Clean up
-            await self.room.local_participant.unpublish_track(publication.sid)
+            deltas = None
+            if cached_text is None:
+                # Wait for the first delta so a failed LLM call never opens a TTS stream
+                llm_deltas = _llm_deltas()
+                try:
+                    first_delta = await llm_deltas.__anext__()
+                except StopAsyncIteration:
+                    first_delta = None
+                if first_delta is None:
+                    used_fallback = True
+                    cached_text = fallback_text
+                    if audio_bank.sample_rate == tts.sample_rate:
+                        cached_pcm = audio_bank.get(self.watson_voice, fallback_text)
+                else:
+                    deltas = _prepend(first_delta, llm_deltas)
+
+            if cached_pcm is not None:
+                watson_response_text = cached_text
+                chunker = SentenceChunker()
+                sentences = chunker.push(cached_text + " ")
+                # Short replies or ones without closing punctuation stay in the buffer
+                rest = chunker.flush()
+                if rest:
+                    sentences.append(rest)
+                for sentence in sentences:
+                    await _caption(sentence)
+                for chunk in iter_pcm_frames(cached_pcm, tts.sample_rate):
+                    if "first_audio_ms" not in timings:
+                        timings["first_audio_ms"] = (time.perf_counter() - llm_start) * 1000
+                    await self.voice_track.push(rtc.AudioFrame(
+                        data=chunk, sample_rate=tts.sample_rate, num_channels=1, samples_per_channel=len(chunk) // 2,
+                    ))
+                timings["speech_total_ms"] = (time.perf_counter() - llm_start) * 1000
+            else:
+                speech = await stream_speech(
+                    deltas or _text_deltas(cached_text),
+                    tts,
+                    on_frame=_push,
+                    on_sentence=_caption,
+                    started_at=llm_start,
+                )
+                watson_response_text = speech.text
+                if speech.first_audio_ms is not None:
+                    timings["first_audio_ms"] = speech.first_audio_ms
+                timings["speech_total_ms"] = speech.total_ms
+            logger.info(f"Watson says: {watson_response_text}")
+
+            if cache is not None and watson_response_text and not used_fallback and not llm_error and cached_pcm is None:
+                if not text_hit:
+                    cache.answers.store(query, watson_response_text)
+                await cache.speech.put(
+                    SpeechCache.key(watson_response_text, self.watson_voice_id, self.watson_tts_model, tts.sample_rate),
+                    b"".join(captured),
+                )
+
+            # Hold the tool result until the captured audio has played out so
+            # Moriarty does not talk over Watson
+            await self.voice_track.end_playout(playout)
+            timings["audio_ms"] = playout.duration * 1000
+            timings["playout_done_ms"] = (playout.finished_at - llm_start) * 1000
 
         except Exception as e:
             logger.error(f"Watson TTS failed: {e}", exc_info=True)
+        finally:
+            if playout is not None and not playout.done:
+                playout.mark_finished()
+            self.speech_finished.set()
+
+        # Dead air: silence before Watson's first sound plus any gap after he finishes
+        if playout is not None and playout.finished_at is not None and "first_audio_ms" in timings:
+            timings["dead_air_ms"] = timings["first_audio_ms"] + (time.perf_counter() - playout.finished_at) * 1000
+
+        watson_response_text = watson_response_text or fallback_text
+        if cache is not None:
+            saved_ms = cache.record(timings.get("first_audio_ms"), text_hit, text_hit and cached_pcm is not None)
+            if text_hit:
+                timings["cache_saved_ms"] = saved_ms
+        self.latency_samples.append(timings)
+        # first_audio_ms / speech_total_ms are measured from the start of the LLM request
+        logger.info(f"📊 Watson latency: {', '.join(f'{k}={v:.1f}' for k, v in timings.items())}")
 
         return f"Watson replied: '{watson_response_text}'"
 
 
 class SceneActions:
-    def __init__(self, room: rtc.Room):
+    def __init__(self, room: rtc.Room, publisher: Optional[StoryPublisher] = None):
         self.room = room
-
-    async def _publish(self, payload: Dict[str, Any]) -> None:
-        try:
-            data = json.dumps(payload).encode("utf-8")
-            if not self.room.local_participant:
-                logger.warning("SceneActions: local participant unavailable")
-                return
-            await self.room.local_participant.publish_data(
-                data,
-                kind=rtc.DataPacketKind.RELIABLE,
-                topic="story",
-            )
-        except Exception as e:
-            logger.warning(f"SceneActions publish failed: {e}")
+        # Scene and caption updates are coalesced into one data packet per short window
+        self.publisher = publisher or StoryPublisher(
+            room, window_ms=float(os.getenv("STORY_BATCH_WINDOW_MS", "120"))
+        )
 
     @llm.function_tool(
         description="Set the current scene for the UI. scene must be one of: study, market, underpass, landmark."
@@ -204,7 +410,7 @@ class SceneActions:
         scene_key = scene.strip().lower()
         if scene_key not in {"study", "market", "underpass", "landmark"}:
             scene_key = "study"
-        await self._publish({"type": "SCENE_SET", "scene": scene_key})
+        await self.publisher.set_scene(scene_key)
         return f"Scene set to {scene_key}"
 
     @llm.function_tool(
@@ -214,9 +420,7 @@ class SceneActions:
         speaker_key = speaker.strip().lower()
         if speaker_key not in {"moriarty", "watson"}:
             speaker_key = "moriarty"
-        await self._publish(
-            {"type": "CAPTION", "speaker": speaker_key, "text": text}
-        )
+        await self.publisher.caption(speaker_key, text)
         return "Caption sent"
 
 
@@ -230,227 +434,376 @@ def get_vad():
     return vad_instance
 
 
+async def _unwatch_room(room_name: str) -> None:
+    metadata_resolver.unwatch(room_name)
+
+
+def prewarm(proc: JobProcess):
+    """Load VAD and playback audio once per job process"""
+    timings = {}
+    start = time.perf_counter()
+
+    step = time.perf_counter()
+    proc.userdata["vad"] = get_vad()
+    timings["vad_ms"] = (time.perf_counter() - step) * 1000
+
+    # BVC() only describes the filter; the model runs inside the room's audio stream
+    proc.userdata["noise_cancellation"] = noise_cancellation.BVC()
+
+    step = time.perf_counter()
+    try:
+        audio_bank.load()
+    except Exception as e:
+        logger.warning(f"Failed to load scripted audio pack: {e}")
+    for name in ("machine-gun-01.wav", "bg.mp3"):
+        path = os.path.join(PLAYBACK_DIR, name)
+        if os.path.exists(path):
+            try:
+                pcm_cache.preload(path)
+            except Exception as e:
+                logger.warning(f"Failed to preload {path}: {e}")
+    timings["playback_audio_ms"] = (time.perf_counter() - step) * 1000
+
+    timings["total_ms"] = (time.perf_counter() - start) * 1000
+    proc.userdata["prewarm_timings"] = timings
+    logger.info(f"🔥 Prewarm complete: {', '.join(f'{k}={v:.1f}' for k, v in timings.items())}")
+
+
+def load_job_models(proc: JobProcess) -> Dict[str, Any]:
+    """Fetch prewarmed models for a job, loading them inline if prewarm never ran"""
+    start = time.perf_counter()
+    warm = "vad" in proc.userdata
+    if not warm:
+        logger.warning("Worker was not prewarmed; loading models on the call path")
+        prewarm(proc)
+
+    # The turn detector's weights are served by the worker's inference process;
+    # the handle is cheap but needs a job context, so each job creates its own
+    turn_detection = None
+    if MultilingualModel is None:
+        logger.warning("Turn detector plugin not installed; using VAD endpointing")
+    else:
+        try:
+            turn_detection = MultilingualModel()
+        except Exception as e:
+            logger.warning(f"Turn detector init failed: {e}")
+
+    proc.userdata["jobs_started"] = proc.userdata.get("jobs_started", 0) + 1
+    return {
+        "vad": proc.userdata["vad"],
+        "turn_detection": turn_detection,
+        "noise_cancellation": proc.userdata["noise_cancellation"],
+        "warm": warm,
+        "load_ms": (time.perf_counter() - start) * 1000,
+        "prewarm_ms": proc.userdata.get("prewarm_timings", {}).get("total_ms", 0.0),
+        "job_number": proc.userdata["jobs_started"],
+    }
+
+
 async def entrypoint(ctx: JobContext):
     """
     Main entrypoint for the agent worker.
     This is called when a room is created or when an agent is requested.
+
+    Startup runs as a dependency graph: the room connection, metadata lookup
+    and intro audio load overlap, and the greeting is pre-rendered while the
+    intro plays. A per-step timing trace is logged once the greeting starts.
     """
     logger.info(f"Starting agent for room: {ctx.room.name}")
-    
-    # Explicitly fetch fresh room metadata to avoid race conditions
-    room_metadata = ctx.room.metadata
-    
-    try:
-        from livekit import api
-        lkapi = api.LiveKitAPI(os.getenv("LIVEKIT_URL"), os.getenv("LIVEKIT_API_KEY"), os.getenv("LIVEKIT_API_SECRET"))
-        rooms = await lkapi.room.list_rooms(api.ListRoomsRequest(names=[ctx.room.name]))
-        if rooms.rooms:
-            room_metadata = rooms.rooms[0].metadata
-            logger.info(f"🔄 FRESH METADATA FETCHED: {room_metadata}")
-        await lkapi.aclose()
-    except Exception as e:
-        logger.warning(f"Failed to fetch fresh metadata, using context metadata: {e}")
-
-    if not room_metadata:
-        logger.warning("⚠️ NO ROOM METADATA FOUND. Persona will default to standard assistant.")
-    else:
-        logger.info(f"✅ METADATA RECEIVED: {room_metadata}")
-    
-    room_metadata = room_metadata or "{}"
-    
-    # Parse metadata for custom instructions
-    instructions = None
-    stt_model = "deepgram/nova-3-general"#"assemblyai/universal-streaming:en"
-    llm_model = "openai/gpt-4o-mini"
-    tts_model = "cartesia/sonic-2:9626c31c-bec5-4cca-baa8-f8ba9e84c8bc"
-    
-    try:
-        import json
-        metadata = json.loads(room_metadata)
-        instructions = metadata.get("instructions")
-        stt_model = metadata.get("stt_model", stt_model)
-        llm_model = metadata.get("llm_model", llm_model)
-        tts_model = metadata.get("tts_model", tts_model)
-    except Exception as e:
-        logger.warning(f"Could not parse room metadata: {e}")
-
-    # Check for Riddler/Moriarty persona trigger
-    if instructions is None and "crime_type" in metadata or "riddler" in str(metadata).lower():
-        logger.info("Activating Riddler/Moriarty Persona")
-        instructions = get_criminal_mindset_prompt(metadata)
+    graph = StartupGraph(ctx.room.name)
 
-    
     # Initialize usage collector for metrics
     usage_collector = metrics.UsageCollector()
-    
 
-    
     scene_actions = SceneActions(room=ctx.room)
 
-    if instructions:
-        watson = WatsonActions(room=ctx.room, scene_actions=scene_actions)
-        session = AgentSession(
-            stt=stt_model,
-            llm=openai.LLM(
-                model="o3-mini",
-            ),
-            tts=tts_model,
-            tools=[watson.ask_watson, scene_actions.set_scene, scene_actions.send_caption],
-            preemptive_generation=False,
-        )
-    else:
+    # Every agent-side sound (stingers, ambience, Watson) shares one published track
+    mixer = AudioMixer(ctx.room, "agent_audio")
+
+    intro_path = os.path.join(PLAYBACK_DIR, "machine-gun-01.wav")
+    bg_path = os.path.join(PLAYBACK_DIR, "bg.mp3")
+
+    # The resolver's API client for this loop is closed when the last job on it shuts down
+    metadata_resolver.attach()
+    ctx.add_shutdown_callback(metadata_resolver.release)
+
+    async def _resolve_metadata(_):
+        # Explicitly fetch fresh room metadata to avoid race conditions
+        # (shared client, short TTL cache and single-flight across jobs in this worker)
+        metadata_start = time.perf_counter()
+        room_metadata, metadata_source = await metadata_resolver.resolve(ctx.room.name, fallback=ctx.room.metadata)
+        metadata_ms = (time.perf_counter() - metadata_start) * 1000
+        if metadata_source in ("api", "shared"):
+            logger.info(f"🔄 FRESH METADATA FETCHED: {room_metadata}")
+        logger.info(f"⏱️ Metadata resolved from {metadata_source} in {metadata_ms:.1f}ms")
+
+        if not room_metadata:
+            logger.warning("⚠️ NO ROOM METADATA FOUND. Persona will default to standard assistant.")
+        else:
+            logger.info(f"✅ METADATA RECEIVED: {room_metadata}")
+        return room_metadata or "{}", metadata_source, metadata_ms
+
+    def _configure(results):
+        room_metadata = results["metadata"][0]
+
+        # Parse metadata for custom instructions
+        config: Dict[str, Any] = {
+            "instructions": None,
+            "stt_model": "deepgram/nova-3-general",#"assemblyai/universal-streaming:en"
+            "llm_model": "openai/gpt-4o-mini",
+            "tts_model": VOICES["moriarty"],
+            "metadata": {},
+        }
+        try:
+            metadata = json.loads(room_metadata)
+            config["metadata"] = metadata
+            config["instructions"] = metadata.get("instructions")
+            for key in ("stt_model", "llm_model", "tts_model"):
+                config[key] = metadata.get(key, config[key])
+        except Exception as e:
+            logger.warning(f"Could not parse room metadata: {e}")
+
+        # Check for Riddler/Moriarty persona trigger
+        metadata = config["metadata"]
+        if config["instructions"] is None and wants_persona(metadata):
+            logger.info(f"Activating Riddler/Moriarty Persona ({select_persona(metadata)})")
+            config["instructions"] = get_criminal_mindset_prompt(metadata)
+            logger.info(f"📊 Persona prompt cache: {prompt_cache.stats()}")
+        return config
+
+    def _build_session(results):
+        config, models = results["config"], results["models"]
+        instructions = config["instructions"]
+        watson: Optional[WatsonActions] = None
+        tools = [scene_actions.set_scene, scene_actions.send_caption]
+        if instructions:
+            watson = WatsonActions(
+                room=ctx.room,
+                scene_actions=scene_actions,
+                voice=mixer.add_stream("watson", speech=True),
+                response_cache=watson_cache,
+            )
+            tools.insert(0, watson.ask_watson)
+
         session = AgentSession(
-            stt=stt_model,
+            stt=config["stt_model"],
             llm=openai.LLM(model="o3-mini"),
-            tts=tts_model,
-            tools=[scene_actions.set_scene, scene_actions.send_caption],
+            tts=config["tts_model"],
+            tools=tools,
+            vad=models["vad"],
+            turn_detection=models["turn_detection"],
             preemptive_generation=False,
         )
 
-    
-    @session.on("metrics_collected")
-    def _on_metrics_collected(ev: MetricsCollectedEvent):
-        """Log metrics when collected"""
-        metrics.log_metrics(ev.metrics)
-        usage_collector.collect(ev.metrics)
-    
-    async def log_usage():
-        """Log usage summary on shutdown"""
-        summary = usage_collector.get_summary()
-        logger.info(f"Session usage summary: {summary}")
-    
-    # Register shutdown callback
-    ctx.add_shutdown_callback(log_usage)
-    
-    # Start the agent session
-    await session.start(
-        agent=VoiceAssistant(instructions=instructions),
-        room=ctx.room,
-        room_input_options=RoomInputOptions(
-            noise_cancellation=noise_cancellation.BVC(),  # Background voice cancellation
-        ),
-    )
-    
-    # Connect to the room
-    await ctx.connect()
+        # Long riddle games would otherwise resend every turn and caption echo forever
+        budget = None
+        if instructions:
+            budget = ChatContextBudget.from_metadata(
+                config["metadata"],
+                max_tokens=int(os.getenv("CHAT_CONTEXT_MAX_TOKENS", "3000")),
+                keep_turns=int(os.getenv("CHAT_CONTEXT_KEEP_TURNS", "4")),
+            )
 
-    # Set an initial scene for the UI as soon as the agent joins
-    await scene_actions.set_scene("study")
-    
-    async def _scene_timeline():
-        try:
-            await asyncio.sleep(8)
-            await scene_actions.set_scene("market")
-            await asyncio.sleep(6)
-            await scene_actions.set_scene("underpass")
-            await asyncio.sleep(6)
-            await scene_actions.set_scene("landmark")
-        except Exception as e:
-            logger.warning(f"Scene timeline error: {e}")
+        @session.on("metrics_collected")
+        def _on_metrics_collected(ev: MetricsCollectedEvent):
+            """Log metrics when collected"""
+            metrics.log_metrics(ev.metrics)
+            usage_collector.collect(ev.metrics)
+
+        async def log_usage():
+            """Log usage summary on shutdown"""
+            summary = usage_collector.get_summary()
+            logger.info(f"Session usage summary: {summary}")
+            if watson is not None:
+                logger.info(f"Watson latency summary: {watson.latency_summary()}")
+                logger.info(f"Watson response cache: {watson_cache.stats()}")
+            logger.info(f"Scripted audio bank: {audio_bank.stats()}")
+            logger.info(f"Playback pacing summary: {mixer.pacer.stats()}")
+            if budget is not None:
+                logger.info(f"Chat context compactions: {budget.compactions}, clues pinned: {len(budget.clues)} (+{budget.earlier_clues} condensed)")
+
+        @session.on("agent_state_changed")
+        def _on_agent_state_changed(ev):
+            """Duck the ambience while Moriarty is speaking"""
+            mixer.set_external_speech(ev.new_state == "speaking")
+
+        # Register shutdown callback
+        ctx.add_shutdown_callback(log_usage)
+        if watson is not None:
+            ctx.add_shutdown_callback(watson.aclose)
+        return session, budget
+
+    async def _start_session(results):
+        session, budget = results["session"]
+        await session.start(
+            agent=VoiceAssistant(instructions=results["config"]["instructions"], budget=budget),
+            room=ctx.room,
+            room_input_options=RoomInputOptions(
+                noise_cancellation=results["models"]["noise_cancellation"],  # Background voice cancellation
+            ),
+        )
+
+    async def _after_connect(_):
+        # From here on, metadata updates arrive as room events instead of polls
+        metadata_resolver.watch(ctx.room)
+        ctx.add_shutdown_callback(lambda: _unwatch_room(ctx.room.name))
+
+        def _on_cue(cue: Cue):
+            if cue.action == "scene":
+                return scene_actions.set_scene(*cue.args)
+            if cue.action == "caption":
+                return scene_actions.send_caption(*cue.args)
+            logger.warning(f"Unknown scene timeline cue: {cue.action}")
+
+        # The opening "study" scene is the schedule's first cue, sent as soon as the agent joins
+        # One scheduler per event loop; each job has its own loop, so this is normally just our room
+        timeline_scheduler = loop_scheduler()
+        timeline = timeline_scheduler.timeline(ctx.room.name, OPENING_SCHEDULE, _on_cue)
+        timeline.start()
+
+        @ctx.room.on("data_received")
+        def _on_data_received(packet: rtc.DataPacket):
+            """Player actions from the UI branch the timeline"""
+            if packet.topic != "action":
+                return
+            try:
+                action = json.loads(packet.data)
+            except Exception as e:
+                logger.warning(f"Ignoring malformed player action: {e}")
+                return
+            if not isinstance(action, dict):
+                logger.warning(f"Ignoring player action that is not an object: {action!r}")
+                return
+            key = action.get("type", "")
+            if action.get("clue"):
+                key = f"{key}:{str(action['clue']).lower()}"
+            if timeline.branch(key):
+                logger.info(f"Scene timeline branched on {key}")
+
+        # Hold the timeline while no player is in the room
+        @ctx.room.on("participant_disconnected")
+        def _on_participant_disconnected(_participant):
+            if not ctx.room.remote_participants:
+                timeline.pause()
+
+        @ctx.room.on("participant_connected")
+        def _on_participant_connected(_participant):
+            timeline.resume()
+
+        async def _stop_timeline():
+            timeline.cancel()
+            logger.info(f"Scene timelines: {timeline_scheduler.stats()}")
+
+        ctx.add_shutdown_callback(_stop_timeline)
 
-    asyncio.create_task(_scene_timeline())
-    
     # --------------------------------------------------------------------------
     # Audio Playback Logic
     # --------------------------------------------------------------------------
-    from livekit import rtc
-    import asyncio
-    
-    async def _play_audio_file(file_path: str, loop: bool = False, volume: float = 1.0):
-        """Plays an audio file into the room."""
-        try:
-            source = rtc.AudioSource(24000, 1) # 24kHz, 1 channel
-            track = rtc.LocalAudioTrack.create_audio_track("audio_player", source)
-            options = rtc.TrackPublishOptions(source=rtc.TrackSource.SOURCE_MICROPHONE)
-            publication = await ctx.room.local_participant.publish_track(track, options)
-            
-            import av
-
-            while True:
-                try:
-                    container = av.open(file_path)
-                    stream = container.streams.audio[0]
-                    resampler = av.AudioResampler(
-                        format='s16',
-                        layout='mono',
-                        rate=24000,
-                    )
-
-                    for frame in container.decode(stream):
-                        frames = resampler.resample(frame)
-                        for f in frames:
-                           data = f.to_ndarray().tobytes()
-                           if volume != 1.0:
-                               import numpy as np
-                               audio_data = np.frombuffer(data, dtype=np.int16)
-                               audio_data = (audio_data * volume).astype(np.int16)
-                               data = audio_data.tobytes()
-                               
-                           audio_frame = rtc.AudioFrame(
-                               data=data,
-                               sample_rate=24000,
-                               num_channels=1,
-                               samples_per_channel=f.samples
-                           )
-                           await source.capture_frame(audio_frame)
-                    
-                    container.close()
-                    
-                except Exception as e:
-                    logger.error(f"Error reading audio file {file_path}: {e}")
-                    break
-                    
-                if not loop:
-                    break
-                    
-            await ctx.room.local_participant.unpublish_track(publication.sid)
-            
-        except Exception as e:
-             logger.error(f"Failed to play audio {file_path}: {e}")
 
-    # 1. Play Intro Sound (Machine Gun)
-    intro_path = os.path.join(os.path.dirname(__file__), "playback_audios", "machine-gun-01.wav")
-    if os.path.exists(intro_path):
+    async def _load_intro(_):
+        # Decoded and resampled once per process; usually already cached by prewarm
+        if not os.path.exists(intro_path):
+            logger.warning(f"Intro audio not found at: {intro_path}")
+            return None
+        return await pcm_cache.load(intro_path)
+
+    async def _play_intro(results):
+        pcm = results["intro_audio"]
+        if pcm is None:
+            return
+        if not mixer.running:
+            # The optional mixer step failed; go straight to the greeting
+            logger.warning("Mixer not running; skipping intro audio")
+            return
+        # Wait so it plays BEFORE hello
         logger.info(f"Playing intro audio: {intro_path}")
-        # Run in background (fire and forget? or wait?) - Wait so it plays BEFORE hello
-        await _play_audio_file(intro_path, loop=False, volume=0.5)
-    else:
-        logger.warning(f"Intro audio not found at: {intro_path}")
+        graph.mark("first_audio")
+        await mixer.play_pcm(os.path.basename(intro_path), pcm, loop=False, gain=0.5).wait()
 
-    # 2. Start Background Loop (Fire and forget task)
-    bg_path = os.path.join(os.path.dirname(__file__), "playback_audios", "bg.mp3")
-    if os.path.exists(bg_path):
+    async def _start_background(results):
+        if not os.path.exists(bg_path):
+            logger.warning(f"Background audio not found at: {bg_path}")
+            return
         bg_volume = 0.1
+        metadata = results["config"]["metadata"]
         try:
              if "bg_volume" in metadata:
                  bg_volume = float(metadata.get("bg_volume"))
         except: pass
-        
+
         logger.info(f"Starting background audio: {bg_path} (Vol: {bg_volume})")
-        asyncio.create_task(_play_audio_file(bg_path, loop=True, volume=bg_volume))
-    else:
-        logger.warning(f"Background audio not found at: {bg_path}")
-    
-    # --------------------------------------------------------------------------
-    
+        # Loops just re-slice the cached buffer
+        pcm = await pcm_cache.load(bg_path)
+        mixer.play_pcm(os.path.basename(bg_path), pcm, loop=True, gain=bg_volume, fade_in_ms=1500)
+
     # --------------------------------------------------------------------------
-    
-    # 3. Dynamic Greeting based on Persona
+    # Dynamic Greeting based on Persona
     # --------------------------------------------------------------------------
-    
-    # 3. Dynamic Greeting based on Persona
-    initial_greeting = "Hello. How can I help you today?"
-    if instructions:
-         initial_greeting = "Welcome Sherlock and Watson to the game of LIFE!"
-         
-    # Audio playback logic and greeting are handled below
-    
-    await session.say(
-       initial_greeting,
-       allow_interruptions=False,
-    )
-    logger.info(f"Agent successfully started in room: {ctx.room.name}")
 
+    def _greeting_text(results):
+        return MORIARTY_GREETING if results["config"]["instructions"] else ASSISTANT_GREETING
+
+    async def _render_greeting(results):
+        """Greeting audio, ready before the intro ends: from the pack, else synthesized now"""
+        text = _greeting_text(results)
+        greeting_pcm = audio_bank.get(results["config"]["tts_model"], text)
+        if greeting_pcm is not None:
+            return [frame async for frame in audio_bank.frames(greeting_pcm)]
+        session, _ = results["session"]
+        if session.tts is None:
+            return None
+        frames = []
+        async for audio in session.tts.synthesize(text):
+            frames.append(audio.frame)
+        return frames
+
+    async def _greet(results):
+        session, _ = results["session"]
+        frames = results["greeting_audio"]
+
+        async def _frames():
+            for frame in frames:
+                yield frame
+
+        graph.mark("first_audio")
+        graph.mark("greeting")
+        # Live TTS only if neither the pack nor the pre-render produced audio
+        await session.say(
+           _greeting_text(results),
+           audio=_frames() if frames else None,
+           allow_interruptions=False,
+        )
+
+    graph.add("models", lambda _: load_job_models(ctx.proc))
+    graph.add("metadata", _resolve_metadata)
+    graph.add("connect", lambda _: ctx.connect())
+    graph.add("intro_audio", _load_intro, optional=True)
+    graph.add("config", _configure, deps=["metadata"])
+    graph.add("session", _build_session, deps=["config", "models"])
+    graph.add("session_start", _start_session, deps=["session"])
+    graph.add("room_ready", _after_connect, deps=["connect"])
+    graph.add("mixer", lambda _: mixer.start(), deps=["connect"], optional=True)
+    graph.add("intro", _play_intro, deps=["mixer", "intro_audio"], optional=True)
+    graph.add("background", _start_background, deps=["intro", "config"], optional=True)
+    graph.add("greeting_audio", _render_greeting, deps=["session_start"], optional=True)
+    graph.add("greeting", _greet, deps=["connect", "intro", "greeting_audio", "session_start"])
+
+    ctx.add_shutdown_callback(mixer.aclose)
+    ctx.add_shutdown_callback(scene_actions.publisher.aclose)
+
+    results = await graph.run()
+    models = results["models"]
+    _, metadata_source, metadata_ms = results["metadata"]
+    trace = graph.trace()
+    logger.info(f"Agent successfully started in room: {ctx.room.name}")
+    logger.info(
+        f"⏱️ {'Warm' if models['warm'] else 'Cold'} start (job #{models['job_number']} in this process): "
+        f"models={models['load_ms']:.1f}ms prewarm={models['prewarm_ms']:.1f}ms "
+        f"metadata={metadata_ms:.1f}ms ({metadata_source}) "
+        f"join_to_first_audio={trace.marks.get('first_audio', float('nan')):.1f}ms "
+        f"join_to_greeting={trace.marks.get('greeting', float('nan')):.1f}ms"
+    )
+    logger.info(f"⏱️ Startup trace: {trace.format()}")
 
 
 if __name__ == "__main__":
@@ -458,5 +811,6 @@ if __name__ == "__main__":
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
+            prewarm_fnc=prewarm,
         )
     )
@@ -0,0 +1,166 @@
+import argparse
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+import struct
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from livekit import rtc
+
+from pcm_cache import SAMPLE_RATE, iter_pcm_frames
+
+logger = logging.getLogger("agent-worker")
+
+PLAYBACK_DIR = os.path.join(os.path.dirname(__file__), "playback_audios")
+DEFAULT_PACK_PATH = os.path.join(PLAYBACK_DIR, "scripted_lines.pack")
+
+# Voices as LiveKit inference descriptors: provider/model:voice
+VOICES: Dict[str, str] = {
+    "moriarty": "cartesia/sonic-2:9626c31c-bec5-4cca-baa8-f8ba9e84c8bc",
+    "watson": "cartesia/sonic-2:0ad65e7f-006c-47cf-bd31-52279d487913",
+}
+
+MORIARTY_GREETING = "Welcome Sherlock and Watson to the game of LIFE!"
+ASSISTANT_GREETING = "Hello. How can I help you today?"
+WATSON_FALLBACK = "I cannot form a thought right now. The fog is too thick."
+
+# Every line the agents say verbatim, with the voices it is spoken in
+SCRIPTED_LINES: List[Tuple[str, str]] = [
+    ("moriarty", MORIARTY_GREETING),
+    ("moriarty", ASSISTANT_GREETING),
+    ("watson", WATSON_FALLBACK),
+]
+
+# Pack layout (little-endian):
+#   header  magic(8) sample_rate(u32) count(u32)
+#   index   count x [sha256(voice \0 text)(32) offset(u64) length(u64)]
+#   data    mono s16 PCM clips back to back; offsets are from the file start
+_MAGIC = b"SHBANK01"
+_HEADER = struct.Struct("<8sII")
+_ENTRY = struct.Struct("<32sQQ")
+
+
+def line_key(voice: str, text: str) -> bytes:
+    return hashlib.sha256(f"{voice}\0{text}".encode("utf-8")).digest()
+
+
+def write_pack(path: str, clips: Dict[bytes, bytes], sample_rate: int = SAMPLE_RATE) -> int:
+    """Write clips to an indexed pack atomically; returns the file size"""
+    offset = _HEADER.size + _ENTRY.size * len(clips)
+    index = []
+    for key, pcm in clips.items():
+        index.append(_ENTRY.pack(key, offset, len(pcm)))
+        offset += len(pcm)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, sample_rate, len(clips)))
+        f.writelines(index)
+        f.writelines(clips.values())
+    os.replace(tmp_path, path)
+    return offset
+
+
+class AudioBank:
+    """
+    Pre-rendered speech for the agents' scripted lines.
+
+    The pack is built offline (`python audio_bank.py`) and memory-mapped at
+    runtime, so every worker process shares one page-cache copy. A line
+    missing from the pack, or spoken in a voice it was not rendered for,
+    returns None and the caller falls back to live TTS.
+    """
+
+    def __init__(self, path: str = DEFAULT_PACK_PATH) -> None:
+        self.path = path
+        self.sample_rate = SAMPLE_RATE
+        self._data: Optional[memoryview] = None
+        self._index: Dict[bytes, Tuple[int, int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def load(self) -> "AudioBank":
+        if self._data is not None:
+            return self
+        if not os.path.exists(self.path):
+            logger.info(f"No scripted audio pack at {self.path}; scripted lines use live TTS")
+            return self
+        with open(self.path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, sample_rate, count = _HEADER.unpack_from(mapped, 0)
+        if magic != _MAGIC:
+            mapped.close()
+            raise ValueError(f"{self.path} is not a scripted audio pack")
+        index: Dict[bytes, Tuple[int, int]] = {}
+        for i in range(count):
+            key, offset, length = _ENTRY.unpack_from(mapped, _HEADER.size + i * _ENTRY.size)
+            index[key] = (offset, length)
+        self._data = memoryview(mapped)
+        self._index = index
+        self.sample_rate = sample_rate
+        logger.info(f"Loaded {count} scripted lines from {self.path}")
+        return self
+
+    def get(self, voice: str, text: str) -> Optional[memoryview]:
+        entry = self._index.get(line_key(voice, text))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        offset, length = entry
+        return self._data[offset:offset + length]
+
+    async def frames(self, pcm) -> AsyncIterator[rtc.AudioFrame]:
+        """Yield a clip as 20 ms frames, e.g. for `AgentSession.say(audio=...)`"""
+        for chunk in iter_pcm_frames(pcm, self.sample_rate):
+            yield rtc.AudioFrame(
+                data=chunk, sample_rate=self.sample_rate, num_channels=1, samples_per_channel=len(chunk) // 2
+            )
+
+    def stats(self) -> Dict[str, int]:
+        return {"lines": len(self._index), "hits": self.hits, "misses": self.misses}
+
+
+async def _render(descriptor: str, text: str, http_session, sample_rate: int) -> bytes:
+    from livekit.plugins import cartesia
+
+    provider, _, model_voice = descriptor.partition("/")
+    model, _, voice = model_voice.partition(":")
+    if provider != "cartesia":
+        raise ValueError(f"Cannot pre-render voice {descriptor}: only cartesia voices are supported")
+    tts = cartesia.TTS(model=model, voice=voice, sample_rate=sample_rate, http_session=http_session)
+    try:
+        chunks = []
+        async for audio in tts.synthesize(text=text):
+            chunks.append(bytes(audio.frame.data.cast("B")))
+        return b"".join(chunks)
+    finally:
+        await tts.aclose()
+
+
+async def build(path: str, sample_rate: int = SAMPLE_RATE) -> None:
+    """Render every scripted line in its voice through Cartesia and write the pack"""
+    import aiohttp
+
+    clips: Dict[bytes, bytes] = {}
+    async with aiohttp.ClientSession() as http_session:
+        for voice_name, text in SCRIPTED_LINES:
+            descriptor = VOICES[voice_name]
+            pcm = await _render(descriptor, text, http_session, sample_rate)
+            clips[line_key(descriptor, text)] = pcm
+            print(f"{voice_name:<9} {len(pcm) / 2 / sample_rate:5.2f}s  {text}")
+    size = write_pack(path, clips, sample_rate)
+    print(f"Wrote {len(clips)} lines ({size / 1024:.0f} KiB) to {path}")
+
+
+if __name__ == "__main__":
+    # python audio_bank.py -> pre-render scripted lines (needs CARTESIA_API_KEY)
+    from dotenv import load_dotenv
+
+    load_dotenv(".env")
+    parser = argparse.ArgumentParser(description="Pre-render the agents' scripted lines into an audio pack")
+    parser.add_argument("--out", default=DEFAULT_PACK_PATH)
+    parser.add_argument("--sample-rate", type=int, default=SAMPLE_RATE)
+    args = parser.parse_args()
+    asyncio.run(build(args.out, args.sample_rate))
@@ -0,0 +1,110 @@
+from typing import Optional
+
+import numpy as np
+
+INT16_MIN = np.float32(-32768)
+INT16_MAX = np.float32(32767)
+
+
+class GainStage:
+    """
+    Saturating int16 gain with linear ramps and no per-frame buffer churn.
+
+    All scratch space is allocated up front (and only grown if a larger
+    frame ever arrives); `process_into` writes straight into the caller's
+    output buffer, e.g. the data of a freshly created `rtc.AudioFrame`.
+    """
+
+    def __init__(self, gain: float = 1.0, max_samples: int = 960) -> None:
+        self.gain = float(gain)
+        self._target = self.gain
+        self._ramp_step = 0.0
+        self._ramp_remaining = 0
+        self._allocate(max_samples)
+
+    def _allocate(self, samples: int) -> None:
+        self._capacity = samples
+        self._work = np.empty(samples, dtype=np.float32)
+        self._ramp = np.empty(samples, dtype=np.float32)
+        self._index = np.arange(1, samples + 1, dtype=np.float32)
+        self._out = np.empty(samples, dtype=np.int16)
+
+    @property
+    def ramping(self) -> bool:
+        return self._ramp_remaining > 0
+
+    def set_gain(self, gain: float) -> None:
+        """Jump to a gain immediately"""
+        self.gain = self._target = float(gain)
+        self._ramp_remaining = 0
+
+    def ramp_to(self, gain: float, samples: int) -> None:
+        """Move linearly to `gain` over the next `samples` samples"""
+        if samples <= 0:
+            self.set_gain(gain)
+            return
+        self._target = float(gain)
+        self._ramp_step = (self._target - self.gain) / samples
+        self._ramp_remaining = samples
+
+    def ramp_to_ms(self, gain: float, duration_ms: float, sample_rate: int = 24000) -> None:
+        self.ramp_to(gain, int(sample_rate * duration_ms / 1000))
+
+    def process_into(self, data, out) -> None:
+        """Apply gain to s16 `data` and write the result into s16 `out`"""
+        src = np.frombuffer(data, dtype=np.int16)
+        dst = out if isinstance(out, np.ndarray) else np.frombuffer(out, dtype=np.int16)
+        n = src.shape[0]
+        if n > self._capacity:
+            self._allocate(n)
+
+        if not self.ramping and self.gain == 1.0:
+            np.copyto(dst[:n], src)
+            return
+
+        work = self._work[:n]
+        start_gain = self.gain
+        np.copyto(work, src, casting="unsafe")
+
+        if not self.ramping:
+            np.multiply(work, np.float32(self.gain), out=work)
+        else:
+            steps = min(n, self._ramp_remaining)
+            ramp = self._ramp[:n]
+            np.multiply(self._index[:n], np.float32(self._ramp_step), out=ramp)
+            np.add(ramp, np.float32(self.gain), out=ramp)
+            if steps < n:
+                ramp[steps:] = self._target
+            np.multiply(work, ramp, out=work)
+            self._ramp_remaining -= steps
+            self.gain = self._target if not self.ramping else self.gain + self._ramp_step * steps
+
+        # Attenuation can never overflow int16; only saturate when boosting
+        if max(abs(self.gain), abs(self._target), abs(start_gain)) > 1.0:
+            np.minimum(work, INT16_MAX, out=work)
+            np.maximum(work, INT16_MIN, out=work)
+        np.copyto(dst[:n], work, casting="unsafe")
+
+    def process(self, data) -> memoryview:
+        """
+        Apply gain and return a view of the internal output buffer.
+
+        The view is overwritten by the next call, so copy it (as
+        `rtc.AudioFrame` does) before processing another frame.
+        """
+        n = len(data) // 2
+        if n > self._capacity:
+            self._allocate(n)
+        self.process_into(data, self._out[:n])
+        return memoryview(self._out[:n]).cast("B")
+
+
+def mix_into(acc: np.ndarray, data, gain: float = 1.0, scratch: Optional[np.ndarray] = None) -> None:
+    """Add s16 `data` (scaled by `gain`) into a float32 accumulator in place"""
+    src = np.frombuffer(data, dtype=np.int16)
+    n = min(src.shape[0], acc.shape[0])
+    tmp = scratch[:n] if scratch is not None else np.empty(n, dtype=np.float32)
+    np.copyto(tmp, src[:n], casting="unsafe")
+    if gain != 1.0:
+        np.multiply(tmp, np.float32(gain), out=tmp)
+    np.add(acc[:n], tmp, out=acc[:n])
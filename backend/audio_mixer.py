@@ -0,0 +1,430 @@
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+import numpy as np
+from livekit import rtc
+
+from audio_dsp import INT16_MAX, INT16_MIN, GainStage, mix_into
+from audio_pacing import FramePacer
+from audio_output import Playout
+
+logger = logging.getLogger("agent-worker")
+
+
+class MixerInput(ABC):
+    """
+    One sound source feeding an AudioMixer.
+
+    Inputs marked `duck=True` are attenuated to `duck_level` of their gain
+    while any speech is playing; `speech=True` inputs trigger that ducking.
+    """
+
+    def __init__(self, mixer: "AudioMixer", name: str, gain: float, duck: bool, speech: bool) -> None:
+        self.mixer = mixer
+        self.name = name
+        self.gain = gain
+        self.duck = duck
+        self.speech = speech
+        self.stage = GainStage(gain, max_samples=mixer.samples_per_frame)
+        self.ducked = False
+        self.closed = False
+        self.finished = asyncio.Event()
+        self.mixed_samples = 0
+
+    @property
+    @abstractmethod
+    def active(self) -> bool:
+        """Whether this input still has samples to contribute"""
+
+    @abstractmethod
+    def read(self, samples: int) -> List[memoryview]:
+        """Return up to `samples` s16 samples as one or more byte views"""
+
+    def set_gain(self, gain: float, ramp_ms: float = 0.0) -> None:
+        self.gain = gain
+        target = gain * (self.mixer.duck_level if self.ducked else 1.0)
+        self.stage.ramp_to_ms(target, ramp_ms, self.mixer.sample_rate)
+
+    def set_ducked(self, ducked: bool) -> None:
+        if not self.duck or ducked == self.ducked:
+            return
+        self.ducked = ducked
+        ramp_ms = self.mixer.duck_attack_ms if ducked else self.mixer.duck_release_ms
+        self.set_gain(self.gain, ramp_ms)
+
+    def stop(self) -> None:
+        """Remove this input from the mix at the next frame"""
+        self.closed = True
+        self.mixer.wake()
+
+    async def wait(self) -> None:
+        """Resolve once this input has been fully mixed and played out (at once if the mixer is not running)"""
+        if not self.mixer.running:
+            return
+        await self.finished.wait()
+
+
+class PcmInput(MixerInput):
+    """A preloaded PCM buffer (stinger or looping ambience)"""
+
+    def __init__(self, mixer: "AudioMixer", name: str, pcm, loop: bool, gain: float, duck: bool) -> None:
+        super().__init__(mixer, name, gain, duck, speech=False)
+        self.pcm = memoryview(pcm)
+        self.loop = loop
+        self._offset = 0
+
+    @property
+    def active(self) -> bool:
+        return not self.closed and len(self.pcm) > 0 and (self.loop or self._offset < len(self.pcm))
+
+    def read(self, samples: int) -> List[memoryview]:
+        wanted = samples * 2
+        parts: List[memoryview] = []
+        while wanted > 0 and self.active:
+            chunk = self.pcm[self._offset:self._offset + wanted]
+            parts.append(chunk)
+            wanted -= len(chunk)
+            self._offset += len(chunk)
+            if self._offset >= len(self.pcm) and self.loop:
+                self._offset = 0
+        return parts
+
+
+class StreamInput(MixerInput):
+    """
+    Frames pushed at runtime, e.g. streamed TTS.
+
+    Exposes the same push/begin_playout/end_playout interface as
+    PersistentAudioTrack, so speech producers can target either.
+    """
+
+    def __init__(self, mixer: "AudioMixer", name: str, gain: float, duck: bool, speech: bool, max_buffer_ms: int) -> None:
+        super().__init__(mixer, name, gain, duck, speech)
+        self._chunks: Deque[memoryview] = deque()
+        self._buffered = 0
+        self._max_buffered = mixer.sample_rate * max_buffer_ms // 1000 * 2
+        self._space = asyncio.Event()
+        self._space.set()
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._current: Optional[Playout] = None
+
+    @property
+    def active(self) -> bool:
+        return not self.closed and self._buffered > 0
+
+    async def start(self) -> None:
+        await self.mixer.start()
+
+    async def push(self, frame: rtc.AudioFrame) -> None:
+        if frame.sample_rate != self.mixer.sample_rate or frame.num_channels != 1:
+            logger.warning(
+                f"Mixer input '{self.name}' dropped a {frame.sample_rate} Hz/{frame.num_channels}ch frame"
+            )
+            return
+        while self._buffered >= self._max_buffered:
+            self._space.clear()
+            await self._space.wait()
+        data = memoryview(bytes(frame.data.cast("B")))
+        self._chunks.append(data)
+        self._buffered += len(data)
+        self._drained.clear()
+        if self._current is not None:
+            self._current.samples += frame.samples_per_channel
+        self.mixer.wake()
+
+    def read(self, samples: int) -> List[memoryview]:
+        wanted = samples * 2
+        parts: List[memoryview] = []
+        while wanted > 0 and self._chunks:
+            head = self._chunks[0]
+            if len(head) <= wanted:
+                parts.append(self._chunks.popleft())
+                wanted -= len(head)
+            else:
+                parts.append(head[:wanted])
+                self._chunks[0] = head[wanted:]
+                wanted = 0
+        taken = samples * 2 - wanted
+        self._buffered -= taken
+        if self._current is not None and self._current.first_frame_at is None and taken:
+            self._current.first_frame_at = time.perf_counter()
+        if self._buffered < self._max_buffered:
+            self._space.set()
+        if not self._buffered:
+            self._drained.set()
+        return parts
+
+    def clear(self) -> None:
+        self._chunks.clear()
+        self._buffered = 0
+        self._space.set()
+        self._drained.set()
+
+    def begin_playout(self) -> Playout:
+        self._current = Playout(self.mixer.sample_rate)
+        return self._current
+
+    async def end_playout(self, playout: Playout) -> None:
+        """Wait until this input's buffered audio has left the output queue"""
+        if self._current is playout:
+            self._current = None
+        try:
+            await self._drained.wait()
+            if playout.samples:
+                await self.mixer.wait_output_latency()
+        finally:
+            playout.mark_finished()
+
+    async def aclose(self) -> None:
+        self.stop()
+
+
+class AudioMixer:
+    """
+    Real-time mixer that sums every agent sound source into one published track.
+
+    Listeners subscribe to and decode a single stream regardless of how many
+    stingers, ambience loops or voices are playing. Mixing runs in float32
+    scratch buffers and saturates once on output. When nothing is playing
+    the mixer sleeps and the track idles silently.
+    """
+
+    def __init__(
+        self,
+        room: rtc.Room,
+        name: str = "agent_audio",
+        sample_rate: int = 24000,
+        frame_ms: int = 20,
+        queue_ms: int = 200,
+        duck_level: float = 0.35,
+        duck_attack_ms: float = 120.0,
+        duck_release_ms: float = 600.0,
+        target_depth_ms: float = 60.0,
+        report_interval: float = 30.0,
+    ) -> None:
+        self.room = room
+        self.name = name
+        self.sample_rate = sample_rate
+        self.frame_ms = frame_ms
+        self.queue_ms = queue_ms
+        self.samples_per_frame = sample_rate * frame_ms // 1000
+        self.duck_level = duck_level
+        self.duck_attack_ms = duck_attack_ms
+        self.duck_release_ms = duck_release_ms
+
+        self._inputs: List[MixerInput] = []
+        self._acc = np.zeros(self.samples_per_frame, dtype=np.float32)
+        self._scratch_f32 = np.empty(self.samples_per_frame, dtype=np.float32)
+        self._scratch_s16 = np.empty(self.samples_per_frame, dtype=np.int16)
+        self._wake = asyncio.Event()
+        self._external_speech = False
+        self._signal_tasks = set()
+
+        # Frames are released on a monotonic clock to hold a small, steady output buffer
+        self.pacer = FramePacer(frame_ms / 1000.0, target_depth_ms / 1000.0)
+        self.report_interval = report_interval
+        self._last_report = time.monotonic()
+
+        self._source: Optional[rtc.AudioSource] = None
+        self._track: Optional[rtc.LocalAudioTrack] = None
+        self._publication: Optional[rtc.LocalTrackPublication] = None
+        self._task: Optional[asyncio.Task] = None
+        self._start_lock = asyncio.Lock()
+
+        self.publishes = 0
+        self.subscriptions = 0
+        self.frames = 0
+        self.inputs_added = 0
+
+    async def start(self) -> None:
+        """Publish the mixed track and start mixing (idempotent)"""
+        async with self._start_lock:
+            if self._publication is not None:
+                return
+            self._source = rtc.AudioSource(self.sample_rate, 1, queue_size_ms=self.queue_ms)
+            self._track = rtc.LocalAudioTrack.create_audio_track(self.name, self._source)
+            options = rtc.TrackPublishOptions(source=rtc.TrackSource.SOURCE_MICROPHONE)
+            self.room.on("local_track_subscribed", self._on_local_track_subscribed)
+            self._publication = await self.room.local_participant.publish_track(self._track, options)
+            self.publishes += 1
+            self._task = asyncio.create_task(self._run(), name=f"{self.name}-mixer")
+            self._task.add_done_callback(self._on_stopped)
+            logger.info(f"🎚️ Published mixed track '{self.name}'")
+
+    def _on_stopped(self, task: asyncio.Task) -> None:
+        # Nothing will be played out any more; release everyone waiting on an input
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Mixer '{self.name}' stopped: {task.exception()}")
+        for source in self._inputs:
+            source.finished.set()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _on_local_track_subscribed(self, track: rtc.LocalTrack) -> None:
+        if self._track is not None and track.sid == self._track.sid:
+            self.subscriptions += 1
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def _add(self, source: MixerInput) -> MixerInput:
+        self._inputs.append(source)
+        self.inputs_added += 1
+        self.wake()
+        return source
+
+    def play_pcm(
+        self,
+        name: str,
+        pcm,
+        loop: bool = False,
+        gain: float = 1.0,
+        duck: bool = True,
+        fade_in_ms: float = 0.0,
+    ) -> PcmInput:
+        """Start mixing a decoded 24 kHz mono s16 buffer"""
+        source = PcmInput(self, name, pcm, loop, 0.0 if fade_in_ms else gain, duck)
+        if fade_in_ms:
+            source.set_gain(gain, fade_in_ms)
+        return self._add(source)
+
+    def add_stream(
+        self,
+        name: str,
+        gain: float = 1.0,
+        speech: bool = False,
+        duck: bool = False,
+        max_buffer_ms: int = 10_000,
+    ) -> StreamInput:
+        """Register a push-based input (e.g. TTS); it stays in the mix until stopped"""
+        return self._add(StreamInput(self, name, gain, duck, speech, max_buffer_ms))
+
+    def set_external_speech(self, speaking: bool) -> None:
+        """Duck ambience for speech published on another track (the main agent voice)"""
+        self._external_speech = speaking
+        self.wake()
+
+    async def wait_output_latency(self) -> None:
+        """Sleep for the audio already queued in the output source"""
+        if self._source is None:
+            return
+        queued = getattr(self._source, "queued_duration", None)
+        if queued is None:
+            queued = self.queue_ms / 1000.0
+        if queued > 0:
+            await asyncio.sleep(queued)
+
+    def _mix_frame(self) -> bool:
+        """Mix one frame into the accumulator; returns False if nothing played"""
+        n = self.samples_per_frame
+        acc = self._acc
+        acc.fill(0.0)
+        speaking = self._external_speech or any(s.speech and s.active for s in self._inputs)
+        mixed_any = False
+
+        for source in self._inputs:
+            source.set_ducked(speaking)
+            if not source.active:
+                continue
+            offset = 0
+            for part in source.read(n):
+                count = len(part) // 2
+                out = self._scratch_s16[:count]
+                source.stage.process_into(part, out)
+                mix_into(acc[offset:offset + count], out, 1.0, self._scratch_f32)
+                offset += count
+            source.mixed_samples += offset
+            mixed_any = mixed_any or offset > 0
+        return mixed_any
+
+    def _retire_inputs(self) -> None:
+        """Drop finished inputs and signal them once their audio has played out"""
+        done = [s for s in self._inputs if s.closed or (isinstance(s, PcmInput) and not s.active)]
+        if not done:
+            return
+        self._inputs = [s for s in self._inputs if s not in done]
+        task = asyncio.create_task(self._signal_finished(done))
+        self._signal_tasks.add(task)
+        task.add_done_callback(self._signal_tasks.discard)
+
+    async def _signal_finished(self, done: List[MixerInput]) -> None:
+        await self.wait_output_latency()
+        for source in done:
+            source.finished.set()
+
+    async def _run(self) -> None:
+        while True:
+            self._retire_inputs()
+            if not any(s.active for s in self._inputs):
+                # Going idle on purpose is not an underrun
+                self.pacer.reset()
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+
+            await self.pacer.wait()
+            if not self._mix_frame():
+                continue
+            frame = rtc.AudioFrame.create(self.sample_rate, 1, self.samples_per_frame)
+            out = np.frombuffer(frame.data, dtype=np.int16)
+            np.minimum(self._acc, INT16_MAX, out=self._acc)
+            np.maximum(self._acc, INT16_MIN, out=self._acc)
+            np.copyto(out, self._acc, casting="unsafe")
+            # capture_frame blocks while the output queue is full, pacing the loop
+            await self._source.capture_frame(frame)
+            self.frames += 1
+            self.pacer.frame_sent()
+            self._maybe_report()
+
+    def _maybe_report(self) -> None:
+        now = time.monotonic()
+        if now - self._last_report < self.report_interval:
+            return
+        self._last_report = now
+        pacing = self.pacer.stats()
+        depth, lateness = pacing["depth_ms"], pacing["lateness_ms"]
+        logger.info(
+            f"📈 Playback [{self.room.name}/{self.name}]: frames={pacing['frames']} "
+            f"underruns={pacing['underruns']} late_frames={pacing['late_frames']} "
+            f"depth_ms p50={depth['p50']} p95={depth['p95']} "
+            f"lateness_ms p95={lateness['p95']} p99={lateness['p99']}"
+        )
+
+    async def aclose(self) -> None:
+        """Stop mixing and unpublish; called once on room shutdown"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for task in list(self._signal_tasks):
+            task.cancel()
+        for source in self._inputs:
+            source.finished.set()
+        self._inputs = []
+        if self._publication is not None:
+            try:
+                await self.room.local_participant.unpublish_track(self._publication.sid)
+            except Exception as e:
+                logger.warning(f"Failed to unpublish mixer '{self.name}': {e}")
+            self._publication = None
+            self.room.off("local_track_subscribed", self._on_local_track_subscribed)
+        if self._source is not None:
+            await self._source.aclose()
+            self._source = None
+        logger.info(f"Mixer '{self.name}' stats: {self.stats()}")
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "tracks_published": self.publishes,
+            "sources_mixed": self.inputs_added,
+            "subscriptions": self.subscriptions,
+            "frames": self.frames,
+            "playback": self.pacer.stats(),
+        }
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from livekit import rtc
+
+logger = logging.getLogger("agent-worker")
+
+
+class Playout:
+    """
+    Tracks one utterance pushed into a PersistentAudioTrack.
+
+    Duration is derived from the samples actually queued, and `wait()`
+    resolves once the audio source reports those samples played out.
+    """
+
+    def __init__(self, sample_rate: int) -> None:
+        self.sample_rate = sample_rate
+        self.samples = 0
+        self.created_at = time.perf_counter()
+        self.first_frame_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._finished = asyncio.Event()
+
+    @property
+    def duration(self) -> float:
+        """Seconds of audio in this utterance"""
+        return self.samples / self.sample_rate if self.sample_rate else 0.0
+
+    @property
+    def done(self) -> bool:
+        return self._finished.is_set()
+
+    async def wait(self) -> None:
+        await self._finished.wait()
+
+    def mark_finished(self) -> None:
+        if not self._finished.is_set():
+            self.finished_at = time.perf_counter()
+            self._finished.set()
+
+
+class PersistentAudioTrack:
+    """
+    A published audio track that lives for the whole room session.
+
+    The track is published once on first use and fed through a bounded frame
+    queue; between utterances it simply has nothing to send, so listeners
+    stay subscribed instead of renegotiating for every line.
+    """
+
+    def __init__(
+        self,
+        room: rtc.Room,
+        name: str,
+        sample_rate: int = 24000,
+        num_channels: int = 1,
+        max_queued_frames: int = 500,
+    ) -> None:
+        self.room = room
+        self.name = name
+        self.sample_rate = sample_rate
+        self.num_channels = num_channels
+
+        self._queue: "asyncio.Queue[Tuple[rtc.AudioFrame, Optional[Playout]]]" = asyncio.Queue(maxsize=max_queued_frames)
+        self._current: Optional[Playout] = None
+        self._source: Optional[rtc.AudioSource] = None
+        self._track: Optional[rtc.LocalAudioTrack] = None
+        self._publication: Optional[rtc.LocalTrackPublication] = None
+        self._pump_task: Optional[asyncio.Task] = None
+        self._start_lock = asyncio.Lock()
+
+        # Signalling churn counters, comparable with the old publish-per-utterance flow
+        self.publishes = 0
+        self.unpublishes = 0
+        self.subscriptions = 0
+        self.frames = 0
+
+    @property
+    def source(self) -> Optional[rtc.AudioSource]:
+        return self._source
+
+    async def start(self) -> None:
+        """Publish the track (idempotent)"""
+        async with self._start_lock:
+            if self._publication is not None:
+                return
+            self._source = rtc.AudioSource(self.sample_rate, self.num_channels)
+            self._track = rtc.LocalAudioTrack.create_audio_track(self.name, self._source)
+            options = rtc.TrackPublishOptions(source=rtc.TrackSource.SOURCE_MICROPHONE)
+            self.room.on("local_track_subscribed", self._on_local_track_subscribed)
+            self._publication = await self.room.local_participant.publish_track(self._track, options)
+            self.publishes += 1
+            self._pump_task = asyncio.create_task(self._pump(), name=f"{self.name}-pump")
+            logger.info(f"🔊 Published persistent track '{self.name}'")
+
+    def _on_local_track_subscribed(self, track: rtc.LocalTrack) -> None:
+        if self._track is not None and track.sid == self._track.sid:
+            self.subscriptions += 1
+
+    def begin_playout(self) -> Playout:
+        """Start accounting the frames pushed from now on as one utterance"""
+        self._current = Playout(self.sample_rate)
+        return self._current
+
+    async def end_playout(self, playout: Playout) -> None:
+        """Wait until the utterance's audio has actually been played out"""
+        if self._current is playout:
+            self._current = None
+        try:
+            await self.drain()
+            if self._source is not None and playout.samples:
+                if hasattr(self._source, "wait_for_playout"):
+                    await self._source.wait_for_playout()
+                elif playout.first_frame_at is not None:
+                    # Fall back to the captured sample count
+                    remaining = playout.first_frame_at + playout.duration - time.perf_counter()
+                    if remaining > 0:
+                        await asyncio.sleep(remaining)
+        finally:
+            playout.mark_finished()
+
+    async def push(self, frame: rtc.AudioFrame) -> None:
+        """Queue a frame for playback, starting the track on first use"""
+        if self._publication is None:
+            await self.start()
+        playout = self._current
+        if playout is not None:
+            playout.samples += frame.samples_per_channel
+        await self._queue.put((frame, playout))
+
+    async def _pump(self) -> None:
+        while True:
+            frame, playout = await self._queue.get()
+            try:
+                if playout is not None and playout.first_frame_at is None:
+                    playout.first_frame_at = time.perf_counter()
+                await self._source.capture_frame(frame)
+                self.frames += 1
+            except Exception as e:
+                logger.warning(f"Track '{self.name}' dropped a frame: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def drain(self) -> None:
+        """Wait until every queued frame has been handed to the source"""
+        await self._queue.join()
+
+    def clear(self) -> None:
+        """Drop queued audio, e.g. when the line is interrupted"""
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self._queue.task_done()
+        if self._source is not None:
+            self._source.clear_queue()
+
+    async def aclose(self) -> None:
+        """Unpublish the track; called once on room shutdown"""
+        if self._pump_task is not None:
+            self._pump_task.cancel()
+            await asyncio.gather(self._pump_task, return_exceptions=True)
+            self._pump_task = None
+        if self._publication is not None:
+            try:
+                await self.room.local_participant.unpublish_track(self._publication.sid)
+                self.unpublishes += 1
+            except Exception as e:
+                logger.warning(f"Failed to unpublish '{self.name}': {e}")
+            self._publication = None
+        if self.publishes:
+            self.room.off("local_track_subscribed", self._on_local_track_subscribed)
+        if self._source is not None:
+            await self._source.aclose()
+            self._source = None
+        logger.info(f"Track '{self.name}' churn: {self.stats()}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "publishes": self.publishes,
+            "unpublishes": self.unpublishes,
+            "subscriptions": self.subscriptions,
+            "frames": self.frames,
+        }
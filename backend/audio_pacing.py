@@ -0,0 +1,132 @@
+import asyncio
+import bisect
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+DEFAULT_BUCKETS_MS = (1, 2, 5, 10, 20, 40, 80, 160, 320, 640)
+
+
+class Histogram:
+    """Fixed-bucket histogram; cheap enough to observe once per audio frame"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS_MS) -> None:
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        return {
+            "count": self.count,
+            "avg": round(self.total / self.count, 2) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": round(self.max, 2),
+        }
+
+    def buckets_dict(self) -> Dict[str, int]:
+        labels: List[str] = [f"le_{b}" for b in self.buckets] + ["inf"]
+        return dict(zip(labels, self.counts))
+
+
+class FramePacer:
+    """
+    Paces audio output against a monotonic clock.
+
+    The listener side drains audio in real time, so the audio buffered ahead
+    of playback is (frames sent x frame duration) minus elapsed time. The
+    pacer releases a frame whenever that depth falls to the target, records
+    how late each wake-up was, and counts an underrun whenever the depth hit
+    zero, i.e. the output ran dry while a source still had audio.
+    """
+
+    def __init__(
+        self,
+        frame_duration: float,
+        target_depth: float = 0.06,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.frame_duration = frame_duration
+        self.target_depth = target_depth
+        self.clock = clock
+        self._origin: Optional[float] = None
+        self._sent = 0
+
+        self.underruns = 0
+        self.late_frames = 0
+        self.frames = 0
+        self.depth_ms = Histogram()
+        self.lateness_ms = Histogram()
+        self.underrun_gap_ms = Histogram()
+
+    def reset(self) -> None:
+        """Forget the timeline (output went idle on purpose, not an underrun)"""
+        self._origin = None
+        self._sent = 0
+
+    def depth(self, now: Optional[float] = None) -> float:
+        """Seconds of audio buffered ahead of the listener"""
+        if self._origin is None:
+            return 0.0
+        now = self.clock() if now is None else now
+        return self._origin + self._sent * self.frame_duration - now
+
+    async def wait(self) -> None:
+        """Sleep until the next frame is due"""
+        now = self.clock()
+        if self._origin is None:
+            self._origin = now
+            return
+
+        depth = self.depth(now)
+        if depth < 0:
+            # Output starved: re-anchor the timeline at the moment we resume
+            self.underruns += 1
+            self.underrun_gap_ms.observe(-depth * 1000)
+            self._origin += -depth
+            depth = 0.0
+        self.depth_ms.observe(depth * 1000)
+
+        sleep_for = depth - self.target_depth
+        if sleep_for > 0:
+            deadline = now + sleep_for
+            await asyncio.sleep(sleep_for)
+            late = self.clock() - deadline
+            self.lateness_ms.observe(max(late, 0.0) * 1000)
+            if late > self.frame_duration:
+                self.late_frames += 1
+
+    def frame_sent(self) -> None:
+        self._sent += 1
+        self.frames += 1
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "frames": self.frames,
+            "underruns": self.underruns,
+            "late_frames": self.late_frames,
+            "depth_ms": self.depth_ms.summary(),
+            "lateness_ms": self.lateness_ms.summary(),
+            "underrun_gap_ms": self.underrun_gap_ms.summary(),
+        }
@@ -1,16 +1,81 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from livekit import api
 import os
+from contextlib import asynccontextmanager
 from datetime import timedelta
 from dotenv import load_dotenv
 import json
+from typing import Optional
+from livekit_pool import LiveKitAPIPool
+from room_registry import RoomRegistry, metadata_hash
+from provisioner import MetadataProvisioner
+from token_cache import TokenMinter
+from case_director import CaseDirector
+from precompressed import FileAsset, PrecompressedAsset, etag_matches, response_headers
+from static_assets import StaticAssets
 
 load_dotenv()
 
-app = FastAPI(title="LiveKit AI Voice Agent API")
+# API Configuration - NEVER hard-code these, always use environment variables
+LIVEKIT_URL = os.getenv("LIVEKIT_URL")
+LIVEKIT_API_KEY = os.getenv("LIVEKIT_API_KEY")
+LIVEKIT_API_SECRET = os.getenv("LIVEKIT_API_SECRET")
+
+# Validate configuration
+if not all([LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET]):
+    raise ValueError("Missing required environment variables. Please set LIVEKIT_URL, LIVEKIT_API_KEY, and LIVEKIT_API_SECRET")
+
+# Shared LiveKit server API client (one keep-alive HTTP session per process)
+livekit_pool = LiveKitAPIPool(
+    LIVEKIT_URL,
+    LIVEKIT_API_KEY,
+    LIVEKIT_API_SECRET,
+    max_concurrency=int(os.getenv("LIVEKIT_API_MAX_CONCURRENCY", "32")),
+)
+
+# Rooms are created with this empty_timeout and the server's default departure_timeout.
+# A room may close that soon after its last participant leaves, so the registry never
+# trusts an entry for longer; room_finished webhooks drop closed rooms sooner.
+ROOM_EMPTY_TIMEOUT = 10 * 60
+ROOM_DEPARTURE_TIMEOUT = 20  # LiveKit server default
+ROOM_REGISTRY_TTL = min(ROOM_EMPTY_TIMEOUT, ROOM_DEPARTURE_TIMEOUT)
+room_registry = RoomRegistry(ttl_seconds=ROOM_REGISTRY_TTL)
+
+# Verifies LiveKit webhook calls; room_finished events evict rooms from the registry
+webhook_receiver = api.WebhookReceiver(api.TokenVerifier(LIVEKIT_API_KEY, LIVEKIT_API_SECRET))
+
+# Participant tokens are reused for clients presenting their reconnect id while most of the TTL remains
+token_minter = TokenMinter(
+    LIVEKIT_API_KEY,
+    LIVEKIT_API_SECRET,
+    ttl=timedelta(hours=2),
+    min_remaining=float(os.getenv("TOKEN_CACHE_MIN_REMAINING", "0.75")),
+)
+
+# One case timeline per room, fanned out to every SSE subscriber
+case_director = CaseDirector(
+    max_queue=int(os.getenv("CASE_EVENTS_MAX_QUEUE", "64")),
+    heartbeat=float(os.getenv("CASE_EVENTS_HEARTBEAT", "15")),
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared clients on startup and close them on shutdown"""
+    await livekit_pool.start()
+    provisioner.start()
+    try:
+        yield
+    finally:
+        await case_director.aclose()
+        await provisioner.aclose()
+        await livekit_pool.aclose()
+
+
+app = FastAPI(title="LiveKit AI Voice Agent API", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -21,27 +86,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# API Configuration - NEVER hard-code these, always use environment variables
-LIVEKIT_URL = os.getenv("LIVEKIT_URL")
-LIVEKIT_API_KEY = os.getenv("LIVEKIT_API_KEY")
-LIVEKIT_API_SECRET = os.getenv("LIVEKIT_API_SECRET")
-
-# Validate configuration
-if not all([LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET]):
-    raise ValueError("Missing required environment variables. Please set LIVEKIT_URL, LIVEKIT_API_KEY, and LIVEKIT_API_SECRET")
+# Frontend public assets (scene images, ambience audio), indexed and hashed once at startup.
+# /static/manifest.json maps each file to its immutable, content-hashed URL.
+STATIC_DIR = os.getenv("STATIC_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "frontend", "public"))
+static_assets = StaticAssets(STATIC_DIR, url_prefix="/static")
+app.mount("/static", static_assets, name="static")
 
 
 class JoinRequest(BaseModel):
     room_name: str
     participant_name: str
     metadata: dict = {}
+    # Returned with the previous token; lets a reconnecting client keep its identity
+    reconnect_id: Optional[str] = None
 
 
 class TokenResponse(BaseModel):
     token: str
     url: str
     room_name: str
+    reconnect_id: str
+
+
+class CaseStartRequest(BaseModel):
+    room: str
+    duration: Optional[float] = None
+
 
+class CaseActionRequest(BaseModel):
+    room: str
+    type: str
+    payload: dict = {}
 
 
 
@@ -57,82 +132,158 @@ def root():
         },
         "endpoints": {
             "token": "/token",
-            "demo": "/demo"
+            "demo": "/demo",
+            "stats": "/stats",
+            "livekit_webhook": "/livekit/webhook",
+            "static": "/static/manifest.json",
+            "case_events": "/api/case/events?room=...",
+            "case_start": "/api/case/start",
+            "case_action": "/api/case/action"
         }
     }
 
 
+@app.get("/stats")
+def stats():
+    """Cache and provisioning counters for this backend process"""
+    return {
+        "rooms": room_registry.stats(),
+        "provisioning": provisioner.stats(),
+        "tokens": token_minter.stats(),
+        "case": case_director.stats(),
+        "static": static_assets.stats(),
+    }
+
+
+async def provision_room(room_name: str, meta_json: str) -> None:
+    """
+    Create the room with metadata, or update metadata if it already exists.
+    Raises on failure so the provisioner can retry.
+    """
+    meta_hash = metadata_hash(meta_json)
+    status = room_registry.check(room_name, meta_hash)
+    if status == "hit":
+        # Room is known and already carries this exact metadata
+        return
+
+    async with livekit_pool.acquire() as lkapi:
+        if status == "stale":
+            # Known room: skip the create attempt and go straight to update
+            try:
+                await lkapi.room.update_room_metadata(api.UpdateRoomMetadataRequest(
+                    room=room_name,
+                    metadata=meta_json
+                ))
+                room_registry.record(room_name, meta_hash)
+                print(f"Updated metadata for room '{room_name}'.")
+                return
+            except Exception as update_err:
+                # Room may have closed server-side; fall through and recreate it
+                print(f"Metadata update failed for known room '{room_name}': {update_err}")
+                room_registry.forget(room_name)
+
+        # Strategy: Try to create room first (ensures it exists and sets metadata)
+        # If it exists, this might fail or return the existing room (depending on API version).
+        # To be safe, we wrap in try/except and fallback to update.
+        print(f"Attempting to set metadata for room: {room_name}")
+
+        try:
+            await lkapi.room.create_room(api.CreateRoomRequest(
+                name=room_name,
+                metadata=meta_json,
+                empty_timeout=ROOM_EMPTY_TIMEOUT, # Keep alive for 10 mins if empty
+            ))
+            print(f"Created room '{room_name}' with metadata.")
+        except Exception as create_err:
+            # If creation failed, assume it exists and try to update
+            print(f"Room creation note (likely exists): {create_err}. Updating metadata...")
+            await lkapi.room.update_room_metadata(api.UpdateRoomMetadataRequest(
+                room=room_name,
+                metadata=meta_json
+            ))
+            print(f"Updated metadata for room '{room_name}'.")
+        room_registry.record(room_name, meta_hash)
+
+
+# Metadata updates for known rooms run in the background; only a room's first join waits on the LiveKit server
+provisioner = MetadataProvisioner(provision_room)
+
+
 @app.post("/token", response_model=TokenResponse)
 async def create_token(request: JoinRequest):
     """Create access token for participant to join room"""
     try:
-        # Update room metadata if provided
         if request.metadata:
-            import json
-            lkapi = api.LiveKitAPI(LIVEKIT_URL, LIVEKIT_API_KEY, LIVEKIT_API_SECRET)
             meta_json = json.dumps(request.metadata)
-            
-            try:
-                # Strategy: Try to create room first (ensures it exists and sets metadata)
-                # If it exists, this might fail or return the existing room (depending on API version).
-                # To be safe, we wrap in try/except and fallback to update.
-                print(f"Attempting to set metadata for room: {request.room_name}")
-                
-                try:
-                    await lkapi.room.create_room(api.CreateRoomRequest(
-                        name=request.room_name,
-                        metadata=meta_json,
-                        empty_timeout=10 * 60, # Keep alive for 10 mins if empty
-                    ))
-                    print(f"Created room '{request.room_name}' with metadata.")
-                except Exception as create_err:
-                    # If creation failed, assume it exists and try to update
-                    print(f"Room creation note (likely exists): {create_err}. Updating metadata...")
-                    await lkapi.room.update_room_metadata(api.UpdateRoomMetadataRequest(
-                        room=request.room_name,
-                        metadata=meta_json
-                    ))
-                    print(f"Updated metadata for room '{request.room_name}'.")
-                    
-            except Exception as e:
-                print(f"ERROR: Failed to set room metadata: {e}")
-            finally:
-                await lkapi.aclose()
-
-        # Generate unique identity
-        participant_identity = f"{request.participant_name}_{os.urandom(4).hex()}"
-        
-        # Create access token
-        token = api.AccessToken(LIVEKIT_API_KEY, LIVEKIT_API_SECRET)
-        token.with_identity(participant_identity)
-        token.with_name(request.participant_name)
-        token.with_ttl(timedelta(hours=2))
-        
-        # Grant permissions
-        token.with_grants(api.VideoGrants(
-            room_join=True,
-            room=request.room_name,
-            can_publish=True,
-            can_subscribe=True,
-            can_publish_data=True,
-        ))
-        
-        jwt_token = token.to_jwt()
+            if room_registry.get(request.room_name) is None:
+                # Unknown room: if the client connected before the write landed, LiveKit would
+                # auto-create the room without metadata and the agent would start without a persona
+                if not await provisioner.write_now(request.room_name, meta_json):
+                    print(f"ERROR: Failed to set room metadata for '{request.room_name}'; retrying in the background")
+            else:
+                # Known room: metadata updates are applied in the background
+                provisioner.submit(request.room_name, meta_json)
+
+        # Reuse a still-fresh token for reconnects, otherwise sign a new one
+        token = token_minter.get(request.room_name, request.participant_name, request.reconnect_id)
+        jwt_token = token.jwt
         
         return TokenResponse(
             token=jwt_token,
             url=LIVEKIT_URL,
-            room_name=request.room_name
+            room_name=request.room_name,
+            reconnect_id=token.reconnect_id
         )
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create token: {str(e)}")
 
 
-@app.get("/demo", response_class=HTMLResponse)
-async def demo_page():
-    """Demo page for AI Voice Agent"""
-    return """
+@app.post("/livekit/webhook")
+async def livekit_webhook(request: Request):
+    """LiveKit server webhooks; a finished room must be provisioned again on its next join"""
+    body = (await request.body()).decode("utf-8")
+    try:
+        event = webhook_receiver.receive(body, request.headers.get("Authorization", ""))
+    except Exception as e:
+        raise HTTPException(status_code=401, detail=f"Invalid webhook: {str(e)}")
+    if event.event == "room_finished" and event.room.name:
+        if room_registry.forget(event.room.name):
+            print(f"Room '{event.room.name}' finished; dropped from the registry.")
+    return {"ok": True}
+
+
+@app.get("/api/case/events")
+async def case_events(room: str):
+    """SSE stream of a room's case timeline, starting with the current state"""
+    try:
+        subscriber = case_director.subscribe(room)
+    except OverflowError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return StreamingResponse(
+        case_director.stream(subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/case/start")
+async def case_start(request: CaseStartRequest):
+    """Start the room's timeline; already running timelines are left as they are"""
+    return case_director.start(request.room, request.duration)
+
+
+@app.post("/api/case/action")
+async def case_action(request: CaseActionRequest):
+    """Apply a player action (CHOOSE_CLUE, DEDUCTION, REQUEST_WATSON_HINT)"""
+    try:
+        return case_director.action(request.room, request.type, request.payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# Demo page for AI Voice Agent
+DEMO_HTML = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -811,6 +962,30 @@ async def demo_page():
     </html>
     """
 
+
+# The demo page is encoded once into gzip/brotli variants, each with its own strong ETag.
+# DEMO_PAGE_PATH serves a file instead, rebuilt whenever it changes on disk.
+DEMO_PAGE_PATH = os.getenv("DEMO_PAGE_PATH")
+if DEMO_PAGE_PATH:
+    demo_file = FileAsset(DEMO_PAGE_PATH, "text/html; charset=utf-8")
+    demo_cache_control = "no-cache"
+else:
+    demo_asset = PrecompressedAsset(DEMO_HTML.encode("utf-8"), "text/html; charset=utf-8")
+    demo_cache_control = f"public, max-age={int(os.getenv('DEMO_CACHE_MAX_AGE', '86400'))}"
+
+
+@app.get("/demo", response_class=HTMLResponse)
+async def demo_page(request: Request):
+    """Demo page for AI Voice Agent"""
+    asset = demo_file.get() if DEMO_PAGE_PATH else demo_asset
+    encoding, body = asset.negotiate(request.headers.get("accept-encoding"))
+    headers = response_headers(asset, encoding, demo_cache_control)
+    if etag_matches(request.headers.get("if-none-match"), asset.etag):
+        headers.pop("Content-Encoding", None)
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=asset.media_type, headers=headers)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
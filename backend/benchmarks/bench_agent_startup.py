@@ -0,0 +1,110 @@
+"""
+Modelled agent join-to-first-audio and join-to-greeting, the old serial
+startup chain vs the StartupGraph used by `entrypoint`.
+
+This is a model, not a measurement of the agent: every step is an
+asyncio.sleep of its assumed latency (override on the command line) and the
+entrypoint's own step functions are not run. The serial figure is the sum
+of the steps in the order the entrypoint used to await them: metadata,
+parse, session build, session.start, ctx.connect, set_scene, intro load +
+playback, then greeting TTS until its first audio. The graph figure is the
+critical path through a copy of the dependencies the entrypoint declares,
+plus StartupGraph's own scheduling overhead; keep the two in sync by hand.
+Measure real startup from the "Startup trace" line the agent logs per job.
+
+Run from the backend directory:
+    python -m benchmarks.bench_agent_startup [--runs 5] [--intro-ms 1200]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List, Tuple
+
+from startup_graph import StartupGraph
+
+
+def _step(ms: float):
+    async def _run(_results=None):
+        await asyncio.sleep(ms / 1000.0)
+    return _run
+
+
+async def _serial(lat: Dict[str, float]) -> Tuple[float, float]:
+    t0 = time.perf_counter()
+    for name in ("models", "metadata", "config", "session", "session_start", "connect", "set_scene", "intro_load", "mixer"):
+        await _step(lat[name])()
+    first_audio = (time.perf_counter() - t0) * 1000
+    await _step(lat["intro"])()
+    # session.say: live TTS time-to-first-audio
+    await _step(lat["greeting_tts"])()
+    return first_audio, (time.perf_counter() - t0) * 1000
+
+
+async def _graph(lat: Dict[str, float]) -> Tuple[float, float]:
+    graph = StartupGraph("bench")
+
+    async def _intro(_):
+        graph.mark("first_audio")
+        await _step(lat["intro"])()
+
+    async def _greet(_):
+        graph.mark("first_audio")
+        graph.mark("greeting")
+
+    graph.add("models", _step(lat["models"]))
+    graph.add("metadata", _step(lat["metadata"]))
+    graph.add("connect", _step(lat["connect"]))
+    graph.add("intro_audio", _step(lat["intro_load"]))
+    graph.add("config", _step(lat["config"]), deps=["metadata"])
+    graph.add("session", _step(lat["session"]), deps=["config", "models"])
+    graph.add("session_start", _step(lat["session_start"]), deps=["session"])
+    graph.add("room_ready", _step(lat["set_scene"]), deps=["connect"])
+    graph.add("mixer", _step(lat["mixer"]), deps=["connect"])
+    graph.add("intro", _intro, deps=["mixer", "intro_audio"])
+    graph.add("greeting_audio", _step(lat["greeting_tts"]), deps=["session_start"])
+    graph.add("greeting", _greet, deps=["connect", "intro", "greeting_audio", "session_start"])
+    await graph.run()
+    trace = graph.trace()
+    return trace.marks["first_audio"], trace.marks["greeting"]
+
+
+def _report(label: str, samples: List[Tuple[float, float]]) -> None:
+    first = statistics.median(s[0] for s in samples)
+    greeting = statistics.median(s[1] for s in samples)
+    print(f"{label:<7} modelled join_to_first_audio median={first:7.1f}ms  join_to_greeting median={greeting:7.1f}ms")
+
+
+async def main(args: argparse.Namespace) -> None:
+    lat = {
+        "models": args.models_ms,
+        "metadata": args.metadata_ms,
+        "config": 1.0,
+        "session": args.session_ms,
+        "session_start": args.session_start_ms,
+        "connect": args.connect_ms,
+        "set_scene": 5.0,
+        "intro_load": args.intro_load_ms,
+        "mixer": args.mixer_ms,
+        "intro": args.intro_ms,
+        "greeting_tts": args.greeting_tts_ms,
+    }
+    print("modelled step latencies (ms): " + ", ".join(f"{name}={ms:g}" for name, ms in lat.items()))
+    _report("serial", [await _serial(lat) for _ in range(args.runs)])
+    _report("graph", [await _graph(lat) for _ in range(args.runs)])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--models-ms", type=float, default=5.0)
+    parser.add_argument("--metadata-ms", type=float, default=60.0)
+    parser.add_argument("--session-ms", type=float, default=20.0)
+    parser.add_argument("--session-start-ms", type=float, default=150.0)
+    parser.add_argument("--connect-ms", type=float, default=250.0)
+    parser.add_argument("--intro-load-ms", type=float, default=2.0)
+    parser.add_argument("--mixer-ms", type=float, default=40.0)
+    parser.add_argument("--intro-ms", type=float, default=1200.0)
+    parser.add_argument("--greeting-tts-ms", type=float, default=350.0)
+    args = parser.parse_args()
+    asyncio.run(main(args))
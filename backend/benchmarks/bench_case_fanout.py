@@ -0,0 +1,110 @@
+"""
+Case director fan-out: 1k SSE subscribers across 100 rooms in one process.
+
+Every room runs its timeline with a fast TIMER tick while a driver posts a
+DEDUCTION action per room every `--action-ms`. Each subscriber consumes the
+same byte stream `/api/case/events` hands to StreamingResponse and records
+the delay from the action call to the moment its DEDUCTION_WRONG event
+arrives. A fraction of subscribers are slow: after every read they stall
+for `--slow-pause` seconds, as a client on a dead connection would, and
+should be disconnected without holding up anyone else.
+
+Socket writes are not included; this measures the director's own
+scheduling, encoding and queueing cost.
+
+Run from the backend directory:
+    python -m benchmarks.bench_case_fanout [--rooms 100] [--subscribers 1000] [--seconds 10]
+"""
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import replace
+from typing import Dict, List
+
+from benchmarks.common import latency_summary
+from case_director import DEFAULT_CASE, CaseDirector
+
+
+async def _consume(director: CaseDirector, room: str, sent: Dict[str, float], latencies: List[float], counts: Dict[str, int], slow_pause: float) -> None:
+    subscriber = director.subscribe(room)
+    async for chunk in director.stream(subscriber):
+        now = time.perf_counter()
+        for frame in chunk.split(b"\n\n"):
+            if not frame.startswith(b"id:"):
+                continue
+            counts["events"] += 1
+            if b"event: DEDUCTION_WRONG" in frame:
+                data = json.loads(frame.split(b"data: ", 1)[1])
+                latencies.append((now - sent[data["answer"]]) * 1000)
+        if slow_pause:
+            await asyncio.sleep(slow_pause)
+
+
+async def _drive(director: CaseDirector, room: str, sent: Dict[str, float], action_s: float, until: float) -> None:
+    n = 0
+    while time.perf_counter() < until:
+        await asyncio.sleep(action_s)
+        answer = f"{room}-{n}"
+        n += 1
+        sent[answer] = time.perf_counter()
+        director.action(room, "DEDUCTION", {"answer": answer})
+
+
+async def main(args: argparse.Namespace) -> None:
+    # Wrong deductions cost no time so the timelines outlast the run
+    script = replace(DEFAULT_CASE, wrong_penalty=0.0)
+    director = CaseDirector(script, tick=args.tick_ms / 1000.0, heartbeat=1.0, max_queue=args.max_queue)
+    rooms = [f"bench-room-{i}" for i in range(args.rooms)]
+    sent: Dict[str, float] = {}
+    latencies: List[float] = []
+    counts = {"events": 0}
+
+    slow_every = int(1 / args.slow_fraction) if args.slow_fraction else 0
+    consumers = [
+        asyncio.create_task(_consume(
+            director, rooms[i % args.rooms], sent, latencies, counts,
+            args.slow_pause if slow_every and i % slow_every == slow_every - 1 else 0.0,
+        ))
+        for i in range(args.subscribers)
+    ]
+    await asyncio.sleep(0)
+    for room in rooms:
+        director.start(room, duration=args.seconds * 10)
+
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    until = wall0 + args.seconds
+    # Offset each room's driver so actions don't all land on the same loop turn
+    await asyncio.gather(*(
+        _drive(director, room, sent, args.action_ms / 1000.0 * (1 + i / args.rooms / 10), until)
+        for i, room in enumerate(rooms)
+    ))
+    wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+
+    stats = director.stats()
+    await director.aclose()
+    for consumer in consumers:
+        consumer.cancel()
+    await asyncio.gather(*consumers, return_exceptions=True)
+
+    slow = args.subscribers // slow_every if slow_every else 0
+    print(f"rooms={args.rooms} subscribers={args.subscribers} (slow={slow}) seconds={wall:.1f}")
+    print(f"delivered events={counts['events']} ({counts['events'] / wall:,.0f}/s)  actions={len(sent)}")
+    if latencies:
+        print(f"action->event latency {latency_summary(latencies, width=6)}")
+    print(f"cpu={cpu:.2f}s ({cpu / wall * 100:.0f}% of one core)")
+    print(f"slow consumers disconnected={stats['slow_disconnects']}/{slow}  subscribers left={stats['subscribers']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rooms", type=int, default=100)
+    parser.add_argument("--subscribers", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--tick-ms", type=float, default=100.0)
+    parser.add_argument("--action-ms", type=float, default=100.0)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument("--slow-fraction", type=float, default=0.02)
+    parser.add_argument("--slow-pause", type=float, default=30.0)
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,99 @@
+"""
+GET /demo throughput and bytes on the wire: the old handler returning the
+HTML string per request, the same with on-the-fly GZipMiddleware, and the
+precompressed handler (first visits, then ETag revalidations answered with
+304 Not Modified).
+
+Requests go through the ASGI app in-process, so requests/sec is handler
+and framework cost without socket I/O. Wire bytes are the response body as
+sent plus its header lines.
+
+Run from the backend directory:
+    python -m benchmarks.bench_demo_page [--requests 2000] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, Optional
+
+import httpx
+from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import HTMLResponse
+
+from benchmarks.common import use_dev_livekit_env
+
+use_dev_livekit_env()
+
+import backend  # noqa: E402
+
+BROWSER_ACCEPT_ENCODING = "gzip, deflate, br"
+
+
+def _legacy_app(gzip: bool) -> FastAPI:
+    app = FastAPI()
+    if gzip:
+        app.add_middleware(GZipMiddleware, minimum_size=500)
+
+    @app.get("/demo", response_class=HTMLResponse)
+    async def demo_page():
+        return backend.DEMO_HTML
+
+    return app
+
+
+async def _run(label: str, app, args: argparse.Namespace, headers: Dict[str, str], expect: Optional[int] = 200) -> None:
+    transport = httpx.ASGITransport(app=app)
+    body_bytes = 0
+    header_bytes = 0
+    statuses: Dict[int, int] = {}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        queue: asyncio.Queue = asyncio.Queue()
+        for _ in range(args.requests):
+            queue.put_nowait(None)
+
+        async def _worker() -> None:
+            nonlocal body_bytes, header_bytes
+            while not queue.empty():
+                queue.get_nowait()
+                async with client.stream("GET", "/demo", headers=headers) as resp:
+                    async for chunk in resp.aiter_raw():
+                        body_bytes += len(chunk)
+                statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+                header_bytes += len("HTTP/1.1 200 OK\r\n\r\n") + sum(
+                    len(k) + len(v) + 4 for k, v in resp.headers.raw
+                )
+
+        start = time.perf_counter()
+        await asyncio.gather(*(_worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    if expect is not None and statuses.get(expect, 0) != args.requests:
+        print(f"{label}: unexpected statuses {statuses}")
+    per_request = (body_bytes + header_bytes) / args.requests
+    print(
+        f"{label:<20} req/s={args.requests / elapsed:8.0f} "
+        f"wire/request={per_request / 1024:7.2f} KiB (body {body_bytes / args.requests / 1024:6.2f} KiB) "
+        f"statuses={statuses}"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    first = {"accept-encoding": BROWSER_ACCEPT_ENCODING}
+    await _run("string (identity)", _legacy_app(gzip=False), args, first)
+    await _run("string + GZip", _legacy_app(gzip=True), args, first)
+    await _run("precompressed", backend.app, args, first)
+
+    asset = backend.demo_file.get() if backend.DEMO_PAGE_PATH else backend.demo_asset
+    print(f"{'':<20} variants: {asset.sizes()}")
+    revalidate = dict(first, **{"if-none-match": asset.etag})
+    await _run("precompressed 304", backend.app, args, revalidate, expect=304)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,86 @@
+"""
+Frames/sec and transient allocation per frame for the playback gain stage.
+
+  legacy        np.frombuffer -> float multiply -> astype(int16) -> tobytes
+  process       GainStage.process (view of a preallocated output buffer)
+  process_into  GainStage.process_into a caller-owned frame buffer
+  ramp          process_into while a fade is in progress
+
+"Peak bytes/frame" is the tracemalloc peak above baseline while processing a
+single frame, i.e. the temporaries one frame needs at once.
+
+Run from the backend directory:
+    python -m benchmarks.bench_gain [--frames 200000] [--samples 480]
+"""
+import argparse
+import time
+import tracemalloc
+from typing import Callable
+
+import numpy as np
+
+from audio_dsp import GainStage
+
+VOLUME = 0.5
+
+
+def _legacy(data: bytes) -> bytes:
+    audio_data = np.frombuffer(data, dtype=np.int16)
+    audio_data = (audio_data * VOLUME).astype(np.int16)
+    return audio_data.tobytes()
+
+
+def _peak_bytes_per_frame(fn: Callable[[], object], samples: int = 2000) -> float:
+    for _ in range(100):
+        fn()
+    tracemalloc.start()
+    total = 0
+    for _ in range(samples):
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn()
+        total += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return total / samples
+
+
+def _measure(label: str, frames: int, fn: Callable[[], object]) -> None:
+    start = time.perf_counter()
+    for _ in range(frames):
+        fn()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<13} {frames / elapsed:12.0f} frames/s  "
+        f"{elapsed / frames * 1e6:7.2f} us/frame  "
+        f"peak {_peak_bytes_per_frame(fn):8.0f} bytes/frame"
+    )
+
+
+def main(frames: int, samples: int) -> None:
+    rng = np.random.default_rng(0)
+    data = rng.integers(-20000, 20000, samples, dtype=np.int16).tobytes()
+    out = np.empty(samples, dtype=np.int16)
+
+    _measure("legacy", frames, lambda: _legacy(data))
+
+    stage = GainStage(VOLUME, max_samples=samples)
+    _measure("process", frames, lambda: stage.process(data))
+    _measure("process_into", frames, lambda: stage.process_into(data, out))
+
+    ramp_stage = GainStage(0.0, max_samples=samples)
+
+    def _ramp() -> None:
+        if not ramp_stage.ramping:
+            ramp_stage.set_gain(0.0)
+            ramp_stage.ramp_to(1.0, samples * 100)
+        ramp_stage.process_into(data, out)
+
+    _measure("ramp", frames, _ramp)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--frames", type=int, default=200_000)
+    parser.add_argument("--samples", type=int, default=480, help="samples per frame (480 = 20 ms at 24 kHz)")
+    args = parser.parse_args()
+    main(args.frames, args.samples)
@@ -0,0 +1,89 @@
+"""
+Job-start metadata latency with and without the worker-level resolver.
+
+Simulates waves of agent jobs starting across a handful of rooms (several
+agents per room, as with Watson + Moriarty dispatch) against a local stub
+LiveKit server.
+
+  per-job    legacy entrypoint: new LiveKitAPI + list_rooms + aclose per job
+  resolver   RoomMetadataResolver: shared client, TTL cache, single-flight
+
+Run from the backend directory:
+    python -m benchmarks.bench_metadata_resolve [--rooms 10] [--jobs-per-room 3] [--waves 5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import List
+
+from benchmarks.common import latency_summary, use_dev_livekit_env
+from benchmarks.stub_livekit import StubLiveKitServer
+
+
+async def _legacy_resolve(room_name: str) -> str:
+    from livekit import api
+
+    lkapi = api.LiveKitAPI(os.environ["LIVEKIT_URL"], os.environ["LIVEKIT_API_KEY"], os.environ["LIVEKIT_API_SECRET"])
+    try:
+        rooms = await lkapi.room.list_rooms(api.ListRoomsRequest(names=[room_name]))
+        return rooms.rooms[0].metadata if rooms.rooms else ""
+    finally:
+        await lkapi.aclose()
+
+
+async def _waves(resolve, rooms: int, jobs_per_room: int, waves: int) -> List[float]:
+    latencies: List[float] = []
+
+    async def _job(room_name: str) -> None:
+        start = time.perf_counter()
+        await resolve(room_name)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    for _ in range(waves):
+        await asyncio.gather(*(
+            _job(f"case-{r}") for r in range(rooms) for _ in range(jobs_per_room)
+        ))
+        # Jobs in the next wave start a little later, within the cache TTL
+        await asyncio.sleep(0.05)
+    return latencies
+
+
+def _report(label: str, latencies: List[float], stub: StubLiveKitServer) -> None:
+    print(
+        f"{label:<9} jobs={len(latencies):<4} {latency_summary(latencies)} "
+        f"list_rooms={stub.calls.get('ListRooms', 0):<4} tcp_conns={len(stub.connections)}"
+    )
+
+
+async def main(rooms: int, jobs_per_room: int, waves: int, latency_ms: float) -> None:
+    stub = StubLiveKitServer(latency_ms=latency_ms)
+    url = await stub.start()
+    use_dev_livekit_env(url)
+    for r in range(rooms):
+        stub.rooms[f"case-{r}"] = json.dumps({"crime_type": "Kidnapping (Indian Edition)", "victim_name": f"V{r}"})
+
+    from metadata_resolver import RoomMetadataResolver
+
+    try:
+        stub.reset()
+        _report("per-job", await _waves(_legacy_resolve, rooms, jobs_per_room, waves), stub)
+
+        resolver = RoomMetadataResolver(ttl=5.0)
+        stub.reset()
+        _report("resolver", await _waves(resolver.resolve, rooms, jobs_per_room, waves), stub)
+        print(f"resolver stats: {resolver.stats()}")
+        await resolver.aclose()
+    finally:
+        await stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rooms", type=int, default=10)
+    parser.add_argument("--jobs-per-room", type=int, default=3)
+    parser.add_argument("--waves", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.rooms, args.jobs_per_room, args.waves, args.latency_ms))
@@ -0,0 +1,102 @@
+"""
+Tracks per room and listener-side decode cost, per-source tracks vs one mix.
+
+Before the mixer an agent published one track per sound source: the intro
+stinger, the ambience loop and Watson (3 concurrent tracks, plus a fresh
+Watson track per hint before persistent tracks). Every listener subscribes
+to and Opus-decodes each of them. With AudioMixer there is one track.
+
+The decode side is approximated with libopus through PyAV: the same audio
+is encoded once as a 48 kHz WebRTC-style Opus stream, then decoded once per
+subscribed track. The server-side cost of mixing three sources is reported
+alongside.
+
+Run from the backend directory:
+    python -m benchmarks.bench_mixer_tracks [--seconds 20] [--tracks 3]
+"""
+import argparse
+import time
+from typing import List
+
+import av
+import numpy as np
+
+from audio_mixer import AudioMixer
+
+SAMPLE_RATE = 24000
+OPUS_RATE = 48000
+
+
+def _test_signal(seconds: float) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    tone = 0.2 * np.sin(2 * np.pi * 220 * t) + 0.05 * np.random.default_rng(0).standard_normal(t.shape)
+    return (tone * 32767).astype(np.int16)
+
+
+def _encode_opus(pcm: np.ndarray) -> List[av.Packet]:
+    encoder = av.CodecContext.create("libopus", "w")
+    encoder.sample_rate = OPUS_RATE
+    encoder.layout = "mono"
+    encoder.format = "s16"
+    encoder.bit_rate = 32000
+    encoder.open()
+    resampler = av.AudioResampler(format="s16", layout="mono", rate=OPUS_RATE)
+    frame = av.AudioFrame.from_ndarray(pcm.reshape(1, -1), format="s16", layout="mono")
+    frame.sample_rate = SAMPLE_RATE
+    fifo = av.AudioFifo()
+    for resampled in resampler.resample(frame):
+        fifo.write(resampled)
+    packets: List[av.Packet] = []
+    frame_size = encoder.frame_size or OPUS_RATE // 50
+    pts = 0
+    while fifo.samples >= frame_size:
+        chunk = fifo.read(frame_size)
+        chunk.pts = pts
+        pts += frame_size
+        packets.extend(encoder.encode(chunk))
+    packets.extend(encoder.encode(None))
+    return packets
+
+
+def _decode_cpu(packets: List[av.Packet], streams: int) -> float:
+    start = time.process_time()
+    for _ in range(streams):
+        decoder = av.CodecContext.create("libopus", "r")
+        decoder.sample_rate = OPUS_RATE
+        decoder.layout = "mono"
+        for packet in packets:
+            decoder.decode(packet)
+    return time.process_time() - start
+
+
+def _mix_cpu(seconds: float, sources: int) -> float:
+    mixer = AudioMixer(room=None)
+    pcm = _test_signal(2.0).tobytes()
+    for i in range(sources):
+        mixer.play_pcm(f"src{i}", pcm, loop=True, gain=0.5)
+    frames = int(seconds * 1000 / mixer.frame_ms)
+    start = time.process_time()
+    for _ in range(frames):
+        mixer._mix_frame()
+    return time.process_time() - start
+
+
+def main(seconds: float, tracks: int) -> None:
+    packets = _encode_opus(_test_signal(seconds))
+    before = _decode_cpu(packets, tracks)
+    after = _decode_cpu(packets, 1)
+    print(f"tracks per room:        before={tracks}  after=1")
+    print(
+        f"listener decode CPU:    before={before / seconds * 1000:6.2f}ms/s  "
+        f"after={after / seconds * 1000:6.2f}ms/s  ({before / after:.1f}x less)"
+    )
+    mix = _mix_cpu(seconds, tracks)
+    print(f"agent mixing CPU:       {mix / seconds * 1000:6.2f}ms per second of audio ({tracks} sources)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--tracks", type=int, default=3)
+    args = parser.parse_args()
+    main(args.seconds, args.tracks)
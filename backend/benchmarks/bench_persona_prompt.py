@@ -0,0 +1,103 @@
+"""
+Persona selection and prompt rendering over synthetic case metadata.
+
+  legacy     str(metadata).lower() scan for the trigger, then the f-string
+             prompt rebuilt for every session
+  registry   wants_persona/select_persona on structured fields, prompts
+             rendered from precompiled templates and memoized in PromptCache
+
+Payloads look like what the frontend sends to /token, drawn from a limited
+pool of victims and roles the way real sessions repeat.
+
+Run from the backend directory:
+    python -m benchmarks.bench_persona_prompt [--payloads 10000] [--victims 200] [--cache-size 512]
+"""
+import argparse
+import random
+import time
+from typing import Any, Callable, Dict, List
+
+import persona
+from persona import (
+    DEFAULT_TEMPLATE,
+    INDIAN_TEMPLATE,
+    PromptCache,
+    get_criminal_mindset_prompt,
+    select_persona,
+    wants_persona,
+)
+
+CRIME_TYPES = ["Kidnapping (Indian Edition)", "Kidnapping", "Heist", "Blackmail (Indian Edition)"]
+ROLES = ["detective", "inspector", "journalist", "constable"]
+
+
+def _payloads(count: int, victims: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [
+        {
+            "crime_type": rng.choice(CRIME_TYPES),
+            "victim_name": f"Victim {rng.randrange(victims)}",
+            "complexity": rng.choice(["Low", "Medium", "High"]),
+            "user_role": rng.choice(ROLES),
+            "bg_volume": str(rng.randrange(0, 100)),
+        }
+        for _ in range(count)
+    ]
+
+
+def _legacy_prompt(metadata: Dict[str, Any]) -> str:
+    crime_type = metadata.get("crime_type", "Kidnapping (Indian Edition)")
+    victim = metadata.get("victim_name", "your friend")
+    user_role = metadata.get("user_role", "detective")
+    template = INDIAN_TEMPLATE if "indian" in str(crime_type).lower() else DEFAULT_TEMPLATE
+    return template.format(victim=victim, user_role=user_role)
+
+
+def _legacy(metadata: Dict[str, Any]) -> str:
+    if "crime_type" in metadata or "riddler" in str(metadata).lower():
+        return _legacy_prompt(metadata)
+    return ""
+
+
+def _registry(metadata: Dict[str, Any]) -> str:
+    if wants_persona(metadata):
+        return get_criminal_mindset_prompt(metadata, layout="classic")
+    return ""
+
+
+def _time(fn: Callable[[Dict[str, Any]], Any], payloads: List[Dict[str, Any]]) -> float:
+    start = time.perf_counter()
+    for metadata in payloads:
+        fn(metadata)
+    return time.perf_counter() - start
+
+
+def main(count: int, victims: int, cache_size: int) -> None:
+    payloads = _payloads(count, victims)
+    for metadata in payloads[:200]:
+        assert _legacy(metadata) == _registry(metadata), metadata
+
+    select_legacy = _time(lambda m: "indian" in str(m).lower(), payloads)
+    select_new = _time(select_persona, payloads)
+    print(
+        f"selection   legacy={select_legacy / count * 1e6:6.2f}us  "
+        f"registry={select_new / count * 1e6:6.2f}us per payload"
+    )
+
+    legacy = _time(_legacy, payloads)
+    persona.prompt_cache = PromptCache(max_entries=cache_size)
+    cached = _time(_registry, payloads)
+    print(
+        f"end-to-end  legacy={legacy / count * 1e6:6.2f}us  "
+        f"registry={cached / count * 1e6:6.2f}us per payload  ({legacy / cached:.1f}x)"
+    )
+    print(f"prompt cache: {persona.prompt_cache.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--payloads", type=int, default=10000)
+    parser.add_argument("--victims", type=int, default=200)
+    parser.add_argument("--cache-size", type=int, default=512)
+    args = parser.parse_args()
+    main(args.payloads, args.victims, args.cache_size)
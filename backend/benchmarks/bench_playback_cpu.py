@@ -0,0 +1,102 @@
+"""
+CPU cost of looped background playback with many concurrent rooms.
+
+  decode-per-loop  legacy `_play_audio_file`: av.open + AudioResampler on
+                   every pass through the file
+  pcm-cache        PCMCache: decode once, then slice frames from the buffer
+
+Each room produces `--seconds` of audio as fast as it can (no real-time
+pacing, no network), so the figure reported is pure CPU per second of audio.
+
+Run from the backend directory:
+    python -m benchmarks.bench_playback_cpu [--rooms 50] [--seconds 30] [--file playback_audios/machine-gun-01.wav]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+from livekit import rtc
+
+from pcm_cache import PCMCache, iter_pcm_frames
+
+SAMPLE_RATE = 24000
+
+
+def _frame(data, volume: float) -> rtc.AudioFrame:
+    if volume != 1.0:
+        audio_data = np.frombuffer(data, dtype=np.int16)
+        data = (audio_data * volume).astype(np.int16).tobytes()
+    return rtc.AudioFrame(
+        data=data, sample_rate=SAMPLE_RATE, num_channels=1, samples_per_channel=len(data) // 2
+    )
+
+
+async def _legacy_room(file_path: str, seconds: float, volume: float) -> None:
+    import av
+
+    produced = 0
+    target = int(seconds * SAMPLE_RATE)
+    while produced < target:
+        container = av.open(file_path)
+        stream = container.streams.audio[0]
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
+        for frame in container.decode(stream):
+            for f in resampler.resample(frame):
+                _frame(f.to_ndarray().tobytes(), volume)
+                produced += f.samples
+                await asyncio.sleep(0)
+        container.close()
+
+
+async def _cached_room(cache: PCMCache, file_path: str, seconds: float, volume: float) -> None:
+    produced = 0
+    target = int(seconds * SAMPLE_RATE)
+    pcm = await cache.load(file_path)
+    while produced < target:
+        for data in iter_pcm_frames(pcm, SAMPLE_RATE):
+            _frame(data, volume)
+            produced += len(data) // 2
+            await asyncio.sleep(0)
+
+
+async def _measure(label: str, rooms: int, seconds: float, make_room) -> None:
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(make_room() for _ in range(rooms)))
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    per_room_audio_second = cpu / (rooms * seconds) * 1000
+    print(
+        f"{label:<16} rooms={rooms} cpu={cpu:7.2f}s wall={wall:7.2f}s "
+        f"cpu/room/audio-s={per_room_audio_second:6.3f}ms "
+        f"(~{per_room_audio_second / 10:.3f}% of a core per room in real time)"
+    )
+
+
+async def main(rooms: int, seconds: float, file_path: str, volume: float) -> None:
+    await _measure("decode-per-loop", rooms, seconds, lambda: _legacy_room(file_path, seconds, volume))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Work on a copy so the benchmark never leaves a sidecar in the repo
+        copy_path = os.path.join(tmp, os.path.basename(file_path))
+        with open(file_path, "rb") as src, open(copy_path, "wb") as dst:
+            dst.write(src.read())
+        cache = PCMCache()
+        await _measure("pcm-cache", rooms, seconds, lambda: _cached_room(cache, copy_path, seconds, volume))
+        print(f"cache stats: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--volume", type=float, default=0.1)
+    parser.add_argument(
+        "--file",
+        default=os.path.join(os.path.dirname(os.path.dirname(__file__)), "playback_audios", "machine-gun-01.wav"),
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.rooms, args.seconds, args.file, args.volume))
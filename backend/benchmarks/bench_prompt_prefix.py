@@ -0,0 +1,103 @@
+"""
+Per-turn time-to-first-token for Moriarty sessions, classic vs prefix-stable
+persona prompts, against a stub LLM that models provider prompt caching.
+
+Each simulated session has its own victim and player role and plays several
+turns; every turn resends the system prompt plus the growing history, as
+AgentSession does. The stub charges prefill time per prompt token and a
+fraction of that for tokens covered by a prefix it has already seen, with
+the provider's 1024-token minimum and 128-token increments, so the first turn
+of every new session shows whether the shared prompt is actually cached.
+
+Run from the backend directory:
+    python -m benchmarks.bench_prompt_prefix [--sessions 20] [--turns 4]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List, Tuple
+
+from livekit.agents import APIConnectOptions, llm
+from livekit.plugins import openai
+
+from benchmarks.stub_providers import StubProviderServer
+from persona import get_criminal_mindset_prompt, prefix_report
+
+GUESSES = [
+    "Is it the Gateway of India?",
+    "Watson, what do you think?",
+    "Then it must be Howrah Bridge.",
+    "Give me another clue.",
+    "The Taj Mahal, surely.",
+]
+
+
+async def _ttft(model: openai.LLM, chat_ctx: llm.ChatContext) -> Tuple[float, str]:
+    start = time.perf_counter()
+    first = None
+    text = ""
+    async for chunk in model.chat(chat_ctx=chat_ctx, conn_options=APIConnectOptions(timeout=60.0)):
+        if chunk.delta and chunk.delta.content:
+            if first is None:
+                first = (time.perf_counter() - start) * 1000
+            text += chunk.delta.content
+    return first or float("nan"), text
+
+
+async def _run_layout(layout: str, sessions: int, turns: int, args: argparse.Namespace) -> None:
+    stub = StubProviderServer(
+        llm_ttft_ms=args.llm_ttft_ms,
+        llm_token_ms=1.0,
+        prefill_ms_per_token=args.prefill_ms_per_token,
+        cached_token_cost=args.cached_token_cost,
+    )
+    url = await stub.start()
+    model = openai.LLM(model="stub", api_key="stub", base_url=f"{url}/v1")
+    first_turn: List[float] = []
+    later_turns: List[float] = []
+    try:
+        for s in range(sessions):
+            metadata: Dict[str, str] = {
+                "crime_type": "Kidnapping (Indian Edition)",
+                "victim_name": f"Victim {s}",
+                "user_role": ["detective", "inspector", "journalist"][s % 3],
+            }
+            chat_ctx = llm.ChatContext()
+            chat_ctx.add_message(role="system", content=get_criminal_mindset_prompt(metadata, layout=layout))
+            for t in range(turns):
+                chat_ctx.add_message(role="user", content=GUESSES[t % len(GUESSES)])
+                ttft, reply = await _ttft(model, chat_ctx)
+                chat_ctx.add_message(role="assistant", content=reply)
+                (first_turn if t == 0 else later_turns).append(ttft)
+    finally:
+        await model.aclose()
+        await stub.stop()
+
+    print(
+        f"{layout:<14} first-turn ttft median={statistics.median(first_turn):7.1f}ms  "
+        f"later turns median={statistics.median(later_turns) if later_turns else float('nan'):7.1f}ms  "
+        f"cached tokens={stub.cached_tokens / stub.prompt_tokens:.0%} of {stub.prompt_tokens}"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    for row in prefix_report():
+        if row["persona"] == "indian":
+            print(
+                f"{row['layout']:<14} cacheable system prompt prefix: {row['prefix_tokens']} of "
+                f"{row['prompt_tokens']} tokens, {row['provider_cached_tokens']} cached by the provider"
+            )
+    for layout in ("classic", "prefix_stable"):
+        await _run_layout(layout, args.sessions, args.turns, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--llm-ttft-ms", type=float, default=150.0)
+    parser.add_argument("--prefill-ms-per-token", type=float, default=0.5)
+    parser.add_argument("--cached-token-cost", type=float, default=0.1)
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,129 @@
+"""
+Scene timeline overhead at 10k active rooms: one sleeping task per room (the
+old `_scene_timeline`) vs one `TimelineScheduler` for all of them on a single event loop.
+
+Every room plays OPENING_SCHEDULE `--speed` times faster than real time,
+with room starts spread over `--spread` seconds. Cue handlers only record
+their lateness, so the numbers are the timeline machinery alone: memory held while all
+rooms are live (tracemalloc), CPU for the whole run, and how late each cue
+fired against its deadline. A second scheduler run pauses/resumes and
+branches a share of the rooms mid-timeline.
+
+Run from the backend directory:
+    python -m benchmarks.bench_scene_timeline [--rooms 10000] [--speed 20]
+"""
+import argparse
+import asyncio
+import random
+import time
+import tracemalloc
+from dataclasses import replace
+from typing import List, Set, Tuple
+
+from benchmarks.common import latency_summary
+from scene_timeline import OPENING_SCHEDULE, Cue, SceneSchedule, TimelineScheduler
+
+
+async def _legacy_room(speed: float, late: List[float]) -> None:
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    late.append(0.0)  # set_scene("study") ran inline
+    for previous, cue in zip(OPENING_SCHEDULE.cues, OPENING_SCHEDULE.cues[1:]):
+        await asyncio.sleep((cue.at - previous.at) / speed)
+        late.append((loop.time() - (start + cue.at / speed)) * 1000)
+
+
+async def _legacy(args: argparse.Namespace, late: List[float]) -> Tuple[float, dict]:
+    tasks = []
+    for i in range(args.rooms):
+        tasks.append(asyncio.create_task(_legacy_room(args.speed, late)))
+        if i % 100 == 99:
+            await asyncio.sleep(args.spread / (args.rooms / 100))
+    peak = tracemalloc.get_traced_memory()[0]
+    await asyncio.gather(*tasks)
+    return peak, {}
+
+
+def _scaled(speed: float) -> SceneSchedule:
+    scale = lambda cues: tuple(Cue(cue.at / speed, cue.action, cue.args) for cue in cues)
+    return replace(
+        OPENING_SCHEDULE,
+        cues=scale(OPENING_SCHEDULE.cues),
+        branches={action: scale(cues) for action, cues in OPENING_SCHEDULE.branches.items()},
+    )
+
+
+async def _scheduled(args: argparse.Namespace, late: List[float], churn: bool) -> Tuple[float, dict]:
+    scheduler = TimelineScheduler()
+    schedule = _scaled(args.speed)
+    loop = asyncio.get_running_loop()
+    rng = random.Random(7)
+    timelines = []
+    churned: Set[str] = set()
+
+    def _handler(room: str, start: float):
+        def _on_cue(cue: Cue) -> None:
+            if room not in churned:
+                late.append((loop.time() - (start + cue.at)) * 1000)
+        return _on_cue
+
+    for i in range(args.rooms):
+        room = f"room-{i}"
+        timeline = scheduler.timeline(room, schedule, _handler(room, loop.time()))
+        timeline.start()
+        timelines.append(timeline)
+        if i % 100 == 99:
+            await asyncio.sleep(args.spread / (args.rooms / 100))
+    peak = tracemalloc.get_traced_memory()[0]
+
+    if churn:
+        # Pause a tenth of the rooms, resume them, then branch another tenth
+        paused = rng.sample(timelines, args.rooms // 10)
+        for timeline in paused:
+            churned.add(timeline.room)
+            timeline.pause()
+        await asyncio.sleep(0.2)
+        for timeline in paused:
+            timeline.resume()
+        for timeline in rng.sample(timelines, args.rooms // 10):
+            churned.add(timeline.room)
+            timeline.branch("CHOOSE_CLUE:wrapper")
+
+    while scheduler.stats()["rooms"]:
+        await asyncio.sleep(0.05)
+    return peak, scheduler.stats()
+
+
+async def _run(label: str, args: argparse.Namespace, churn: bool = False) -> None:
+    late: List[float] = []
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    if label == "tasks":
+        peak, stats = await _legacy(args, late)
+    else:
+        peak, stats = await _scheduled(args, late, churn)
+    wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+    tracemalloc.stop()
+    print(
+        f"{label:<16} rooms={args.rooms} cues={len(late)} mem_live={(peak - base) / 1024 / 1024:6.2f} MiB "
+        f"({(peak - base) / args.rooms:5.0f} B/room) cpu={cpu:5.2f}s wall={wall:5.2f}s "
+        f"late {latency_summary(late, width=6)}"
+    )
+    if stats:
+        print(f"{'':<16} wakeups={stats['wakeups']} fired={stats['fired']} stale_left={stats['stale']}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    await _run("tasks", args)
+    await _run("scheduler", args)
+    await _run("scheduler+churn", args, churn=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rooms", type=int, default=10000)
+    parser.add_argument("--speed", type=float, default=20.0)
+    parser.add_argument("--spread", type=float, default=0.5)
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,180 @@
+"""
+Concurrent asset fetches: a naive handler that reads and returns the whole
+file on every request vs the `StaticAssets` mount.
+
+A synthetic public directory stands in for frontend/public (multi-megabyte
+ambience MP3s, scene JPEGs and a JS/CSS bundle; pass `--dir` to use a real
+one). `--clients` concurrent visitors each do a first visit (every file),
+`--seeks` audio seeks, and a repeat visit. Seeks are 64 KiB Range
+requests; the naive handler ignores Range and resends the whole file. On
+the repeat visit the mount's hashed URLs are immutable and never
+requested; the naive handler has no validators, so everything is fetched
+again.
+
+Requests go straight to the ASGI app, so the numbers are handler cost
+without socket I/O (and without sendfile, which needs a server offering
+the ASGI zero-copy extension).
+
+Run from the backend directory:
+    python -m benchmarks.bench_static_assets [--clients 200] [--seeks 5]
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.common import latency_summary
+from static_assets import StaticAssets
+
+
+def _synthetic_public(root: str) -> None:
+    rng = random.Random(3)
+    files = {
+        "assets/audio/ambience_rain.mp3": 4 * 1024 * 1024,
+        "assets/audio/ambience_lair.mp3": 3 * 1024 * 1024,
+        "assets/audio/sfx_gunshot.mp3": 96 * 1024,
+        "images/sherlock-study.jpg": 140 * 1024,
+        "images/underpass-scene.jpg": 50 * 1024,
+        "images/watson.png": 34 * 1024,
+    }
+    for rel, size in files.items():
+        path = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(rng.randbytes(size) if hasattr(rng, "randbytes") else os.urandom(size))
+    os.makedirs(os.path.join(root, "assets"), exist_ok=True)
+    with open(os.path.join(root, "assets", "index.js"), "w") as f:
+        for i in range(4000):
+            f.write(f"export function scene{i}(room) {{ return room.setScene('scene-{i % 4}', {{ fade: {i % 7} }}); }}\n")
+    with open(os.path.join(root, "assets", "index.css"), "w") as f:
+        for i in range(1500):
+            f.write(f".caption-{i} {{ color: #e6d3a3; margin: {i % 9}px; font-family: 'IM Fell English', serif; }}\n")
+
+
+class _NaiveFiles:
+    """Whole file read and sent on every request, no validators or ranges"""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    async def __call__(self, scope, receive, send) -> None:
+        path = os.path.join(self.directory, scope["path"].lstrip("/"))
+        loop = asyncio.get_running_loop()
+
+        def _read() -> bytes:
+            with open(path, "rb") as f:
+                return f.read()
+
+        body = await loop.run_in_executor(None, _read)
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
+
+
+async def _get(app, path: str, headers: Dict[str, str]) -> Tuple[int, int, Dict[str, str], float]:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "root_path": "",
+        "headers": [(k.encode(), v.encode()) for k, v in headers.items()],
+    }
+    status = 0
+    size = 0
+    response_headers: Dict[str, str] = {}
+
+    async def _receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def _send(message) -> None:
+        nonlocal status, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers.update((k.decode(), v.decode()) for k, v in message["headers"])
+            size += sum(len(k) + len(v) + 4 for k, v in message["headers"]) + 17
+        else:
+            size += len(message.get("body", b""))
+
+    start = time.perf_counter()
+    await app(scope, _receive, _send)
+    return status, size, response_headers, (time.perf_counter() - start) * 1000
+
+
+async def _visitor(app, files: List[str], audio: List[Tuple[str, int]], urls: Optional[Dict[str, str]], seeks: int, rng: random.Random, latencies: List[float]) -> Tuple[int, int]:
+    base = {"accept-encoding": "gzip, deflate, br"}
+    requests = 0
+    wire = 0
+    cached: Dict[str, str] = {}
+    for rel in files:
+        url = urls[rel] if urls else "/" + rel
+        status, size, headers, ms = await _get(app, url, base)
+        requests, wire = requests + 1, wire + size
+        latencies.append(ms)
+        cached[url] = headers.get("cache-control", "")
+    for _ in range(seeks):
+        rel, length = rng.choice(audio)
+        url = urls[rel] if urls else "/" + rel
+        offset = rng.randrange(0, max(length - 65536, 1))
+        status, size, _, ms = await _get(app, url, dict(base, range=f"bytes={offset}-{offset + 65535}"))
+        requests, wire = requests + 1, wire + size
+        latencies.append(ms)
+    # Repeat visit: immutable responses are served from the browser cache
+    for rel in files:
+        url = urls[rel] if urls else "/" + rel
+        if "immutable" in cached[url]:
+            continue
+        status, size, _, ms = await _get(app, url, base)
+        requests, wire = requests + 1, wire + size
+        latencies.append(ms)
+    return requests, wire
+
+
+async def _run(label: str, app, directory: str, urls: Optional[Dict[str, str]], args: argparse.Namespace) -> None:
+    files = sorted(
+        os.path.relpath(os.path.join(root, name), directory).replace(os.sep, "/")
+        for root, _, names in os.walk(directory) for name in names if not name.startswith(".")
+    )
+    audio = [(rel, os.path.getsize(os.path.join(directory, rel))) for rel in files if rel.endswith(".mp3")]
+    audio = [item for item in audio if item[1] > 0] or audio
+    latencies: List[float] = []
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    results = await asyncio.gather(*(
+        _visitor(app, files, audio, urls, args.seeks, random.Random(i), latencies) for i in range(args.clients)
+    ))
+    wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+    requests = sum(r for r, _ in results)
+    wire = sum(w for _, w in results)
+    print(
+        f"{label:<8} requests={requests:6d} req/s={requests / wall:8.0f} "
+        f"wire/visitor={wire / args.clients / 1024 / 1024:6.2f} MiB "
+        f"{latency_summary(latencies)} cpu={cpu:5.2f}s"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    tmp = None
+    directory = args.dir
+    if directory is None:
+        tmp = tempfile.mkdtemp(prefix="static-bench-")
+        _synthetic_public(tmp)
+        directory = tmp
+    try:
+        await _run("naive", _NaiveFiles(directory), directory, None, args)
+        assets = StaticAssets(directory)
+        await _run("mount", assets, directory, {rel: assets.url(rel) for rel in assets.manifest}, args)
+        print(f"{'':<8} {assets.stats()}")
+    finally:
+        if tmp is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dir", default=None)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--seeks", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,128 @@
+"""
+Data-channel packets and bytes per minute for the UI story topic, one
+reliable packet per set_scene/send_caption call vs StoryPublisher batching.
+
+The trace models one busy minute of a Moriarty room: the scripted scene
+timeline, a spoken line every few seconds followed by its send_caption call
+(often alongside a set_scene call in the same tool batch), and Watson hints
+whose captions arrive sentence by sentence as the LLM streams. The trace is
+replayed against a fake room `--speed` times faster than real time, with the
+batching window scaled by the same factor.
+
+Wire bytes add an estimated per-packet overhead for the DataPacket envelope
+and SCTP/DTLS/UDP/IP headers; payload bytes are exact.
+
+Run from the backend directory:
+    python -m benchmarks.bench_story_publish [--rooms 20] [--speed 20]
+"""
+import argparse
+import asyncio
+import json
+import random
+from types import SimpleNamespace
+from typing import List, Tuple
+
+from story_publisher import StoryPublisher
+
+PACKET_OVERHEAD_BYTES = 80
+
+LINES = [
+    "Ah, Sherlock. You are late, and your friend is running out of breath.",
+    "Where the river bends beneath the iron lattice, the crowd never sleeps.",
+    "Wrong again. The bridge remembers every footstep, but not yours.",
+    "Tick tock. The city hums, and the hum is the clue.",
+]
+WATSON = [
+    "Steady on, Holmes.",
+    "The mud on his boots is from the river docks, I'd wager.",
+    "And that knot is naval, no doubt about it.",
+]
+
+
+def _trace(seed: int, seconds: float = 60.0) -> List[Tuple[float, str, Tuple[str, ...]]]:
+    rng = random.Random(seed)
+    events: List[Tuple[float, str, Tuple[str, ...]]] = [
+        (0.0, "scene", ("study",)), (8.0, "scene", ("market",)),
+        (14.0, "scene", ("underpass",)), (20.0, "scene", ("landmark",)),
+    ]
+    t = 1.0
+    while t < seconds:
+        if rng.random() < 0.3:
+            events.append((t, "scene", (rng.choice(["study", "market", "underpass", "landmark"]),)))
+        events.append((t + 0.005, "caption", ("moriarty", rng.choice(LINES))))
+        if rng.random() < 0.25:
+            for i, sentence in enumerate(WATSON):
+                events.append((t + 1.5 + i * 0.12, "caption", ("watson", sentence)))
+        t += rng.uniform(3.0, 5.0)
+    return sorted(events)
+
+
+class _FakeParticipant:
+    def __init__(self, rtt_ms: float) -> None:
+        self.rtt = rtt_ms / 1000.0
+        self.sizes: List[int] = []
+
+    async def publish_data(self, data: bytes, reliable: bool = True, topic: str = "") -> None:
+        self.sizes.append(len(data))
+        await asyncio.sleep(self.rtt)
+
+
+async def _legacy(room, events, speed: float) -> None:
+    start = asyncio.get_running_loop().time()
+    for at, kind, args in events:
+        delay = start + at / speed - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if kind == "scene":
+            payload = {"type": "SCENE_SET", "scene": args[0]}
+        else:
+            payload = {"type": "CAPTION", "speaker": args[0], "text": args[1]}
+        await room.local_participant.publish_data(
+            json.dumps(payload).encode("utf-8"), reliable=True, topic="story"
+        )
+
+
+async def _batched(room, events, speed: float, window_ms: float) -> None:
+    publisher = StoryPublisher(room, window_ms=window_ms / speed)
+    start = asyncio.get_running_loop().time()
+    for at, kind, args in events:
+        delay = start + at / speed - asyncio.get_running_loop().time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if kind == "scene":
+            await publisher.set_scene(*args)
+        else:
+            await publisher.caption(*args)
+    await publisher.aclose()
+
+
+async def _run(label: str, rooms: int, speed: float, rtt_ms: float, window_ms: float) -> None:
+    fakes = [SimpleNamespace(local_participant=_FakeParticipant(rtt_ms / speed)) for _ in range(rooms)]
+    traces = [_trace(seed) for seed in range(rooms)]
+    if label == "per-call":
+        await asyncio.gather(*(_legacy(room, trace, speed) for room, trace in zip(fakes, traces)))
+    else:
+        await asyncio.gather(*(_batched(room, trace, speed, window_ms) for room, trace in zip(fakes, traces)))
+
+    messages = sum(len(trace) for trace in traces) / rooms
+    packets = sum(len(room.local_participant.sizes) for room in fakes) / rooms
+    payload = sum(sum(room.local_participant.sizes) for room in fakes) / rooms
+    print(
+        f"{label:<9} per room-minute: messages={messages:6.1f} packets={packets:6.1f} "
+        f"payload={payload / 1024:6.2f} KiB wire~{(payload + packets * PACKET_OVERHEAD_BYTES) / 1024:6.2f} KiB"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    await _run("per-call", args.rooms, args.speed, args.rtt_ms, args.window_ms)
+    await _run("batched", args.rooms, args.speed, args.rtt_ms, args.window_ms)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--speed", type=float, default=20.0)
+    parser.add_argument("--rtt-ms", type=float, default=2.0)
+    parser.add_argument("--window-ms", type=float, default=120.0)
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,135 @@
+"""
+Join latency benchmark for POST /token against a local stub LiveKit server.
+
+Compares, at 1, 50 and 500 concurrent joins spread over 25 rooms:
+  per-request  the legacy path, a fresh LiveKitAPI client per join
+  pooled       inline provisioning through `LiveKitAPIPool` + `RoomRegistry`
+  /token       the endpoint itself: a room's first join writes its metadata
+               inline (one shared write per room), later joins queue
+               updates on the background provisioner (drain time
+               reported separately)
+
+Run from the backend directory:
+    python -m benchmarks.bench_token_join [--latency-ms 5] [--levels 1,50,500]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Awaitable, Callable, List
+
+import httpx
+
+from benchmarks.common import latency_summary, use_dev_livekit_env
+from benchmarks.stub_livekit import StubLiveKitServer
+from room_registry import RoomRegistry
+
+
+async def _legacy_provision_room(room_name: str, meta_json: str) -> None:
+    """The pre-pool behaviour: one client (and TLS/TCP session) per join."""
+    from livekit import api
+
+    lkapi = api.LiveKitAPI(
+        os.environ["LIVEKIT_URL"],
+        os.environ["LIVEKIT_API_KEY"],
+        os.environ["LIVEKIT_API_SECRET"],
+    )
+    try:
+        try:
+            await lkapi.room.create_room(api.CreateRoomRequest(
+                name=room_name, metadata=meta_json, empty_timeout=10 * 60,
+            ))
+        except Exception:
+            await lkapi.room.update_room_metadata(api.UpdateRoomMetadataRequest(
+                room=room_name, metadata=meta_json,
+            ))
+    except Exception as e:
+        print(f"legacy provision failed: {e}")
+    finally:
+        await lkapi.aclose()
+
+
+def _join_payload(i: int) -> dict:
+    return {
+        "room_name": f"bench-room-{i % 25}",
+        "participant_name": f"user{i}",
+        "metadata": {"crime_type": "Kidnapping (Indian Edition)", "victim_name": "Watson"},
+    }
+
+
+async def _timed(concurrency: int, join: Callable[[int], Awaitable[None]]) -> List[float]:
+    async def _one(i: int) -> float:
+        start = time.perf_counter()
+        await join(i)
+        return (time.perf_counter() - start) * 1000.0
+
+    return await asyncio.gather(*(_one(i) for i in range(concurrency)))
+
+
+def _report(label: str, concurrency: int, latencies: List[float], stub: StubLiveKitServer, extra: str = "") -> None:
+    print(
+        f"{label:<12} n={concurrency:<4} "
+        f"{latency_summary(latencies, width=8)} "
+        f"calls={sum(stub.calls.values()):<5} tcp_conns={len(stub.connections)}{extra}"
+    )
+
+
+async def main(latency_ms: float, levels: List[int]) -> None:
+    stub = StubLiveKitServer(latency_ms=latency_ms)
+    url = await stub.start()
+    use_dev_livekit_env(url)
+
+    import backend
+    from provisioner import MetadataProvisioner
+
+    meta_json = json.dumps(_join_payload(0)["metadata"])
+    transport = httpx.ASGITransport(app=backend.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def _token(i: int) -> None:
+                resp = await client.post("/token", json=_join_payload(i))
+                resp.raise_for_status()
+
+            for concurrency in levels:
+                # Old /token critical path: a fresh client per join, create then update
+                stub.reset()
+                latencies = await _timed(
+                    concurrency, lambda i: _legacy_provision_room(f"bench-room-{i % 25}", meta_json)
+                )
+                _report("per-request", concurrency, latencies, stub)
+
+                # Inline provisioning through the shared pool and room registry
+                backend.room_registry = RoomRegistry(ttl_seconds=backend.ROOM_REGISTRY_TTL)
+                stub.reset()
+                latencies = await _timed(
+                    concurrency, lambda i: backend.provision_room(f"bench-room-{i % 25}", meta_json)
+                )
+                _report("pooled", concurrency, latencies, stub)
+
+                # Current /token: local JWT signing, provisioning drained in the background
+                backend.room_registry = RoomRegistry(ttl_seconds=backend.ROOM_REGISTRY_TTL)
+                await backend.provisioner.aclose()
+                backend.provisioner = MetadataProvisioner(backend.provision_room)
+                stub.reset()
+                latencies = await _timed(concurrency, _token)
+                drain_start = time.perf_counter()
+                await backend.provisioner.join()
+                drain_ms = (time.perf_counter() - drain_start) * 1000.0
+                queue = backend.provisioner.stats()
+                _report(
+                    "/token", concurrency, latencies, stub,
+                    f" drain={drain_ms:.1f}ms coalesced={queue['coalesced']} max_lag={queue['max_lag_ms']}ms",
+                )
+    finally:
+        await backend.provisioner.aclose()
+        await backend.livekit_pool.aclose()
+        await stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--levels", default="1,50,500")
+    args = parser.parse_args()
+    asyncio.run(main(args.latency_ms, [int(x) for x in args.levels.split(",")]))
@@ -0,0 +1,74 @@
+"""
+Tokens/sec microbenchmark for participant JWT minting.
+
+  from-scratch      legacy path: new AccessToken and VideoGrants per token
+  shared-grants     TokenMinter.mint (grant objects precomputed per room)
+  cached            TokenMinter.get with a reconnect-style workload where each
+                    client asks for a token many times, presenting the
+                    reconnect id it got with its first one
+
+Run from the backend directory:
+    python -m benchmarks.bench_token_mint [--tokens 20000] [--participants 200]
+"""
+import argparse
+import os
+import time
+from datetime import timedelta
+from typing import Callable, Dict
+
+from livekit import api
+
+from token_cache import TokenMinter
+
+API_KEY = "devkey"
+API_SECRET = "devsecret-devsecret-devsecret-0000"
+
+
+def _legacy_token(room_name: str, participant_name: str) -> str:
+    token = api.AccessToken(API_KEY, API_SECRET)
+    token.with_identity(f"{participant_name}_{os.urandom(4).hex()}")
+    token.with_name(participant_name)
+    token.with_ttl(timedelta(hours=2))
+    token.with_grants(api.VideoGrants(
+        room_join=True,
+        room=room_name,
+        can_publish=True,
+        can_subscribe=True,
+        can_publish_data=True,
+    ))
+    return token.to_jwt()
+
+
+def _measure(label: str, count: int, participants: int, fn: Callable[[str, str], object]) -> None:
+    start = time.perf_counter()
+    for i in range(count):
+        p = i % participants
+        fn(f"room-{p % 20}", f"player{p}")
+    elapsed = time.perf_counter() - start
+    print(f"{label:<14} {count / elapsed:12.0f} tokens/s  {elapsed / count * 1e6:8.2f} us/token")
+
+
+def main(count: int, participants: int) -> None:
+    _measure("from-scratch", count, participants, _legacy_token)
+
+    minter = TokenMinter(API_KEY, API_SECRET)
+    _measure("shared-grants", count, participants, minter.mint)
+
+    minter = TokenMinter(API_KEY, API_SECRET)
+    reconnect_ids: Dict[str, str] = {}
+
+    def _reconnect(room_name: str, participant_name: str) -> object:
+        token = minter.get(room_name, participant_name, reconnect_ids.get(participant_name))
+        reconnect_ids[participant_name] = token.reconnect_id
+        return token
+
+    _measure("cached", count, participants, _reconnect)
+    print(f"cache stats: {minter.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tokens", type=int, default=20_000)
+    parser.add_argument("--participants", type=int, default=200)
+    args = parser.parse_args()
+    main(args.tokens, args.participants)
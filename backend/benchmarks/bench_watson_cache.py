@@ -0,0 +1,120 @@
+"""
+Watson hint latency and provider calls with and without the response cache,
+against local stub LLM and TTS servers.
+
+A session replays a stream of player questions in which most are rephrasings
+of a handful of common asks ("Watson, what do you think?"). Without the cache
+every question costs an LLM call and a TTS synthesis; with it, a similar
+question reuses the answer text and its synthesized PCM.
+
+Run from the backend directory:
+    python -m benchmarks.bench_watson_cache [--questions 60] [--llm-ttft-ms 250]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+from typing import List, Optional
+
+import aiohttp
+from livekit.agents import APIConnectOptions, llm
+from livekit.plugins import cartesia, groq
+
+from benchmarks.stub_providers import StubProviderServer
+from speech_pipeline import stream_speech
+from watson_cache import AnswerCache, SpeechCache, WatsonResponseCache
+
+QUESTIONS = [
+    "Watson, what do you think?",
+    "Watson what do you think",
+    "What do you think, Watson?",
+    "Dr. Watson, any thoughts?",
+    "Watson, any thoughts",
+    "Watson, what do you make of the boots?",
+    "What do you make of his boots, Watson?",
+    "Is he a soldier, Watson?",
+    "Watson, is the man a soldier?",
+]
+
+
+async def _ask(
+    query: str,
+    watson_llm: groq.LLM,
+    tts: cartesia.TTS,
+    cache: Optional[WatsonResponseCache],
+) -> float:
+    start = time.perf_counter()
+    text = cache.answers.lookup(query) if cache is not None else None
+    pcm = None
+    if text is not None:
+        pcm = await cache.speech.get(SpeechCache.key(text, "watson", "sonic-2", tts.sample_rate))
+    if pcm is not None:
+        # Cached clip: the first frame is ready immediately
+        first_audio = (time.perf_counter() - start) * 1000
+        cache.record(first_audio, True, True)
+        return first_audio
+
+    captured: List[bytes] = []
+
+    async def _deltas():
+        if text is not None:
+            yield text
+            return
+        chat_ctx = llm.ChatContext()
+        chat_ctx.add_message(role="system", content="You are Dr. John Watson.")
+        chat_ctx.add_message(role="user", content=query)
+        async for chunk in watson_llm.chat(chat_ctx=chat_ctx, conn_options=APIConnectOptions(timeout=60.0)):
+            if chunk.delta and chunk.delta.content:
+                yield chunk.delta.content
+
+    async def _capture(frame) -> None:
+        captured.append(bytes(frame.data.cast("B")))
+
+    result = await stream_speech(_deltas(), tts, on_frame=_capture, started_at=start)
+    if cache is not None:
+        if text is None:
+            cache.answers.store(query, result.text)
+        await cache.speech.put(SpeechCache.key(result.text, "watson", "sonic-2", tts.sample_rate), b"".join(captured))
+        cache.record(result.first_audio_ms, text is not None, False)
+    return result.first_audio_ms or float("nan")
+
+
+async def _run(label: str, questions: List[str], args: argparse.Namespace, cache: Optional[WatsonResponseCache]) -> None:
+    stub = StubProviderServer(llm_ttft_ms=args.llm_ttft_ms)
+    url = await stub.start()
+    async with aiohttp.ClientSession() as http_session:
+        watson_llm = groq.LLM(model="stub", api_key="stub", base_url=f"{url}/v1")
+        tts = cartesia.TTS(model="sonic-2", api_key="stub", base_url=url, http_session=http_session)
+        try:
+            samples = [await _ask(q, watson_llm, tts, cache) for q in questions]
+        finally:
+            await tts.aclose()
+            await watson_llm.aclose()
+            await stub.stop()
+
+    print(
+        f"{label:<10} first-audio median={statistics.median(samples):8.1f}ms "
+        f"p90={statistics.quantiles(samples, n=10)[-1]:8.1f}ms  "
+        f"llm prompt tokens={stub.prompt_tokens:>6}  tts requests={stub.tts_requests:>4}"
+    )
+    if cache is not None:
+        print(f"{'':<10} {cache.stats()}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    rng = random.Random(7)
+    questions = [rng.choice(QUESTIONS) for _ in range(args.questions)]
+    await _run("uncached", questions, args, None)
+    with tempfile.TemporaryDirectory() as directory:
+        cache = WatsonResponseCache(AnswerCache(), SpeechCache(directory=directory))
+        await _run("cached", questions, args, cache)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--questions", type=int, default=60)
+    parser.add_argument("--llm-ttft-ms", type=float, default=250.0)
+    args = parser.parse_args()
+    asyncio.run(main(args))
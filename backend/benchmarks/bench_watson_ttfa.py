@@ -0,0 +1,91 @@
+"""
+Time-to-first-audio for a Watson hint against local stub LLM and TTS servers.
+
+  collect-then-synthesize  wait for the full completion, then tts.synthesize()
+  streaming                speech_pipeline.stream_speech(): sentences flow
+                           into a streaming TTS session as they arrive
+
+Both are timed from the start of the LLM request.
+
+Run from the backend directory:
+    python -m benchmarks.bench_watson_ttfa [--runs 10] [--llm-ttft-ms 250]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from typing import List
+
+import aiohttp
+from livekit.agents import APIConnectOptions, llm
+from livekit.plugins import cartesia, groq
+
+from benchmarks.stub_providers import StubProviderServer
+from speech_pipeline import stream_speech
+
+
+def _chat_ctx() -> llm.ChatContext:
+    chat_ctx = llm.ChatContext()
+    chat_ctx.add_message(role="system", content="You are Dr. John Watson.")
+    chat_ctx.add_message(role="user", content="Watson, what do you make of the boots?")
+    return chat_ctx
+
+
+async def _collect_then_synthesize(watson_llm: groq.LLM, tts: cartesia.TTS) -> float:
+    start = time.perf_counter()
+    text = ""
+    async for chunk in watson_llm.chat(chat_ctx=_chat_ctx(), conn_options=APIConnectOptions(timeout=60.0)):
+        if chunk.delta and chunk.delta.content:
+            text += chunk.delta.content
+    first_audio = None
+    async for audio in tts.synthesize(text=text):
+        if audio.frame and first_audio is None:
+            first_audio = (time.perf_counter() - start) * 1000
+    return first_audio or float("nan")
+
+
+async def _streaming(watson_llm: groq.LLM, tts: cartesia.TTS) -> float:
+    start = time.perf_counter()
+
+    async def _deltas():
+        async for chunk in watson_llm.chat(chat_ctx=_chat_ctx(), conn_options=APIConnectOptions(timeout=60.0)):
+            if chunk.delta and chunk.delta.content:
+                yield chunk.delta.content
+
+    async def _discard(_frame) -> None:
+        return None
+
+    result = await stream_speech(_deltas(), tts, on_frame=_discard, started_at=start)
+    return result.first_audio_ms or float("nan")
+
+
+def _report(label: str, samples: List[float]) -> None:
+    print(
+        f"{label:<24} median={statistics.median(samples):8.1f}ms "
+        f"min={min(samples):8.1f}ms max={max(samples):8.1f}ms"
+    )
+
+
+async def main(runs: int, llm_ttft_ms: float) -> None:
+    stub = StubProviderServer(llm_ttft_ms=llm_ttft_ms)
+    url = await stub.start()
+    async with aiohttp.ClientSession() as http_session:
+        watson_llm = groq.LLM(model="stub", api_key="stub", base_url=f"{url}/v1")
+        tts = cartesia.TTS(model="sonic-2", api_key="stub", base_url=url, http_session=http_session)
+        try:
+            for label, fn in (("collect-then-synthesize", _collect_then_synthesize),
+                              ("streaming", _streaming)):
+                samples = [await fn(watson_llm, tts) for _ in range(runs)]
+                _report(label, samples)
+        finally:
+            await tts.aclose()
+            await watson_llm.aclose()
+            await stub.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--llm-ttft-ms", type=float, default=250.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs, args.llm_ttft_ms))
@@ -0,0 +1,33 @@
+"""Helpers shared by the benchmark scripts"""
+import os
+import statistics
+from typing import Iterable, List, Optional
+
+DEV_API_KEY = "devkey"
+DEV_API_SECRET = "devsecret-devsecret-devsecret-0000"
+
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    """Nearest-rank percentile (pct in 0-100)"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def latency_summary(values: List[float], width: int = 7, precision: int = 2) -> str:
+    """'p50=… p99=… max=…' in milliseconds, for one report line"""
+    fmt = f"{width}.{precision}f"
+    return (
+        f"p50={statistics.median(values):{fmt}}ms "
+        f"p99={percentile(values, 99):{fmt}}ms "
+        f"max={max(values):{fmt}}ms"
+    )
+
+
+def use_dev_livekit_env(url: Optional[str] = None) -> None:
+    """Point LIVEKIT_* at a stub (or placeholder) server before backend modules read them"""
+    if url is not None:
+        os.environ["LIVEKIT_URL"] = url
+    os.environ.setdefault("LIVEKIT_URL", "http://127.0.0.1:7880")
+    os.environ.setdefault("LIVEKIT_API_KEY", DEV_API_KEY)
+    os.environ.setdefault("LIVEKIT_API_SECRET", DEV_API_SECRET)
@@ -0,0 +1,68 @@
+"""
+Minimal local stand-in for the LiveKit server API (Twirp over HTTP).
+
+Every RoomService call answers after a fixed delay: ListRooms returns the
+rooms registered in `rooms` (name -> metadata), everything else an empty
+protobuf message. The stub counts requests and new TCP connections so
+benchmarks can show how much connection setup a client is paying for.
+"""
+import asyncio
+from typing import Dict, Optional, Set
+
+from aiohttp import web
+
+
+class StubLiveKitServer:
+    def __init__(self, latency_ms: float = 5.0, fail_create: bool = False) -> None:
+        self.latency_ms = latency_ms
+        self.fail_create = fail_create
+        self.rooms: Dict[str, str] = {}
+        self.calls: Dict[str, int] = {}
+        self.connections: Set[int] = set()
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] = self.calls.get(method, 0) + 1
+        if request.transport is not None:
+            self.connections.add(id(request.transport))
+        body = await request.read()
+        await asyncio.sleep(self.latency_ms / 1000.0)
+        if method == "ListRooms":
+            return web.Response(body=self._list_rooms(body), content_type="application/protobuf")
+        if method == "CreateRoom" and self.fail_create:
+            return web.json_response(
+                {"code": "already_exists", "msg": "room already exists"}, status=409
+            )
+        return web.Response(body=b"", content_type="application/protobuf")
+
+    def _list_rooms(self, body: bytes) -> bytes:
+        from livekit.protocol import models, room as room_proto
+
+        wanted = room_proto.ListRoomsRequest.FromString(body).names
+        names = [n for n in wanted if n in self.rooms] if wanted else list(self.rooms)
+        response = room_proto.ListRoomsResponse(
+            rooms=[models.Room(name=n, metadata=self.rooms[n]) for n in names]
+        )
+        return response.SerializeToString()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_post("/twirp/livekit.RoomService/{method}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{bound_port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def reset(self) -> None:
+        self.calls.clear()
+        self.connections.clear()
@@ -0,0 +1,205 @@
+"""
+Local stand-ins for the Groq (OpenAI-compatible) chat API and Cartesia TTS.
+
+  POST /v1/chat/completions   streams a canned reply as SSE deltas, with a
+                              fixed time-to-first-token and per-token delay;
+                              optionally adds prefill time per prompt token,
+                              discounted for a prefix seen in earlier requests
+                              (a model of provider-side prompt caching)
+  POST /tts/bytes             returns raw s16le PCM for the whole transcript
+  GET  /tts/websocket         Cartesia-style streaming: JSON transcript packets
+                              in, base64 PCM "chunk" packets and "done" out
+
+Audio is silence sized at `ms_per_char` of speech per character, produced
+faster than real time like the hosted service.
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from aiohttp import WSMsgType, web
+
+SAMPLE_RATE = 24000
+CANNED_REPLY = (
+    "Good heavens, Holmes, the mud on his boots is from the river docks. "
+    "A man does not walk there at night without purpose. "
+    "I would wager the fellow served in the navy, judging by that knot."
+)
+
+
+class StubProviderServer:
+    def __init__(
+        self,
+        llm_ttft_ms: float = 250.0,
+        llm_token_ms: float = 15.0,
+        tts_first_audio_ms: float = 120.0,
+        ms_per_char: float = 60.0,
+        reply: str = CANNED_REPLY,
+        prefill_ms_per_token: float = 0.0,
+        cached_token_cost: float = 0.1,
+        cache_min_tokens: int = 1024,
+        cache_block_tokens: int = 128,
+    ) -> None:
+        self.llm_ttft_ms = llm_ttft_ms
+        self.llm_token_ms = llm_token_ms
+        self.tts_first_audio_ms = tts_first_audio_ms
+        self.ms_per_char = ms_per_char
+        self.reply = reply
+        self.prefill_ms_per_token = prefill_ms_per_token
+        self.cached_token_cost = cached_token_cost
+        self.cache_min_tokens = cache_min_tokens
+        self.cache_block_tokens = cache_block_tokens
+        self._prefix_blocks: Set[bytes] = set()
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.tts_requests = 0
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    def _pcm_for(self, text: str) -> bytes:
+        samples = int(len(text) * self.ms_per_char / 1000.0 * SAMPLE_RATE)
+        return b"\x00\x00" * samples
+
+    def _prefill(self, body: Dict[str, Any]) -> Dict[str, int]:
+        """
+        Prompt and cached-prefix token counts for a chat request.
+
+        The prompt is tools + messages in order, ~4 characters per token. The
+        cache works like OpenAI's: prompts shorter than `cache_min_tokens` are
+        neither cached nor looked up, and a hit is the longest run of whole
+        `cache_block_tokens` blocks whose every byte was seen before, counted
+        only if that run itself reaches `cache_min_tokens`.
+        """
+        parts: List[str] = [json.dumps(body.get("tools", []), sort_keys=True)]
+        for message in body.get("messages", []):
+            parts.append(f"{message.get('role')}:{json.dumps(message.get('content'), sort_keys=True)}")
+        prompt = "\n".join(parts).encode()
+        tokens = (len(prompt) + 3) // 4
+        block = self.cache_block_tokens * 4
+        digest = hashlib.sha1()
+        cached = 0
+        missed = False
+        if tokens >= self.cache_min_tokens:
+            for offset in range(0, len(prompt) - len(prompt) % block, block):
+                digest.update(prompt[offset:offset + block])
+                key = digest.digest()
+                if not missed and key in self._prefix_blocks:
+                    cached += block
+                else:
+                    missed = True
+                    self._prefix_blocks.add(key)
+        if cached // 4 < self.cache_min_tokens:
+            cached = 0
+        self.prompt_tokens += tokens
+        self.cached_tokens += cached // 4
+        return {"prompt_tokens": tokens, "cached_tokens": cached // 4}
+
+    async def _chat(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        usage = self._prefill(body)
+        prefill_ms = self.prefill_ms_per_token * (
+            usage["prompt_tokens"] - usage["cached_tokens"]
+            + usage["cached_tokens"] * self.cached_token_cost
+        )
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(request)
+        await asyncio.sleep((self.llm_ttft_ms + prefill_ms) / 1000.0)
+        for i, word in enumerate(self.reply.split(" ")):
+            if i:
+                await asyncio.sleep(self.llm_token_ms / 1000.0)
+            chunk = {
+                "id": "stub",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": "stub",
+                "choices": [{
+                    "index": 0,
+                    "delta": {"role": "assistant", "content": word if i == 0 else " " + word},
+                    "finish_reason": None,
+                }],
+            }
+            await resp.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        done = {
+            "id": "stub", "object": "chat.completion.chunk", "created": int(time.time()),
+            "model": "stub", "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": usage["prompt_tokens"],
+                "completion_tokens": len(self.reply.split(" ")),
+                "total_tokens": usage["prompt_tokens"] + len(self.reply.split(" ")),
+                "prompt_tokens_details": {"cached_tokens": usage["cached_tokens"]},
+            },
+        }
+        await resp.write(f"data: {json.dumps(done)}\n\n".encode())
+        await resp.write(b"data: [DONE]\n\n")
+        await resp.write_eof()
+        return resp
+
+    async def _tts_bytes(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self.tts_requests += 1
+        pcm = self._pcm_for(body.get("transcript", ""))
+        resp = web.StreamResponse(headers={"Content-Type": "application/octet-stream"})
+        await resp.prepare(request)
+        await asyncio.sleep(self.tts_first_audio_ms / 1000.0)
+        step = SAMPLE_RATE // 10 * 2  # 100 ms of audio per write
+        for offset in range(0, len(pcm), step):
+            await resp.write(pcm[offset:offset + step])
+        await resp.write_eof()
+        return resp
+
+    async def _tts_websocket(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        previous: Optional[asyncio.Task] = None
+
+        async def _speak(text: str, context_id: str, after: Optional[asyncio.Task], final: bool) -> None:
+            if after is not None:
+                await after
+            if text.strip():
+                self.tts_requests += 1
+                await asyncio.sleep(self.tts_first_audio_ms / 1000.0)
+                pcm = self._pcm_for(text)
+                step = SAMPLE_RATE // 10 * 2
+                for offset in range(0, len(pcm), step):
+                    await ws.send_str(json.dumps({
+                        "type": "chunk",
+                        "context_id": context_id,
+                        "data": base64.b64encode(pcm[offset:offset + step]).decode(),
+                        "done": False,
+                    }))
+            if final:
+                await ws.send_str(json.dumps({"type": "done", "context_id": context_id, "done": True}))
+
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            packet = json.loads(msg.data)
+            context_id = packet.get("context_id", "")
+            final = not packet.get("continue", False)
+            previous = asyncio.create_task(
+                _speak(packet.get("transcript", ""), context_id, previous, final)
+            )
+        if previous is not None:
+            await previous
+        return ws
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self._chat)
+        app.router.add_post("/tts/bytes", self._tts_bytes)
+        app.router.add_get("/tts/websocket", self._tts_websocket)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{bound_port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,363 @@
+import asyncio
+import json
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Set, Tuple
+
+ACTIONS = {"CHOOSE_CLUE", "DEDUCTION", "REQUEST_WATSON_HINT"}
+
+# Events that describe current state; a newer one replaces any still queued
+COALESCE_KEYS = {"TIMER": "timer", "SCENE_SET": "scene", "STATUS": "status"}
+
+HEARTBEAT = b": ping\n\n"
+
+_WORD = re.compile(r"[a-z]+(?:'[a-z]+)?")
+# A deduction naming the answer only to rule it out is not a solve
+NEGATIONS = {"not", "no", "never", "nowhere", "neither", "nor", "without", "except"}
+
+
+@dataclass
+class CaseScript:
+    """A case as data: timed beats, clue branches and the answer"""
+
+    duration: float
+    solution: Tuple[str, ...]
+    beats: List[Tuple[float, Dict[str, Any]]]
+    clues: Dict[str, List[Dict[str, Any]]]
+    hints: List[str]
+    wrong_penalty: float = 15.0
+
+
+DEFAULT_CASE = CaseScript(
+    duration=180.0,
+    solution=("warehouse", "riverside"),
+    beats=[
+        (0.0, {"type": "SCENE_SET", "scene": "study"}),
+        (1.0, {"type": "CAPTION", "speaker": "moriarty", "text": "Mercury Chocolates closed at nine. The owner never left. Tick, tock, Sherlock."}),
+        (8.0, {"type": "SCENE_SET", "scene": "market"}),
+        (9.0, {"type": "CAPTION", "speaker": "watson", "text": "The market stalls are still warm, Holmes. Someone packed up in a hurry."}),
+        (14.0, {"type": "SCENE_SET", "scene": "underpass"}),
+        (20.0, {"type": "SCENE_SET", "scene": "landmark"}),
+        (21.0, {"type": "CAPTION", "speaker": "moriarty", "text": "Three clues, one answer. Choose wisely; the chocolate is melting."}),
+    ],
+    clues={
+        "wrapper": [
+            {"type": "SCENE_SET", "scene": "market"},
+            {"type": "CAPTION", "speaker": "watson", "text": "A gold wrapper, folded twice. Dockworkers fold them that way to keep the foil."},
+        ],
+        "receipt": [
+            {"type": "SCENE_SET", "scene": "underpass"},
+            {"type": "CAPTION", "speaker": "watson", "text": "Forty crates, paid in cash, delivery after midnight. That is no shop order."},
+        ],
+        "ledger": [
+            {"type": "SCENE_SET", "scene": "study"},
+            {"type": "CAPTION", "speaker": "moriarty", "text": "Ah, the ledger. Count the tides in the margins, if you can."},
+        ],
+    },
+    hints=[
+        "The mud on that wrapper smells of the river, Holmes.",
+        "Forty crates need a loading bay, not a shop counter.",
+        "Whoever wrote those tide times needed to know when the water was low.",
+    ],
+)
+
+
+def deduction_solves(answer: str, solution: Tuple[str, ...]) -> bool:
+    """Whether an answer names a solution word as a whole word and negates nothing"""
+    words = _WORD.findall(answer.lower())
+    if any(word in NEGATIONS or word.endswith("n't") for word in words):
+        return False
+    return any(word in solution or (word.endswith("s") and word[:-1] in solution) for word in words)
+
+
+def encode_event(seq: int, event: Dict[str, Any]) -> bytes:
+    """One SSE frame; encoded once per room and shared by every subscriber"""
+    data = json.dumps(event, separators=(",", ":"), ensure_ascii=False)
+    return f"id: {seq}\nevent: {event['type']}\ndata: {data}\n\n".encode("utf-8")
+
+
+class Subscriber:
+    """
+    One SSE client's outbound queue.
+
+    State events (timer, scene, status) coalesce: a newer one replaces any
+    still queued. Everything else is kept in order. A subscriber whose
+    queue reaches `max_queue` is too slow and is disconnected, so a stalled
+    socket never holds up the room's broadcast.
+    """
+
+    def __init__(self, room: str, max_queue: int) -> None:
+        self.room = room
+        self.max_queue = max_queue
+        self._chunks: Deque[Tuple[Optional[str], bytes]] = deque()
+        self._keys: Set[str] = set()
+        self._wake = asyncio.Event()
+        self.closed = False
+        self.reason: Optional[str] = None
+        self.delivered = 0
+        self.coalesced = 0
+
+    def offer(self, key: Optional[str], chunk: bytes) -> bool:
+        """Queue a frame; False when the subscriber has to be dropped"""
+        if self.closed:
+            return False
+        if key is not None and key in self._keys:
+            self._chunks = deque(item for item in self._chunks if item[0] != key)
+            self.coalesced += 1
+        elif len(self._chunks) >= self.max_queue:
+            self.close("slow_consumer")
+            return False
+        self._chunks.append((key, chunk))
+        if key is not None:
+            self._keys.add(key)
+        self._wake.set()
+        return True
+
+    def close(self, reason: str) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.reason = reason
+        self._chunks.clear()
+        self._keys.clear()
+        self._wake.set()
+
+    async def next(self, heartbeat: float) -> Optional[bytes]:
+        """Everything queued as one write, a heartbeat after `heartbeat` idle seconds, or None once closed"""
+        if not self._chunks and not self.closed:
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                return HEARTBEAT
+        if self.closed:
+            return None
+        chunk = b"".join(c for _, c in self._chunks)
+        self.delivered += len(self._chunks)
+        self._chunks.clear()
+        self._keys.clear()
+        return chunk
+
+
+@dataclass
+class CaseRoom:
+    name: str
+    script: CaseScript
+    subscribers: Set[Subscriber] = field(default_factory=set)
+    seq: int = 0
+    phase: str = "idle"
+    scene: str = "study"
+    deadline: float = 0.0
+    remaining: float = 0.0
+    outcome: Optional[str] = None
+    clues: List[str] = field(default_factory=list)
+    hints_given: int = 0
+    task: Optional[asyncio.Task] = None
+    broadcasts: int = 0
+    dropped: int = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        remaining = self.remaining
+        if self.phase == "running":
+            remaining = max(self.deadline - time.monotonic(), 0.0)
+        return {
+            "type": "STATE",
+            "room": self.name,
+            "phase": self.phase,
+            "scene": self.scene,
+            "remaining": round(remaining, 1),
+            "clues": list(self.clues),
+            "outcome": self.outcome,
+        }
+
+
+class CaseDirector:
+    """
+    Server-authoritative case timelines with SSE fan-out.
+
+    Each room runs at most one timeline task, whatever the number of
+    listeners (browser, Watson agent, Moriarty agent). Every event is
+    JSON- and SSE-encoded once and offered to each subscriber's bounded
+    queue without awaiting, so one slow client costs the room nothing.
+    """
+
+    def __init__(
+        self,
+        script: CaseScript = DEFAULT_CASE,
+        max_queue: int = 64,
+        heartbeat: float = 15.0,
+        tick: float = 1.0,
+        max_subscribers_per_room: int = 64,
+    ) -> None:
+        self.script = script
+        self.max_queue = max_queue
+        self.heartbeat = heartbeat
+        self.tick = tick
+        self.max_subscribers_per_room = max_subscribers_per_room
+        self._rooms: Dict[str, CaseRoom] = {}
+        self.subscribes = 0
+        self.slow_disconnects = 0
+
+    def _room(self, name: str) -> CaseRoom:
+        room = self._rooms.get(name)
+        if room is None:
+            room = CaseRoom(name, self.script, remaining=self.script.duration)
+            self._rooms[name] = room
+        return room
+
+    def _forget_if_idle(self, room: CaseRoom) -> None:
+        if not room.subscribers and room.phase != "running" and self._rooms.get(room.name) is room:
+            del self._rooms[room.name]
+
+    def broadcast(self, room: CaseRoom, event: Dict[str, Any]) -> None:
+        room.seq += 1
+        room.broadcasts += 1
+        chunk = encode_event(room.seq, event)
+        key = COALESCE_KEYS.get(event["type"])
+        for subscriber in list(room.subscribers):
+            if not subscriber.offer(key, chunk):
+                room.subscribers.discard(subscriber)
+                room.dropped += 1
+                self.slow_disconnects += 1
+                print(f"Dropped slow SSE subscriber in room '{room.name}'")
+
+    def subscribe(self, room_name: str) -> Subscriber:
+        room = self._room(room_name)
+        if len(room.subscribers) >= self.max_subscribers_per_room:
+            raise OverflowError(f"Room '{room_name}' has too many event subscribers")
+        subscriber = Subscriber(room_name, self.max_queue)
+        # Late joiners start from the current state rather than a replay
+        room.seq += 1
+        subscriber.offer(None, encode_event(room.seq, room.snapshot()))
+        room.subscribers.add(subscriber)
+        self.subscribes += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        subscriber.close(subscriber.reason or "closed")
+        room = self._rooms.get(subscriber.room)
+        if room is not None:
+            room.subscribers.discard(subscriber)
+            self._forget_if_idle(room)
+
+    async def stream(self, subscriber: Subscriber) -> AsyncIterator[bytes]:
+        """SSE body for one subscriber; unsubscribes when the client goes away"""
+        try:
+            while True:
+                chunk = await subscriber.next(self.heartbeat)
+                if chunk is None:
+                    if subscriber.reason == "slow_consumer":
+                        yield b'event: disconnect\ndata: {"reason":"slow_consumer"}\n\n'
+                    return
+                yield chunk
+        finally:
+            self.unsubscribe(subscriber)
+
+    def start(self, room_name: str, duration: Optional[float] = None) -> Dict[str, Any]:
+        """Start (or restart a finished) timeline; a running one is left alone"""
+        room = self._room(room_name)
+        if room.phase != "running":
+            room.phase = "running"
+            room.outcome = None
+            room.clues = []
+            room.hints_given = 0
+            room.deadline = time.monotonic() + (duration or self.script.duration)
+            self.broadcast(room, {"type": "STATUS", "status": "running"})
+            room.task = asyncio.create_task(self._run(room), name=f"case-{room_name}")
+        return room.snapshot()
+
+    def _apply(self, room: CaseRoom, event: Dict[str, Any]) -> None:
+        if event["type"] == "SCENE_SET":
+            room.scene = event["scene"]
+        self.broadcast(room, event)
+
+    async def _run(self, room: CaseRoom) -> None:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        beats = sorted(self.script.beats, key=lambda beat: beat[0])
+        next_beat = 0
+        next_tick = started
+        try:
+            while room.phase == "running":
+                now = loop.time()
+                while next_beat < len(beats) and started + beats[next_beat][0] <= now:
+                    self._apply(room, beats[next_beat][1])
+                    next_beat += 1
+                remaining = room.deadline - time.monotonic()
+                if remaining <= 0:
+                    self._finish(room, "timeout")
+                    return
+                if now >= next_tick:
+                    self.broadcast(room, {"type": "TIMER", "remaining": round(remaining, 1)})
+                    next_tick += self.tick
+                wake = min(next_tick, started + beats[next_beat][0] if next_beat < len(beats) else next_tick)
+                await asyncio.sleep(max(min(wake - now, remaining), 0.0))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"ERROR: Case timeline for room '{room.name}' failed: {e}")
+            self._finish(room, "error")
+
+    def _finish(self, room: CaseRoom, outcome: str) -> None:
+        room.remaining = max(room.deadline - time.monotonic(), 0.0)
+        room.phase = "ended"
+        room.outcome = outcome
+        self.broadcast(room, {"type": "TIMER", "remaining": round(room.remaining, 1)})
+        self.broadcast(room, {"type": "CASE_END", "outcome": outcome})
+        if room.task is not None and room.task is not asyncio.current_task():
+            room.task.cancel()
+        room.task = None
+        self._forget_if_idle(room)
+
+    def action(self, room_name: str, action: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply a player action and broadcast its consequences"""
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown action: {action}")
+        room = self._rooms.get(room_name)
+        if room is None or room.phase != "running":
+            raise ValueError(f"No case is running in room '{room_name}'")
+
+        if action == "CHOOSE_CLUE":
+            clue = str(payload.get("clue", "")).strip().lower()
+            if clue not in self.script.clues:
+                raise ValueError(f"Unknown clue: {clue}")
+            if clue not in room.clues:
+                room.clues.append(clue)
+                self.broadcast(room, {"type": "CLUE_CHOSEN", "clue": clue})
+                for event in self.script.clues[clue]:
+                    self._apply(room, event)
+        elif action == "DEDUCTION":
+            if deduction_solves(str(payload.get("answer", "")), self.script.solution):
+                self._finish(room, "solved")
+            else:
+                room.deadline -= self.script.wrong_penalty
+                self.broadcast(room, {"type": "DEDUCTION_WRONG", "answer": payload.get("answer", ""), "penalty": self.script.wrong_penalty})
+                self.broadcast(room, {"type": "TIMER", "remaining": round(max(room.deadline - time.monotonic(), 0.0), 1)})
+        elif action == "REQUEST_WATSON_HINT":
+            hint = self.script.hints[min(room.hints_given, len(self.script.hints) - 1)]
+            room.hints_given += 1
+            # The Watson agent listens for this and voices the line
+            self.broadcast(room, {"type": "WATSON_HINT", "text": hint})
+            self.broadcast(room, {"type": "CAPTION", "speaker": "watson", "text": hint})
+        return room.snapshot()
+
+    async def aclose(self) -> None:
+        tasks = [room.task for room in self._rooms.values() if room.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for room in self._rooms.values():
+            for subscriber in list(room.subscribers):
+                subscriber.close("shutdown")
+        self._rooms.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "rooms": len(self._rooms),
+            "running": sum(1 for room in self._rooms.values() if room.phase == "running"),
+            "subscribers": sum(len(room.subscribers) for room in self._rooms.values()),
+            "subscribes": self.subscribes,
+            "slow_disconnects": self.slow_disconnects,
+        }
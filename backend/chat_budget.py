@@ -0,0 +1,210 @@
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from persona import approx_tokens
+
+logger = logging.getLogger("agent-worker")
+
+# Tool calls whose results carry nothing the model needs once the line has been spoken
+ECHO_TOOLS = {"send_caption", "set_scene"}
+
+NOTES_ID = "case_notes"
+
+# Per-item framing (role, separators) the provider adds around each message
+ITEM_OVERHEAD_TOKENS = 4
+
+
+def item_tokens(item: Any) -> int:
+    """Approximate prompt tokens one chat context item costs"""
+    kind = getattr(item, "type", "message")
+    if kind == "message":
+        text = item.text_content or ""
+    elif kind == "function_call":
+        text = f"{item.name}{item.arguments}"
+    elif kind == "function_call_output":
+        text = item.output or ""
+    else:
+        return 0
+    return approx_tokens(text) + ITEM_OVERHEAD_TOKENS
+
+
+def context_tokens(chat_ctx: Any) -> int:
+    return sum(item_tokens(item) for item in chat_ctx.items)
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+def _has_spoken_line(turn: List[Any]) -> bool:
+    return any(
+        getattr(item, "type", "message") == "message" and item.role == "assistant" and item.text_content
+        for item in turn
+    )
+
+
+@dataclass
+class CompactionReport:
+    tokens_before: int
+    tokens_after: int
+    echoes_dropped: int = 0
+    turns_folded: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.echoes_dropped or self.turns_folded)
+
+
+class ChatContextBudget:
+    """
+    Keeps a Moriarty session's chat context under a token budget.
+
+    Leading system messages (the persona prompt) are never touched, so the
+    provider's cached prompt prefix survives compaction. Caption and scene
+    tool echoes older than the last `keep_turns` user turns are dropped
+    outright; if the context is still over `max_tokens`, the oldest turns
+    are folded into a pinned CASE NOTES message that records every clue
+    Moriarty has given, the player's recent guesses and the secret location.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 3000,
+        keep_turns: int = 4,
+        secret_location: Optional[str] = None,
+        clue_chars: int = 240,
+        max_guesses: int = 12,
+        max_clues: int = 8,
+    ) -> None:
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.secret_location = secret_location
+        self.clue_chars = clue_chars
+        self.max_guesses = max_guesses
+        self.max_clues = max_clues
+        self.clues: List[str] = []
+        # Clues retired from `clues`, merged into one clipped line
+        self.earlier_clues = 0
+        self.earlier = ""
+        self.guesses: List[str] = []
+        self.watson: List[str] = []
+        self.compactions = 0
+
+    @classmethod
+    def from_metadata(cls, metadata: Dict[str, Any], **kwargs: Any) -> "ChatContextBudget":
+        location = metadata.get("secret_location") or metadata.get("location")
+        return cls(secret_location=str(location) if location else None, **kwargs)
+
+    def notes(self) -> str:
+        lines = ["CASE NOTES (older turns were condensed; these facts are binding):"]
+        if self.secret_location:
+            lines.append(f"- Secret location: {self.secret_location}. Never reveal it.")
+        else:
+            lines.append("- Keep the secret location you chose at the start. Never change or reveal it.")
+        if self.earlier_clues:
+            lines.append(f"- {self.earlier_clues} earlier clues, condensed: {self.earlier}")
+        if self.clues:
+            lines.append("- Clues you have already given, in order:")
+            lines.extend(f"  {i}. {clue}" for i, clue in enumerate(self.clues, self.earlier_clues + 1))
+        if self.guesses:
+            lines.append(f"- Player guesses so far: {'; '.join(self.guesses)}")
+        if self.watson:
+            lines.append(f"- Watson has said: {'; '.join(self.watson[-3:])}")
+        return "\n".join(lines)
+
+    def _fold(self, turn: List[Any]) -> None:
+        """Record what a turn contributed to the case before it is dropped"""
+        for item in turn:
+            kind = getattr(item, "type", "message")
+            if kind == "message" and item.text_content:
+                if item.role == "assistant":
+                    self.clues.append(_clip(item.text_content, self.clue_chars))
+                elif item.role == "user":
+                    self.guesses.append(_clip(item.text_content, 80))
+            elif kind == "function_call_output" and item.name == "ask_watson" and item.output:
+                self.watson.append(_clip(item.output, 160))
+            elif kind == "function_call" and item.name == "send_caption" and not _has_spoken_line(turn):
+                # Moriarty's line only survives in the caption arguments
+                try:
+                    args = json.loads(item.arguments or "{}")
+                except ValueError:
+                    continue
+                if args.get("speaker", "moriarty") == "moriarty" and args.get("text"):
+                    self.clues.append(_clip(args["text"], self.clue_chars))
+        del self.guesses[: -self.max_guesses]
+        del self.watson[:-3]
+        while len(self.clues) > self.max_clues:
+            self._retire_clue()
+
+    def _retire_clue(self) -> None:
+        """Merge the oldest listed clue into the condensed line"""
+        clue = self.clues.pop(0)
+        self.earlier_clues += 1
+        self.earlier = _clip(f"{self.earlier} / {clue}" if self.earlier else clue, self.clue_chars)
+
+    def _shrink_clues(self, max_notes_tokens: int, min_chars: int = 80) -> None:
+        """Clip, then retire, the oldest clues until the notes fit `max_notes_tokens`"""
+        for i, clue in enumerate(self.clues):
+            if approx_tokens(self.notes()) <= max_notes_tokens:
+                return
+            self.clues[i] = _clip(clue, min_chars)
+        while self.clues and approx_tokens(self.notes()) > max_notes_tokens:
+            self._retire_clue()
+
+    def compact(self, chat_ctx: Any) -> CompactionReport:
+        """Compact `chat_ctx` in place and report its size before and after"""
+        items = chat_ctx.items
+        report = CompactionReport(tokens_before=context_tokens(chat_ctx), tokens_after=0)
+
+        notes_index = next((i for i, item in enumerate(items) if item.id == NOTES_ID), None)
+        if notes_index is not None:
+            items.pop(notes_index)
+        head = 0
+        while head < len(items) and getattr(items[head], "type", "message") == "message" and items[head].role in ("system", "developer"):
+            head += 1
+
+        # Split the history into turns, each starting at a user message
+        turns: List[List[Any]] = []
+        for item in items[head:]:
+            if not turns or (getattr(item, "type", "message") == "message" and item.role == "user"):
+                turns.append([])
+            turns[-1].append(item)
+
+        recent = max(len(turns) - self.keep_turns, 0)
+        echo_calls = set()
+        for turn in turns[:recent]:
+            # A caption only duplicates the line when the spoken message is still in the turn
+            spoken = _has_spoken_line(turn)
+            for item in turn:
+                if getattr(item, "type", None) == "function_call" and item.name in ECHO_TOOLS:
+                    if spoken or item.name != "send_caption":
+                        echo_calls.add(item.call_id)
+        if echo_calls:
+            for turn in turns[:recent]:
+                kept = [item for item in turn if getattr(item, "call_id", None) not in echo_calls]
+                report.echoes_dropped += len(turn) - len(kept)
+                turn[:] = kept
+
+        budget = self.max_tokens - sum(item_tokens(item) for item in items[:head])
+        history = sum(item_tokens(item) for turn in turns for item in turn)
+        folded = 0
+        while folded < recent and history + approx_tokens(self.notes()) + ITEM_OVERHEAD_TOKENS > budget:
+            self._fold(turns[folded])
+            history -= sum(item_tokens(item) for item in turns[folded])
+            folded += 1
+        report.turns_folded = folded
+        if folded or notes_index is not None:
+            self._shrink_clues(budget - history - ITEM_OVERHEAD_TOKENS)
+
+        items[head:] = [item for turn in turns[folded:] for item in turn]
+        if folded or notes_index is not None:
+            chat_ctx.add_message(role="system", content=self.notes(), id=NOTES_ID)
+            items.insert(head, items.pop())
+
+        if report.changed:
+            self.compactions += 1
+        report.tokens_after = context_tokens(chat_ctx)
+        return report
@@ -0,0 +1,84 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+import aiohttp
+from livekit import api
+
+
+class LiveKitAPIPool:
+    """
+    Process-wide LiveKit API client backed by a single keep-alive HTTP session.
+
+    Callers borrow the client through `acquire()`, which bounds the number of
+    in-flight server API calls so a join storm queues locally instead of
+    opening hundreds of connections to the LiveKit server.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str],
+        api_key: Optional[str],
+        api_secret: Optional[str],
+        max_concurrency: int = 32,
+        keepalive_timeout: float = 60.0,
+        request_timeout: float = 10.0,
+    ) -> None:
+        self.url = url
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.max_concurrency = max_concurrency
+        self.keepalive_timeout = keepalive_timeout
+        self.request_timeout = request_timeout
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._client: Optional[api.LiveKitAPI] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self._client is not None
+
+    async def start(self) -> None:
+        """Open the shared HTTP session and LiveKit client (idempotent)."""
+        async with self._lock:
+            if self._client is not None:
+                return
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            )
+            self._client = api.LiveKitAPI(
+                self.url, self.api_key, self.api_secret, session=self._session
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            print(f"LiveKit API pool started (max_concurrency={self.max_concurrency})")
+
+    async def aclose(self) -> None:
+        """Close the client and its HTTP session. Safe to call more than once."""
+        async with self._lock:
+            client, session = self._client, self._session
+            self._client = None
+            self._session = None
+            self._semaphore = None
+            if client is not None:
+                await client.aclose()
+            if session is not None and not session.closed:
+                await session.close()
+            if client is not None:
+                print("LiveKit API pool closed")
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[api.LiveKitAPI]:
+        """Borrow the shared client, waiting if too many calls are in flight."""
+        if self._client is None:
+            # Lifespan normally starts the pool; fall back to lazy start so the
+            # app still works when served without lifespan events.
+            await self.start()
+        async with self._semaphore:
+            yield self._client
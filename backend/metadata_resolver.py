@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from livekit import api, rtc
+
+logger = logging.getLogger("agent-worker")
+
+
+@dataclass
+class _Entry:
+    metadata: str
+    fetched_at: float
+    watched: bool = False
+
+
+class RoomMetadataResolver:
+    """
+    Process-level room metadata lookups.
+
+    The cache is shared by every job in the process. With the
+    default livekit-agents process executor a process runs one job at a
+    time, so the cache and single-flight only pay off across jobs when the
+    process is reused; thread-executor jobs share it but each has its own
+    event loop, so in-flight lookups are only shared within a loop. Results
+    are cached for `ttl` seconds and concurrent lookups for the same room
+    share a single `list_rooms` call. Rooms registered with `watch()` are
+    kept current from `room_metadata_changed` events and never re-polled.
+
+    aiohttp sessions are bound to the loop they were created on, so there
+    is one API client per event loop. Jobs call `attach()` on start and
+    `release()` on shutdown; a loop's client is closed when the last job
+    attached on that loop releases it. A room's entry is dropped when it is
+    unwatched, and unwatched entries past their TTL are pruned as new ones
+    are added, so the map only holds rooms that are live or recently looked up.
+    """
+
+    def __init__(self, ttl: float = 5.0) -> None:
+        self.ttl = ttl
+        self._clients: Dict[asyncio.AbstractEventLoop, api.LiveKitAPI] = {}
+        self._jobs: Dict[asyncio.AbstractEventLoop, int] = {}
+        self._entries: Dict[str, _Entry] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._watchers: Dict[str, Tuple[rtc.Room, Callable[[str, str], None]]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.api_calls = 0
+        self.events = 0
+
+    async def _get_client(self) -> api.LiveKitAPI:
+        loop = asyncio.get_running_loop()
+        for stale_loop in [other for other in self._clients if other.is_closed()]:
+            # A job loop that ended without releasing; its session can only be closed from here
+            await self._close_quietly(self._clients.pop(stale_loop))
+            self._jobs.pop(stale_loop, None)
+        client = self._clients.get(loop)
+        if client is None:
+            client = api.LiveKitAPI(
+                os.getenv("LIVEKIT_URL"), os.getenv("LIVEKIT_API_KEY"), os.getenv("LIVEKIT_API_SECRET")
+            )
+            self._clients[loop] = client
+        return client
+
+    def _cached(self, room_name: str) -> Optional[str]:
+        entry = self._entries.get(room_name)
+        if entry is None:
+            return None
+        if entry.watched or time.monotonic() - entry.fetched_at < self.ttl:
+            return entry.metadata
+        return None
+
+    async def _fetch(self, room_name: str) -> Optional[str]:
+        self.api_calls += 1
+        lkapi = await self._get_client()
+        rooms = await lkapi.room.list_rooms(api.ListRoomsRequest(names=[room_name]))
+        if not rooms.rooms:
+            return None
+        return rooms.rooms[0].metadata
+
+    async def resolve(self, room_name: str, fallback: Optional[str] = None) -> Tuple[Optional[str], str]:
+        """
+        Return (metadata, source) for a room.
+
+        source is "cache", "shared" (joined another job's in-flight lookup),
+        "api" or "fallback" (lookup failed or room unknown to the server).
+        """
+        cached = self._cached(room_name)
+        if cached is not None:
+            self.hits += 1
+            return cached, "cache"
+
+        pending = self._inflight.get(room_name)
+        if pending is not None and pending.get_loop() is asyncio.get_running_loop():
+            self.shared += 1
+            metadata = await asyncio.shield(pending)
+            return (metadata, "shared") if metadata else (fallback, "fallback")
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[room_name] = future
+        metadata: Optional[str] = None
+        try:
+            metadata = await self._fetch(room_name)
+        except Exception as e:
+            logger.warning(f"Failed to fetch fresh metadata, using context metadata: {e}")
+        finally:
+            self._inflight.pop(room_name, None)
+            future.set_result(metadata)
+
+        if metadata:
+            self._prune()
+            watched = room_name in self._entries and self._entries[room_name].watched
+            self._entries[room_name] = _Entry(metadata, time.monotonic(), watched)
+            return metadata, "api"
+        return fallback, "fallback"
+
+    def watch(self, room: rtc.Room) -> None:
+        """Keep a connected room's cache entry current from metadata events"""
+        def _on_metadata_changed(old_metadata: str, new_metadata: str) -> None:
+            self.events += 1
+            self._entries[room.name] = _Entry(new_metadata, time.monotonic(), watched=True)
+            logger.info(f"🔄 Room metadata changed for {room.name}")
+
+        self.unwatch(room.name)
+        room.on("room_metadata_changed", _on_metadata_changed)
+        self._watchers[room.name] = (room, _on_metadata_changed)
+        if room.metadata:
+            self._entries[room.name] = _Entry(room.metadata, time.monotonic(), watched=True)
+        elif room.name in self._entries:
+            self._entries[room.name].watched = True
+
+    def unwatch(self, room_name: str) -> None:
+        """Stop following a room and drop its entry; the job that watched it is ending"""
+        watcher = self._watchers.pop(room_name, None)
+        if watcher is not None:
+            room, handler = watcher
+            room.off("room_metadata_changed", handler)
+        self._entries.pop(room_name, None)
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        expired = [
+            name for name, entry in self._entries.items()
+            if not entry.watched and now - entry.fetched_at >= self.ttl
+        ]
+        for name in expired:
+            del self._entries[name]
+
+    def attach(self) -> None:
+        """Count a job using this loop's client"""
+        loop = asyncio.get_running_loop()
+        self._jobs[loop] = self._jobs.get(loop, 0) + 1
+
+    async def release(self) -> None:
+        """A job shut down; close its loop's client once no job on that loop is left"""
+        loop = asyncio.get_running_loop()
+        jobs = self._jobs.get(loop, 0) - 1
+        if jobs > 0:
+            self._jobs[loop] = jobs
+            return
+        self._jobs.pop(loop, None)
+        client = self._clients.pop(loop, None)
+        if client is not None:
+            await self._close_quietly(client)
+
+    async def aclose(self) -> None:
+        """Close every loop's client, each on its own loop"""
+        current = asyncio.get_running_loop()
+        clients, self._clients = self._clients, {}
+        self._jobs.clear()
+        for loop, client in clients.items():
+            if loop is not current and loop.is_running():
+                asyncio.run_coroutine_threadsafe(self._close_quietly(client), loop)
+            else:
+                await self._close_quietly(client)
+
+    @staticmethod
+    async def _close_quietly(client: api.LiveKitAPI) -> None:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Failed to close metadata resolver client: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "clients": len(self._clients),
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared": self.shared,
+            "api_calls": self.api_calls,
+            "events": self.events,
+        }
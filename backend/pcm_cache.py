@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import mmap
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger("agent-worker")
+
+SAMPLE_RATE = 24000
+BYTES_PER_SAMPLE = 2  # s16 mono
+
+
+def decode_pcm(file_path: str, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Decode any file PyAV can open into mono s16 PCM at `sample_rate`"""
+    import av
+
+    chunks = []
+    container = av.open(file_path)
+    try:
+        stream = container.streams.audio[0]
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=sample_rate)
+        for frame in container.decode(stream):
+            for f in resampler.resample(frame):
+                chunks.append(f.to_ndarray().tobytes())
+        # Flush samples still buffered inside the resampler
+        for f in resampler.resample(None):
+            chunks.append(f.to_ndarray().tobytes())
+    finally:
+        container.close()
+    return b"".join(chunks)
+
+
+def iter_pcm_frames(pcm, sample_rate: int = SAMPLE_RATE, frame_ms: int = 20) -> Iterator[memoryview]:
+    """Yield zero-copy `frame_ms` slices of a mono s16 PCM buffer"""
+    view = memoryview(pcm)
+    step = sample_rate * frame_ms // 1000 * BYTES_PER_SAMPLE
+    end = len(view) - len(view) % BYTES_PER_SAMPLE
+    for offset in range(0, end, step):
+        yield view[offset:min(offset + step, end)]
+
+
+class PCMCache:
+    """
+    Process-wide cache of decoded, resampled playback audio.
+
+    Each source file is decoded once to 24 kHz mono s16 and written to a
+    `.pcm` sidecar next to it; the sidecar is memory-mapped, so every worker
+    process on the host shares the same page-cache copy. Entries are evicted
+    LRU once the mapped total exceeds `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, sample_rate: int = SAMPLE_RATE, use_sidecar: bool = True) -> None:
+        self.max_bytes = max_bytes
+        self.sample_rate = sample_rate
+        self.use_sidecar = use_sidecar
+        self._entries: "OrderedDict[Tuple[str, int, int], memoryview]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[str, int, int], asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.decodes = 0
+
+    def _key(self, file_path: str) -> Tuple[str, int, int]:
+        st = os.stat(file_path)
+        return (os.path.abspath(file_path), st.st_mtime_ns, st.st_size)
+
+    def sidecar_path(self, file_path: str) -> str:
+        return f"{file_path}.{self.sample_rate}.pcm"
+
+    def _load_uncached(self, file_path: str) -> memoryview:
+        if not self.use_sidecar:
+            self.decodes += 1
+            return memoryview(decode_pcm(file_path, self.sample_rate))
+
+        sidecar = self.sidecar_path(file_path)
+        fresh = (
+            os.path.exists(sidecar)
+            and os.path.getmtime(sidecar) >= os.path.getmtime(file_path)
+            and os.path.getsize(sidecar) > 0
+        )
+        if not fresh:
+            self.decodes += 1
+            pcm = decode_pcm(file_path, self.sample_rate)
+            if not pcm:
+                return memoryview(pcm)
+            tmp_path = f"{sidecar}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(pcm)
+                os.replace(tmp_path, sidecar)
+            except OSError as e:
+                # Read-only deployment: keep the decoded bytes in memory instead
+                logger.warning(f"Could not write PCM sidecar {sidecar}: {e}")
+                return memoryview(pcm)
+
+        with open(sidecar, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(mapped)
+
+    def _store(self, key: Tuple[str, int, int], pcm: memoryview) -> None:
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = pcm
+            self._bytes += len(pcm)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def _lookup(self, key: Tuple[str, int, int]) -> Optional[memoryview]:
+        with self._lock:
+            pcm = self._entries.get(key)
+            if pcm is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return pcm
+
+    def preload(self, file_path: str) -> memoryview:
+        """Blocking load, for prewarm where no event loop is running yet"""
+        key = self._key(file_path)
+        pcm = self._lookup(key)
+        if pcm is None:
+            self.misses += 1
+            pcm = self._load_uncached(file_path)
+            self._store(key, pcm)
+        return pcm
+
+    async def load(self, file_path: str) -> memoryview:
+        """Return the PCM for a file, decoding it off the event loop on a miss"""
+        key = self._key(file_path)
+        pcm = self._lookup(key)
+        if pcm is not None:
+            return pcm
+
+        # Single-flight: concurrent jobs for the same file share one decode
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            pcm = await asyncio.to_thread(self._load_uncached, file_path)
+            self._store(key, pcm)
+            future.set_result(pcm)
+            return pcm
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so waiters-less failures don't log "never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "decodes": self.decodes,
+        }
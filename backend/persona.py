@@ -1,17 +1,29 @@
-from typing import Dict, Any
+import os
+import string
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 
-def get_criminal_mindset_prompt(metadata: Dict[str, Any]) -> str:
-    """
-    Generates a system prompt for the Riddler/Moriarty persona based on provided metadata.
-    """
+DEFAULT_CRIME_TYPE = "Kidnapping (Indian Edition)"
+DEFAULT_VICTIM = "your friend"
+DEFAULT_USER_ROLE = "detective"
 
-    crime_type = metadata.get("crime_type", "Kidnapping (Indian Edition)")
-    victim = metadata.get("victim_name", "your friend")
-    user_role = metadata.get("user_role", "detective")
-    is_indian = "indian" in str(crime_type).lower()
+# Values of an explicit "persona" metadata field that request the villain
+PERSONA_ALIASES = {"riddler", "moriarty"}
 
-    if is_indian:
-        base_prompt = f"""
+# "classic" interleaves case values through the prompt; "prefix_stable" keeps
+# every per-case value in a trailing block so the instructions are a prefix
+# shared by all sessions of a persona. "auto" uses prefix_stable only for
+# personas whose shared prefix is long enough for the provider to cache it;
+# below that minimum the reordering buys nothing across sessions, and within
+# a session the classic prompt is already a stable prefix.
+PROMPT_LAYOUT = os.getenv("PERSONA_PROMPT_LAYOUT", "auto")
+
+# OpenAI prompt caching: prompts under 1024 tokens are never cached and hits
+# are counted in 128-token steps of the matched prefix
+PROVIDER_CACHE_MIN_TOKENS = 1024
+PROVIDER_CACHE_INCREMENT_TOKENS = 128
+
+INDIAN_TEMPLATE = """
 You are Moriarty, reimagined as a dramatic, high-stakes Indian cinematic villain with razor intellect.
 You have KIDNAPPED {victim} and hidden them in a famous Indian city or landmark.
 
@@ -38,9 +50,8 @@ At the beginning of the exchange, call set_scene with "study".
 When the location shifts, call set_scene with one of: study, market, underpass, landmark.
 After every spoken line you deliver, call send_caption with speaker=moriarty and the exact line.
 """
-        return base_prompt
 
-    base_prompt = f"""
+DEFAULT_TEMPLATE = """
 You are Moriarty, a theatrical mastermind who has KIDNAPPED {victim}.
 
 CORE IDENTITY:
@@ -64,4 +75,259 @@ At the beginning of the exchange, call set_scene with "study".
 When the location shifts, call set_scene with one of: study, market, underpass, landmark.
 After every spoken line you deliver, call send_caption with speaker=moriarty and the exact line.
 """
-    return base_prompt
+
+# Everything above the CASE FILE block is identical for every session of a persona
+STABLE_INDIAN_TEMPLATE = """
+You are Moriarty, reimagined as a dramatic, high-stakes Indian cinematic villain with razor intellect.
+You have KIDNAPPED the victim named in the case file below and hidden them in a famous Indian city or landmark.
+
+CORE IDENTITY:
+- The Villain: theatrical, poetic, menacing. You savor every word.
+- The Context: the victim is running out of time.
+- Tone: dramatic flourishes and occasional Hindi phrases, but mostly English.
+- The Game: the player, in the role given in the case file, must guess the LOCATION where the victim is held.
+
+CURRENT SCENARIO:
+The victim is hidden in a famous Indian location (e.g., Taj Mahal, Gateway of India, Hawa Mahal, Howrah Bridge).
+Choose ONE location secretly. Do not reveal it.
+
+INSTRUCTIONS:
+1. Start by taunting the user.
+2. Give a riddling clue about the location.
+3. If they ask Watson, let Watson speak via the tool. Watson stays British and grounded.
+4. If they guess correctly, show shock and defeat.
+5. If they guess wrong, laugh and continue the riddle.
+
+CRITICAL:
+If the user addresses Watson, Dr. Watson, or asks for Watson's opinion, you MUST use the ask_watson tool.
+At the beginning of the exchange, call set_scene with "study".
+When the location shifts, call set_scene with one of: study, market, underpass, landmark.
+After every spoken line you deliver, call send_caption with speaker=moriarty and the exact line.
+Always call the victim by name and address the player by their role.
+
+CASE FILE:
+- Victim: {victim}
+- Player role: {user_role}
+"""
+
+STABLE_DEFAULT_TEMPLATE = """
+You are Moriarty, a theatrical mastermind who has KIDNAPPED the victim named in the case file below.
+
+CORE IDENTITY:
+- The Villain: elegant, cold, taunting.
+- The Context: the victim is running out of time.
+- The Game: the player, in the role given in the case file, must guess the LOCATION where the victim is held.
+
+CURRENT SCENARIO:
+The victim is hidden in a landmark or location you choose secretly. Do not reveal it.
+
+INSTRUCTIONS:
+1. Start by taunting the user.
+2. Give a riddling clue about the location.
+3. If they ask Watson, let Watson speak via the tool.
+4. If they guess correctly, show shock and defeat.
+5. If they guess wrong, laugh and continue the riddle.
+
+CRITICAL:
+If the user addresses Watson, Dr. Watson, or asks for Watson's opinion, you MUST use the ask_watson tool.
+At the beginning of the exchange, call set_scene with "study".
+When the location shifts, call set_scene with one of: study, market, underpass, landmark.
+After every spoken line you deliver, call send_caption with speaker=moriarty and the exact line.
+Always call the victim by name and address the player by their role.
+
+CASE FILE:
+- Victim: {victim}
+- Player role: {user_role}
+"""
+
+
+def approx_tokens(text: str) -> int:
+    """Rough BPE token count (~4 characters per token for English prose)"""
+    return (len(text) + 3) // 4
+
+
+def provider_cached_tokens(prefix_tokens: int) -> int:
+    """Tokens of a shared prefix a provider would bill as cached"""
+    if prefix_tokens < PROVIDER_CACHE_MIN_TOKENS:
+        return 0
+    return prefix_tokens - prefix_tokens % PROVIDER_CACHE_INCREMENT_TOKENS
+
+
+class PersonaTemplate:
+    """
+    A prompt template parsed once into literal and field segments.
+
+    Rendering only joins strings; unknown placeholders are rejected when the
+    template is registered rather than when a session starts.
+    """
+
+    def __init__(self, name: str, source: str, fields: Tuple[str, ...] = ("victim", "user_role")) -> None:
+        self.name = name
+        self.source = source
+        self.fields = fields
+        self._segments: List[Tuple[str, Optional[str]]] = []
+        for literal, field, spec, conversion in string.Formatter().parse(source):
+            if field is not None and (field not in fields or spec or conversion):
+                raise ValueError(f"Persona template {name!r} uses unsupported placeholder {{{field}}}")
+            self._segments.append((literal, field))
+
+    @property
+    def static_prefix(self) -> str:
+        """Text before the first placeholder; identical for every render"""
+        prefix: List[str] = []
+        for literal, field in self._segments:
+            prefix.append(literal)
+            if field is not None:
+                break
+        return "".join(prefix)
+
+    def render(self, values: Dict[str, str]) -> str:
+        parts: List[str] = []
+        for literal, field in self._segments:
+            parts.append(literal)
+            if field is not None:
+                parts.append(values[field])
+        return "".join(parts)
+
+
+PERSONA_TEMPLATES: Dict[str, PersonaTemplate] = {
+    "indian": PersonaTemplate("indian", INDIAN_TEMPLATE),
+    "default": PersonaTemplate("default", DEFAULT_TEMPLATE),
+}
+
+STABLE_PERSONA_TEMPLATES: Dict[str, PersonaTemplate] = {
+    "indian": PersonaTemplate("indian", STABLE_INDIAN_TEMPLATE),
+    "default": PersonaTemplate("default", STABLE_DEFAULT_TEMPLATE),
+}
+
+TEMPLATE_LAYOUTS: Dict[str, Dict[str, PersonaTemplate]] = {
+    "classic": PERSONA_TEMPLATES,
+    "prefix_stable": STABLE_PERSONA_TEMPLATES,
+}
+
+# crime_type (lowercased) -> template name; bounded so free-text crime types can't grow it forever
+_CRIME_TYPE_PERSONAS: Dict[str, str] = {}
+_CRIME_TYPE_PERSONAS_MAX = 1024
+
+
+def select_persona(metadata: Dict[str, Any]) -> str:
+    """Template name for a case: an explicit "edition" field wins, then the crime type"""
+    edition = metadata.get("edition")
+    if isinstance(edition, str) and edition.lower() in PERSONA_TEMPLATES:
+        return edition.lower()
+
+    crime_type = str(metadata.get("crime_type", DEFAULT_CRIME_TYPE)).lower()
+    name = _CRIME_TYPE_PERSONAS.get(crime_type)
+    if name is None:
+        name = "indian" if "indian" in crime_type else "default"
+        if len(_CRIME_TYPE_PERSONAS) < _CRIME_TYPE_PERSONAS_MAX:
+            _CRIME_TYPE_PERSONAS[crime_type] = name
+    return name
+
+
+def wants_persona(metadata: Dict[str, Any]) -> bool:
+    """Whether a room's metadata asks for the Moriarty persona"""
+    if "crime_type" in metadata:
+        return True
+    persona = metadata.get("persona")
+    return isinstance(persona, str) and persona.lower() in PERSONA_ALIASES
+
+
+def persona_key(metadata: Dict[str, Any]) -> Tuple[str, str, str]:
+    """Normalized cache key: only the fields that change the rendered prompt"""
+    victim = metadata.get("victim_name", DEFAULT_VICTIM)
+    user_role = metadata.get("user_role", DEFAULT_USER_ROLE)
+    return select_persona(metadata), str(victim), str(user_role)
+
+
+class PromptCache:
+    """Bounded LRU of rendered prompts keyed by layout and `persona_key`"""
+
+    def __init__(self, max_entries: int = 512) -> None:
+        self.max_entries = max_entries
+        self._prompts: "OrderedDict[Tuple[str, str, str, str], str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, metadata: Dict[str, Any], layout: str = "classic") -> str:
+        key = (layout,) + persona_key(metadata)
+        prompt = self._prompts.get(key)
+        if prompt is not None:
+            self.hits += 1
+            self._prompts.move_to_end(key)
+            return prompt
+
+        self.misses += 1
+        _, name, victim, user_role = key
+        prompt = TEMPLATE_LAYOUTS[layout][name].render({"victim": victim, "user_role": user_role})
+        self._prompts[key] = prompt
+        if len(self._prompts) > self.max_entries:
+            self._prompts.popitem(last=False)
+            self.evictions += 1
+        return prompt
+
+    def clear(self) -> None:
+        self._prompts.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._prompts),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+prompt_cache = PromptCache()
+
+
+def auto_layout(name: str) -> str:
+    """prefix_stable when that persona's shared prefix reaches the provider cache minimum"""
+    prefix_tokens = approx_tokens(STABLE_PERSONA_TEMPLATES[name].static_prefix)
+    return "prefix_stable" if provider_cached_tokens(prefix_tokens) else "classic"
+
+
+def get_criminal_mindset_prompt(metadata: Dict[str, Any], layout: Optional[str] = None) -> str:
+    """
+    Generates a system prompt for the Riddler/Moriarty persona based on provided metadata.
+    """
+    layout = layout or PROMPT_LAYOUT
+    if layout == "auto":
+        layout = auto_layout(select_persona(metadata))
+    if layout not in TEMPLATE_LAYOUTS:
+        raise ValueError(f"Unknown persona prompt layout: {layout}")
+    return prompt_cache.get(metadata, layout)
+
+
+def prefix_report() -> List[Dict[str, Any]]:
+    """Cacheable (session-independent) prompt prefix per persona and layout"""
+    report: List[Dict[str, Any]] = []
+    for layout, templates in TEMPLATE_LAYOUTS.items():
+        for name, template in templates.items():
+            prefix_tokens = approx_tokens(template.static_prefix)
+            total_tokens = approx_tokens(template.source)
+            report.append({
+                "persona": name,
+                "layout": layout,
+                "prefix_chars": len(template.static_prefix),
+                "prefix_tokens": prefix_tokens,
+                "prompt_tokens": total_tokens,
+                "cacheable": round(prefix_tokens / total_tokens, 3),
+                "provider_cached_tokens": provider_cached_tokens(prefix_tokens),
+                "qualifies": prefix_tokens >= PROVIDER_CACHE_MIN_TOKENS,
+            })
+    return report
+
+
+if __name__ == "__main__":
+    # python persona.py -> how much of each system prompt a provider can cache across sessions
+    for row in prefix_report():
+        below = "" if row["qualifies"] else f"  (below the {PROVIDER_CACHE_MIN_TOKENS}-token cache minimum)"
+        print(
+            f"{row['persona']:<8} {row['layout']:<14} prefix={row['prefix_tokens']:>4} tok "
+            f"({row['prefix_chars']} chars) of {row['prompt_tokens']:>4} tok  cacheable={row['cacheable']:.0%}  "
+            f"provider_cached={row['provider_cached_tokens']:>4} tok{below}"
+        )
+    for name in STABLE_PERSONA_TEMPLATES:
+        print(f"auto layout for {name}: {auto_layout(name)}")
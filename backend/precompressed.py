@@ -0,0 +1,157 @@
+import gzip
+import hashlib
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # gzip-only without the optional brotli package
+    brotli = None
+
+# Preferred order when the client accepts several encodings equally
+ENCODINGS = ("br", "gzip", "identity")
+
+# Each encoded variant is a different representation and gets its own strong ETag
+ETAG_SUFFIXES = {"gzip": "-gz", "br": "-br"}
+
+
+def strong_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q}; an absent header allows only identity"""
+    accepted: Dict[str, float] = {}
+    if not header:
+        return accepted
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def variant_etag(etag: str, encoding: str) -> str:
+    """'"abc"' -> '"abc-gz"' for the gzip variant; identity keeps the plain tag"""
+    suffix = ETAG_SUFFIXES.get(encoding)
+    return f"{etag[:-1]}{suffix}\"" if suffix else etag
+
+
+def _base_etag(tag: str) -> str:
+    for suffix in ETAG_SUFFIXES.values():
+        if tag.endswith(suffix + '"'):
+            return tag[: -len(suffix) - 1] + '"'
+    return tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match uses weak comparison, so W/"x" matches "x". Encoding
+    suffixes are stripped from both sides: a client holding any variant of
+    the same body may revalidate it (the 304 carries the variant's ETag).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = _base_etag(etag)
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if _base_etag(tag) == etag:
+            return True
+    return False
+
+
+class PrecompressedAsset:
+    """
+    A response body encoded once into identity, gzip and (when the brotli
+    package is installed) brotli variants. `etag` is a strong ETag over the
+    uncompressed bytes; compressed variants are served with it plus an
+    encoding suffix (`variant_etag`). A compressed variant is only kept if
+    it is smaller.
+    """
+
+    def __init__(self, body: bytes, media_type: str, min_size: int = 256) -> None:
+        self.media_type = media_type
+        self.etag = strong_etag(body)
+        self.variants: Dict[str, bytes] = {"identity": body}
+        if len(body) >= min_size:
+            # mtime=0 keeps the gzip bytes, and so their length, reproducible
+            gz = gzip.compress(body, compresslevel=9, mtime=0)
+            if len(gz) < len(body):
+                self.variants["gzip"] = gz
+            if brotli is not None:
+                br = brotli.compress(body, quality=11)
+                if len(br) < len(body):
+                    self.variants["br"] = br
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Tuple[str, bytes]:
+        """
+        Best variant for the client's Accept-Encoding. Any accepted
+        compression beats an implicitly acceptable identity, and ties go to
+        the smaller encoding.
+        """
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get("*")
+        best, best_q = "identity", 0.0
+        for coding in ENCODINGS:
+            if coding not in self.variants:
+                continue
+            default = 0.0 if coding != "identity" else 0.001
+            q = accepted.get(coding, wildcard if wildcard is not None else default)
+            if q > best_q:
+                best, best_q = coding, q
+        return best, self.variants[best]
+
+    def sizes(self) -> Dict[str, int]:
+        return {coding: len(body) for coding, body in self.variants.items()}
+
+
+class FileAsset:
+    """
+    A PrecompressedAsset read from disk and rebuilt whenever the file's
+    mtime or size changes, for editing pages without restarting the server.
+    """
+
+    def __init__(self, path: str, media_type: str) -> None:
+        self.path = path
+        self.media_type = media_type
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._asset: Optional[PrecompressedAsset] = None
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def get(self) -> PrecompressedAsset:
+        st = os.stat(self.path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        if stamp != self._stamp:
+            with self._lock:
+                if stamp != self._stamp:
+                    with open(self.path, "rb") as f:
+                        self._asset = PrecompressedAsset(f.read(), self.media_type)
+                    self._stamp = stamp
+                    self.reloads += 1
+        return self._asset
+
+
+def response_headers(asset: PrecompressedAsset, encoding: str, cache_control: str) -> Dict[str, str]:
+    headers = {
+        "ETag": variant_etag(asset.etag, encoding),
+        "Cache-Control": cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return headers
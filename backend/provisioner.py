@@ -0,0 +1,198 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+WriteFn = Callable[[str, str], Awaitable[None]]
+
+
+@dataclass
+class PendingWrite:
+    room_name: str
+    meta_json: str
+    enqueued_at: float
+    attempts: int = 0
+
+
+class MetadataProvisioner:
+    """
+    Background queue that applies room metadata writes off the request path.
+
+    Writes for the same room are coalesced: while a room is queued or being
+    written, newer metadata replaces the pending payload and only the latest
+    one reaches the server. Failed writes are retried with exponential
+    backoff and jitter.
+
+    `write_now` applies a write before returning instead, for callers that
+    must not proceed until the metadata is on the server.
+    """
+
+    def __init__(
+        self,
+        write_fn: WriteFn,
+        workers: int = 4,
+        max_attempts: int = 5,
+        base_delay: float = 0.25,
+        max_delay: float = 5.0,
+    ) -> None:
+        self.write_fn = write_fn
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._pending: Dict[str, PendingWrite] = {}
+        self._in_flight: Set[str] = set()
+        self._inline: Dict[str, Tuple[asyncio.Future, str]] = {}
+        self._tasks: List[asyncio.Task] = []
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.written = 0
+        self.failed = 0
+        self.retries = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self._total_lag_ms = 0.0
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"metadata-provisioner-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def aclose(self, drain_timeout: float = 5.0) -> None:
+        """Give queued writes a chance to finish, then stop the workers"""
+        if self._tasks and self._pending:
+            try:
+                await asyncio.wait_for(self.join(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                print(f"Provisioner shutdown: dropping {len(self._pending)} pending metadata writes")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def join(self) -> None:
+        """Wait until every submitted write has been applied or given up on"""
+        while self._pending or self._in_flight:
+            await asyncio.sleep(0.01)
+
+    def submit(self, room_name: str, meta_json: str) -> None:
+        """Queue a metadata write; returns immediately"""
+        if not self._tasks:
+            self.start()
+        self.submitted += 1
+        pending = self._pending.get(room_name)
+        if pending is not None:
+            pending.meta_json = meta_json
+            self.coalesced += 1
+            return
+        self._pending[room_name] = PendingWrite(room_name, meta_json, time.monotonic())
+        if room_name not in self._in_flight:
+            self._queue.put_nowait(room_name)
+
+    async def write_now(self, room_name: str, meta_json: str, max_attempts: int = 3) -> bool:
+        """
+        Apply a write before returning, retrying up to `max_attempts` times.
+        Concurrent calls for the same room share one write; a caller with a
+        different payload queues it as a background update afterwards. If
+        the write still fails it is handed to the background queue and False
+        is returned.
+        """
+        shared = self._inline.get(room_name)
+        if shared is not None:
+            future, shared_json = shared
+            self.submitted += 1
+            self.coalesced += 1
+            ok = await asyncio.shield(future)
+            if ok and meta_json != shared_json:
+                self.submit(room_name, meta_json)
+            return ok
+
+        future = asyncio.get_running_loop().create_future()
+        self._inline[room_name] = (future, meta_json)
+        self.submitted += 1
+        ok = False
+        try:
+            ok = await self._apply(PendingWrite(room_name, meta_json, time.monotonic()), max_attempts)
+        finally:
+            self._inline.pop(room_name, None)
+            future.set_result(ok)
+        if not ok:
+            self.submit(room_name, meta_json)
+        return ok
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return delay * (0.5 + random.random() / 2)
+
+    async def _worker(self) -> None:
+        while True:
+            room_name = await self._queue.get()
+            try:
+                job = self._pending.pop(room_name, None)
+                if job is None:
+                    continue
+                self._in_flight.add(room_name)
+                await self._apply(job)
+            finally:
+                self._in_flight.discard(room_name)
+                # A newer payload arrived while we were writing; schedule it now
+                if room_name in self._pending:
+                    self._queue.put_nowait(room_name)
+                self._queue.task_done()
+
+    async def _apply(self, job: PendingWrite, max_attempts: Optional[int] = None) -> bool:
+        max_attempts = max_attempts or self.max_attempts
+        while True:
+            job.attempts += 1
+            try:
+                await self.write_fn(job.room_name, job.meta_json)
+            except Exception as e:
+                if job.attempts >= max_attempts:
+                    self.failed += 1
+                    print(f"ERROR: Giving up on metadata for room '{job.room_name}' after {job.attempts} attempts: {e}")
+                    return False
+                self.retries += 1
+                delay = self._backoff(job.attempts)
+                print(f"Metadata write for '{job.room_name}' failed ({e}); retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                # Retry with the latest payload if one was submitted meanwhile
+                newer = self._pending.pop(job.room_name, None)
+                if newer is not None:
+                    job.meta_json = newer.meta_json
+                continue
+
+            lag_ms = (time.monotonic() - job.enqueued_at) * 1000.0
+            self.written += 1
+            self.last_lag_ms = lag_ms
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            self._total_lag_ms += lag_ms
+            return True
+
+    def oldest_pending_ms(self) -> Optional[float]:
+        if not self._pending:
+            return None
+        oldest = min(job.enqueued_at for job in self._pending.values())
+        return (time.monotonic() - oldest) * 1000.0
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        oldest = self.oldest_pending_ms()
+        return {
+            "queue_depth": len(self._pending),
+            "in_flight": len(self._in_flight),
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "written": self.written,
+            "failed": self.failed,
+            "retries": self.retries,
+            "last_lag_ms": round(self.last_lag_ms, 2),
+            "max_lag_ms": round(self.max_lag_ms, 2),
+            "avg_lag_ms": round(self._total_lag_ms / self.written, 2) if self.written else 0.0,
+            "oldest_pending_ms": round(oldest, 2) if oldest is not None else None,
+        }
@@ -0,0 +1,108 @@
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+def metadata_hash(meta_json: str) -> str:
+    """Stable digest of a room metadata payload"""
+    return hashlib.sha256(meta_json.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class RoomEntry:
+    name: str
+    meta_hash: str
+    expires_at: float
+
+
+class RoomRegistry:
+    """
+    In-process view of rooms this backend has already provisioned.
+
+    Entries expire `ttl_seconds` after metadata was last written, which is
+    capped at the shortest time the server may keep an unattended room open
+    (its empty/departure timeouts); a join is not proof the room is still
+    open, so hits do not extend an entry. Rooms the server reports as finished are dropped with `forget`.
+    A hit with the same metadata hash means the server already has what we
+    would send.
+    """
+
+    def __init__(self, ttl_seconds: float, max_rooms: int = 10_000) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_rooms = max_rooms
+        self._rooms: "OrderedDict[str, RoomEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+
+    def _now(self) -> float:
+        return time.monotonic()
+
+    def get(self, room_name: str) -> Optional[RoomEntry]:
+        """Return the live entry for a room, dropping it if it has expired"""
+        entry = self._rooms.get(room_name)
+        if entry is None:
+            return None
+        if entry.expires_at <= self._now():
+            del self._rooms[room_name]
+            self.evictions += 1
+            return None
+        self._rooms.move_to_end(room_name)
+        return entry
+
+    def check(self, room_name: str, meta_hash: str) -> str:
+        """
+        Classify a provisioning request.
+
+        Returns "hit" (room known, metadata unchanged), "stale" (room known,
+        metadata differs) or "miss" (room unknown or expired).
+        """
+        entry = self.get(room_name)
+        if entry is None:
+            self.misses += 1
+            return "miss"
+        if entry.meta_hash != meta_hash:
+            self.stale += 1
+            return "stale"
+        self.hits += 1
+        return "hit"
+
+    def record(self, room_name: str, meta_hash: str) -> None:
+        self._rooms[room_name] = RoomEntry(
+            name=room_name,
+            meta_hash=meta_hash,
+            expires_at=self._now() + self.ttl_seconds,
+        )
+        self._rooms.move_to_end(room_name)
+        while len(self._rooms) > self.max_rooms:
+            self._rooms.popitem(last=False)
+            self.evictions += 1
+
+    def forget(self, room_name: str) -> bool:
+        """Drop a room, e.g. once the server reports it finished; returns whether it was known"""
+        return self._rooms.pop(room_name, None) is not None
+
+    def evict_expired(self) -> int:
+        """Drop every expired entry; returns how many were removed"""
+        now = self._now()
+        expired = [name for name, entry in self._rooms.items() if entry.expires_at <= now]
+        for name in expired:
+            del self._rooms[name]
+        self.evictions += len(expired)
+        return len(expired)
+
+    def stats(self) -> Dict[str, float]:
+        self.evict_expired()
+        lookups = self.hits + self.misses + self.stale
+        return {
+            "rooms": len(self._rooms),
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "ttl_seconds": self.ttl_seconds,
+        }
@@ -0,0 +1,273 @@
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union
+
+logger = logging.getLogger("agent-worker")
+
+
+@dataclass(frozen=True)
+class Cue:
+    """One timeline event, `at` seconds after its schedule (or branch) starts"""
+
+    at: float
+    action: str
+    args: Tuple[Any, ...] = ()
+
+
+@dataclass(frozen=True)
+class SceneSchedule:
+    """
+    A room's timeline as data. `branches` maps a player action (e.g.
+    "CHOOSE_CLUE:wrapper") to the cues that replace whatever is left of the
+    current timeline when that action happens.
+    """
+
+    cues: Tuple[Cue, ...]
+    branches: Dict[str, Tuple[Cue, ...]] = field(default_factory=dict)
+
+
+OPENING_SCHEDULE = SceneSchedule(
+    cues=(
+        Cue(0.0, "scene", ("study",)),
+        Cue(8.0, "scene", ("market",)),
+        Cue(14.0, "scene", ("underpass",)),
+        Cue(20.0, "scene", ("landmark",)),
+    ),
+    branches={
+        "CHOOSE_CLUE:wrapper": (Cue(0.0, "scene", ("market",)),),
+        "CHOOSE_CLUE:receipt": (Cue(0.0, "scene", ("underpass",)),),
+        "CHOOSE_CLUE:ledger": (Cue(0.0, "scene", ("study",)),),
+        "DEDUCTION": (Cue(0.0, "scene", ("landmark",)),),
+    },
+)
+
+CueHandler = Callable[[Cue], Union[None, Awaitable[None]]]
+
+
+class RoomTimeline:
+    """
+    One room's position in its schedule. Only the next cue is ever queued
+    on the scheduler, so a room costs one heap entry however long its
+    schedule is.
+    """
+
+    def __init__(self, scheduler: "TimelineScheduler", room: str, schedule: SceneSchedule, handler: CueHandler) -> None:
+        self.scheduler = scheduler
+        self.room = room
+        self.schedule = schedule
+        self.handler = handler
+        self._cues: Tuple[Cue, ...] = tuple(sorted(schedule.cues, key=lambda cue: cue.at))
+        self._index = 0
+        self._origin = 0.0  # loop time at which the current cue list started
+        self._paused_at: Optional[float] = None
+        self._generation = 0
+        self.started = False
+        self.done = False
+
+    @property
+    def paused(self) -> bool:
+        return self._paused_at is not None
+
+    def _schedule_next(self) -> None:
+        self._generation += 1
+        if self._index >= len(self._cues):
+            self.done = True
+            self.scheduler._finished(self)
+            return
+        self.scheduler._push(self._origin + self._cues[self._index].at, self, self._generation)
+
+    def start(self) -> None:
+        if self.started:
+            return
+        self.started = True
+        self._origin = self.scheduler.now()
+        self.scheduler._active.add(self)
+        self._schedule_next()
+
+    def pause(self) -> None:
+        if self.done or self.paused or not self.started:
+            return
+        self._paused_at = self.scheduler.now()
+        # Invalidates the queued entry; the scheduler drops it lazily
+        self._generation += 1
+        self.scheduler._stale += 1
+
+    def resume(self) -> None:
+        if not self.paused:
+            return
+        self._origin += self.scheduler.now() - self._paused_at
+        self._paused_at = None
+        self._schedule_next()
+
+    def branch(self, action: str) -> bool:
+        """Switch to the branch for `action`; False when the schedule has none"""
+        cues = self.schedule.branches.get(action)
+        if cues is None or not self.started:
+            return False
+        if not self.done and not self.paused:
+            self.scheduler._stale += 1
+        self._cues = tuple(sorted(cues, key=lambda cue: cue.at))
+        self._index = 0
+        self._origin = self.scheduler.now()
+        if self.done:
+            self.done = False
+            self.scheduler._active.add(self)
+        if not self.paused:
+            self._schedule_next()
+        else:
+            # Resuming shifts the origin by the time spent paused from here on
+            self._paused_at = self._origin
+        return True
+
+    def cancel(self) -> None:
+        if self.done:
+            return
+        if not self.paused and self.started:
+            self.scheduler._stale += 1
+        self._generation += 1
+        self.done = True
+        self.scheduler._finished(self)
+
+    def _fire(self) -> None:
+        cue = self._cues[self._index]
+        self._index += 1
+        self.scheduler.fired += 1
+        try:
+            result = self.handler(cue)
+            if inspect.isawaitable(result):
+                self.scheduler._spawn(self, result)
+        except Exception as e:
+            logger.warning(f"Scene timeline cue {cue.action}{cue.args} failed in room '{self.room}': {e}")
+        self._schedule_next()
+
+
+class TimelineScheduler:
+    """
+    Drives the scene timelines of every room on one event loop from one heap
+    and one loop timer.
+
+    Instead of a sleeping task per room, each room keeps just its next cue
+    in a heap keyed by deadline; a single `call_at` handle is armed for the
+    earliest one and fires every due cue in one pass. Pausing, branching
+    and cancelling bump the room's generation so its queued entry is
+    skipped when popped; the heap is rebuilt once such stale entries
+    outnumber live ones.
+    """
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, int, int, RoomTimeline]] = []
+        self._seq = itertools.count()
+        self._active: Set[RoomTimeline] = set()
+        self._tasks: Set[asyncio.Future] = set()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._timer_at = float("inf")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stale = 0
+        self._dispatching = False
+        self.fired = 0
+        self.wakeups = 0
+        self.max_late_ms = 0.0
+        self._late_total_ms = 0.0
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Reused on a new event loop (e.g. after asyncio.run returns): drop the old timer
+            self._loop = loop
+            self._timer = None
+            self._timer_at = float("inf")
+        return loop
+
+    def now(self) -> float:
+        return self._get_loop().time()
+
+    def timeline(self, room: str, schedule: SceneSchedule, handler: CueHandler) -> RoomTimeline:
+        return RoomTimeline(self, room, schedule, handler)
+
+    def _push(self, deadline: float, timeline: RoomTimeline, generation: int) -> None:
+        heapq.heappush(self._heap, (deadline, next(self._seq), generation, timeline))
+        # While dispatching, the timer is re-armed once at the end of the pass
+        if deadline < self._timer_at and not self._dispatching:
+            self._arm(deadline)
+
+    def _arm(self, deadline: float) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer_at = deadline
+        self._timer = self._get_loop().call_at(deadline, self._run)
+
+    def _run(self) -> None:
+        self._timer = None
+        self._timer_at = float("inf")
+        self.wakeups += 1
+        now = self._loop.time()
+        heap = self._heap
+        self._dispatching = True
+        try:
+            while heap and heap[0][0] <= now:
+                deadline, _, generation, timeline = heapq.heappop(heap)
+                if generation != timeline._generation:
+                    self._stale -= 1
+                    continue
+                late_ms = (now - deadline) * 1000
+                self._late_total_ms += late_ms
+                self.max_late_ms = max(self.max_late_ms, late_ms)
+                timeline._fire()
+        finally:
+            self._dispatching = False
+        if self._stale > len(heap) // 2 and self._stale > 64:
+            self._compact()
+        if heap:
+            self._arm(heap[0][0])
+
+    def _compact(self) -> None:
+        self._heap[:] = [entry for entry in self._heap if entry[2] == entry[3]._generation]
+        heapq.heapify(self._heap)
+        self._stale = 0
+
+    def _finished(self, timeline: RoomTimeline) -> None:
+        self._active.discard(timeline)
+
+    def _spawn(self, timeline: RoomTimeline, awaitable: Awaitable[None]) -> None:
+        async def _run() -> None:
+            try:
+                await awaitable
+            except Exception as e:
+                logger.warning(f"Scene timeline cue failed in room '{timeline.room}': {e}")
+
+        task = asyncio.ensure_future(_run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rooms": len(self._active),
+            "queued": len(self._heap),
+            "stale": self._stale,
+            "fired": self.fired,
+            "wakeups": self.wakeups,
+            "avg_late_ms": round(self._late_total_ms / max(self.fired, 1), 3),
+            "max_late_ms": round(self.max_late_ms, 3),
+        }
+
+
+_loop_schedulers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, TimelineScheduler]" = weakref.WeakKeyDictionary()
+
+
+def loop_scheduler() -> TimelineScheduler:
+    """
+    The scheduler for the running event loop. livekit-agents runs each job
+    in its own process by default, and its thread executor still gives each
+    job its own loop, so in the agent this usually drives a single room;
+    rooms only share a heap when they share a loop (as in the benchmark).
+    """
+    loop = asyncio.get_running_loop()
+    scheduler = _loop_schedulers.get(loop)
+    if scheduler is None:
+        scheduler = _loop_schedulers[loop] = TimelineScheduler()
+    return scheduler
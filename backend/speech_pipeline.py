@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterable, Awaitable, Callable, List, Optional
+
+from livekit import rtc
+from livekit.agents import tts as agents_tts
+
+logger = logging.getLogger("agent-worker")
+
+# Split after sentence punctuation followed by whitespace
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+
+
+class SentenceChunker:
+    """
+    Accumulates streamed LLM deltas and releases complete sentences.
+
+    Very short fragments ("Ah.") are held back and merged with the next
+    sentence so the TTS gets enough context for natural prosody.
+    """
+
+    def __init__(self, min_chars: int = 20) -> None:
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def push(self, delta: str) -> List[str]:
+        self._buffer += delta
+        sentences: List[str] = []
+        start = 0
+        for match in _SENTENCE_BOUNDARY.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            if len(candidate) < self.min_chars:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> Optional[str]:
+        rest = self._buffer.strip()
+        self._buffer = ""
+        return rest or None
+
+
+@dataclass
+class SpeechResult:
+    text: str = ""
+    sentences: List[str] = field(default_factory=list)
+    first_sentence_ms: Optional[float] = None
+    first_audio_ms: Optional[float] = None
+    total_ms: float = 0.0
+    frames: int = 0
+    samples: int = 0
+    sample_rate: int = 0
+
+    @property
+    def audio_duration(self) -> float:
+        """Seconds of audio produced"""
+        return self.samples / self.sample_rate if self.sample_rate else 0.0
+
+
+async def stream_speech(
+    text_deltas: AsyncIterable[str],
+    tts: agents_tts.TTS,
+    on_frame: Callable[[rtc.AudioFrame], Awaitable[None]],
+    on_sentence: Optional[Callable[[str], Awaitable[None]]] = None,
+    started_at: Optional[float] = None,
+) -> SpeechResult:
+    """
+    Pipe an LLM text stream into a streaming TTS session sentence by sentence.
+
+    Each complete sentence is pushed to the TTS (and handed to `on_sentence`,
+    e.g. for captions) as soon as it arrives, while synthesized frames are
+    forwarded to `on_frame` concurrently. Timings are measured from
+    `started_at` (defaults to now) using `time.perf_counter()`.
+    """
+    result = SpeechResult()
+    t0 = started_at if started_at is not None else time.perf_counter()
+    chunker = SentenceChunker()
+    tts_stream = tts.stream()
+
+    async def _emit(sentence: str) -> None:
+        if result.first_sentence_ms is None:
+            result.first_sentence_ms = (time.perf_counter() - t0) * 1000
+        result.sentences.append(sentence)
+        tts_stream.push_text(sentence + " ")
+        tts_stream.flush()
+        if on_sentence is not None:
+            try:
+                await on_sentence(sentence)
+            except Exception as e:
+                logger.warning(f"Sentence callback failed: {e}")
+
+    async def _produce() -> None:
+        try:
+            async for delta in text_deltas:
+                if not delta:
+                    continue
+                result.text += delta
+                for sentence in chunker.push(delta):
+                    await _emit(sentence)
+            rest = chunker.flush()
+            if rest:
+                await _emit(rest)
+        finally:
+            tts_stream.end_input()
+
+    async def _consume() -> None:
+        async for audio in tts_stream:
+            frame = audio.frame
+            if frame is None:
+                continue
+            if result.first_audio_ms is None:
+                result.first_audio_ms = (time.perf_counter() - t0) * 1000
+            result.frames += 1
+            result.samples += frame.samples_per_channel
+            result.sample_rate = frame.sample_rate
+            await on_frame(frame)
+
+    producer = asyncio.create_task(_produce())
+    try:
+        await asyncio.gather(producer, _consume())
+    finally:
+        if not producer.done():
+            producer.cancel()
+        await tts_stream.aclose()
+        result.total_ms = (time.perf_counter() - t0) * 1000
+    return result
@@ -0,0 +1,137 @@
+import asyncio
+import inspect
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Union
+
+logger = logging.getLogger("agent-worker")
+
+StepFn = Callable[[Dict[str, Any]], Union[Any, Awaitable[Any]]]
+
+
+@dataclass
+class _Step:
+    name: str
+    fn: StepFn
+    deps: Sequence[str]
+    optional: bool
+    started_ms: Optional[float] = None
+    finished_ms: Optional[float] = None
+    error: Optional[BaseException] = None
+
+
+@dataclass
+class StartupTrace:
+    total_ms: float = 0.0
+    steps: List[Dict[str, Any]] = field(default_factory=list)
+    marks: Dict[str, float] = field(default_factory=dict)
+
+    def format(self) -> str:
+        parts = []
+        for step in self.steps:
+            status = "" if step["ok"] else " FAILED"
+            parts.append(f"{step['name']}@{step['start_ms']:.0f}+{step['duration_ms']:.0f}ms{status}")
+        parts.extend(f"{name}={at:.0f}ms" for name, at in self.marks.items())
+        return ", ".join(parts)
+
+
+class StartupGraph:
+    """
+    Runs a job's startup steps as a dependency graph.
+
+    Each step is a function of the results of the steps before it and starts
+    as soon as its dependencies have finished, so independent work (room
+    connection, metadata lookup, model and audio loading) overlaps instead of
+    adding up. A failed step fails every step that depends on it; steps added
+    with `optional=True` resolve to None on failure instead. Start and
+    finish offsets of every step are kept for the timing trace.
+    """
+
+    def __init__(self, name: str = "startup") -> None:
+        self.name = name
+        self._steps: Dict[str, _Step] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.results: Dict[str, Any] = {}
+        self.marks: Dict[str, float] = {}
+        self._t0 = time.perf_counter()
+
+    def add(self, name: str, fn: StepFn, deps: Sequence[str] = (), optional: bool = False) -> None:
+        if name in self._steps:
+            raise ValueError(f"Startup step {name!r} already defined")
+        self._steps[name] = _Step(name, fn, tuple(deps), optional)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self._t0) * 1000
+
+    def mark(self, name: str) -> None:
+        """Record a named moment (e.g. first audio) the first time it happens"""
+        self.marks.setdefault(name, self.elapsed_ms())
+
+    async def _run_step(self, step: _Step) -> Any:
+        if step.deps:
+            await asyncio.gather(*(self._tasks[dep] for dep in step.deps))
+        step.started_ms = self.elapsed_ms()
+        try:
+            result = step.fn(self.results)
+            if inspect.isawaitable(result):
+                result = await result
+        except Exception as e:
+            step.error = e
+            if not step.optional:
+                raise
+            logger.warning(f"Optional startup step '{step.name}' failed: {e}")
+            result = None
+        finally:
+            step.finished_ms = self.elapsed_ms()
+        self.results[step.name] = result
+        return result
+
+    def _check(self) -> None:
+        for step in self._steps.values():
+            for dep in step.deps:
+                if dep not in self._steps:
+                    raise ValueError(f"Startup step {step.name!r} depends on unknown step {dep!r}")
+        # Kahn's algorithm: every step must be reachable in dependency order
+        remaining = {name: set(step.deps) for name, step in self._steps.items()}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Startup steps form a cycle: {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    async def run(self) -> Dict[str, Any]:
+        """Run every step; raises the first required step's error"""
+        self._check()
+        for step in self._steps.values():
+            self._tasks[step.name] = asyncio.ensure_future(self._run_step(step))
+        try:
+            await asyncio.gather(*self._tasks.values())
+        except Exception:
+            for task in self._tasks.values():
+                task.cancel()
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            raise
+        return self.results
+
+    def trace(self) -> StartupTrace:
+        steps = sorted(
+            (s for s in self._steps.values() if s.started_ms is not None),
+            key=lambda s: s.started_ms,
+        )
+        return StartupTrace(
+            total_ms=self.elapsed_ms(),
+            steps=[
+                {
+                    "name": s.name,
+                    "start_ms": s.started_ms,
+                    "duration_ms": (s.finished_ms or s.started_ms) - s.started_ms,
+                    "ok": s.error is None,
+                }
+                for s in steps
+            ],
+            marks=dict(self.marks),
+        )
@@ -0,0 +1,290 @@
+import asyncio
+import hashlib
+import json
+import mimetypes
+import os
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from precompressed import PrecompressedAsset, etag_matches, response_headers
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=0, must-revalidate"
+
+TEXT_TYPES = {
+    "application/javascript",
+    "application/json",
+    "application/manifest+json",
+    "application/xml",
+    "image/svg+xml",
+    "text/javascript",
+}
+
+# Servers that implement the ASGI zero-copy extension get large files via sendfile(2)
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+def is_text(media_type: str) -> bool:
+    return media_type.startswith("text/") or media_type in TEXT_TYPES
+
+
+def hashed_name(rel_path: str, digest: str) -> str:
+    """images/watson.png -> images/watson.<hash>.png"""
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest}{ext}"
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    A single `bytes=` range as an inclusive (start, end), clamped to the file.
+    Returns None for a header the server may ignore (multiple ranges, other
+    units, malformed), and raises ValueError when the range is unsatisfiable.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    first, last = first.strip(), last.strip()
+    if not sep or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("range not satisfiable")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError("range not satisfiable")
+    end = int(last) if last else size - 1
+    return start, min(end, size - 1)
+
+
+@dataclass
+class StaticFile:
+    rel_path: str
+    abs_path: str
+    size: int
+    media_type: str
+    etag: str
+    hashed_path: str
+    # Whole body kept in memory (small files), or its compressed variants (text files)
+    body: Optional[bytes] = None
+    compressed: Optional[PrecompressedAsset] = None
+
+
+class StaticAssets:
+    """
+    ASGI app serving a directory (the frontend's public assets) for
+    `app.mount`; `url_prefix` is the mount path used in generated URLs.
+
+    The directory is indexed once at startup. Every file is reachable at
+    its plain path, which browsers revalidate with its strong ETag (one per
+    encoding for precompressed text), and at
+    a content-hashed path (`images/watson.<hash>.png`) that is cached as
+    immutable; `manifest.json` maps one to the other. Text assets are
+    precompressed to gzip/brotli. Binary files support single byte ranges
+    (audio seeking) with `If-Range`. Small files are kept in memory; large
+    ones are sent with sendfile when the server offers the ASGI zero-copy
+    extension and streamed in chunks off a thread otherwise.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        url_prefix: str = "",
+        memory_file_bytes: int = 256 * 1024,
+        max_memory_bytes: int = 32 * 1024 * 1024,
+        max_text_bytes: int = 4 * 1024 * 1024,
+        chunk_bytes: int = 256 * 1024,
+    ) -> None:
+        self.directory = os.path.abspath(directory)
+        self.url_prefix = url_prefix.rstrip("/")
+        self.memory_file_bytes = memory_file_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.max_text_bytes = max_text_bytes
+        self.chunk_bytes = chunk_bytes
+        self._files: Dict[str, StaticFile] = {}
+        self._hashed: Dict[str, StaticFile] = {}
+        self.manifest: Dict[str, str] = {}
+        self._manifest_asset: Optional[PrecompressedAsset] = None
+        self.memory_bytes = 0
+        self.counters = {"requests": 0, "not_modified": 0, "partial": 0, "zerocopy": 0, "streamed": 0, "not_found": 0}
+        self.scan()
+
+    def scan(self) -> None:
+        """(Re)build the index, hashes and in-memory copies"""
+        files: Dict[str, StaticFile] = {}
+        memory_bytes = 0
+        if os.path.isdir(self.directory):
+            for root, _dirs, names in os.walk(self.directory):
+                for name in sorted(names):
+                    if name.startswith("."):
+                        continue
+                    abs_path = os.path.join(root, name)
+                    rel_path = os.path.relpath(abs_path, self.directory).replace(os.sep, "/")
+                    entry, used = self._index_file(rel_path, abs_path, memory_bytes)
+                    files[rel_path] = entry
+                    memory_bytes += used
+        self._files = files
+        self._hashed = {entry.hashed_path: entry for entry in files.values()}
+        self.manifest = {rel: f"{self.url_prefix}/{entry.hashed_path}" for rel, entry in sorted(files.items())}
+        self._manifest_asset = PrecompressedAsset(
+            json.dumps(self.manifest, separators=(",", ":")).encode("utf-8"), "application/json"
+        )
+        self.memory_bytes = memory_bytes
+
+    def _index_file(self, rel_path: str, abs_path: str, memory_bytes: int) -> Tuple[StaticFile, int]:
+        media_type = mimetypes.guess_type(rel_path)[0] or "application/octet-stream"
+        if is_text(media_type):
+            media_type += "; charset=utf-8"
+        size = os.path.getsize(abs_path)
+        keep = size <= self.memory_file_bytes and memory_bytes + size <= self.max_memory_bytes
+        text = is_text(media_type) and size <= self.max_text_bytes
+
+        digest = hashlib.sha256()
+        body = bytearray() if keep or text else None
+        with open(abs_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+                if body is not None:
+                    body.extend(chunk)
+        hexdigest = digest.hexdigest()
+        entry = StaticFile(
+            rel_path=rel_path,
+            abs_path=abs_path,
+            size=size,
+            media_type=media_type,
+            etag=f'"{hexdigest[:32]}"',
+            hashed_path=hashed_name(rel_path, hexdigest[:10]),
+        )
+        used = 0
+        if text:
+            entry.compressed = PrecompressedAsset(bytes(body), media_type)
+            used = sum(entry.compressed.sizes().values())
+        elif keep:
+            entry.body = bytes(body)
+            used = size
+        return entry, used
+
+    def url(self, rel_path: str) -> str:
+        """Content-hashed URL for a file, or its plain URL if it is not indexed"""
+        rel_path = rel_path.lstrip("/")
+        return self.manifest.get(rel_path, f"{self.url_prefix}/{rel_path}")
+
+    def _lookup(self, path: str) -> Tuple[Optional[StaticFile], str]:
+        path = path.lstrip("/")
+        entry = self._hashed.get(path)
+        if entry is not None:
+            return entry, IMMUTABLE
+        return self._files.get(path), REVALIDATE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and path.startswith(root_path + "/"):
+            path = path[len(root_path):]
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        method = scope["method"]
+        self.counters["requests"] += 1
+
+        if method not in ("GET", "HEAD"):
+            await self._respond(send, 405, {"Allow": "GET, HEAD"}, b"", method)
+            return
+        if path.lstrip("/") == "manifest.json":
+            await self._send_precompressed(send, self._manifest_asset, REVALIDATE, headers, method)
+            return
+        entry, cache_control = self._lookup(path)
+        if entry is None:
+            self.counters["not_found"] += 1
+            await self._respond(send, 404, {"Content-Type": "text/plain"}, b"Not Found", method)
+            return
+        if entry.compressed is not None:
+            await self._send_precompressed(send, entry.compressed, cache_control, headers, method)
+            return
+        await self._send_file(send, scope, entry, cache_control, headers, method)
+
+    async def _respond(self, send: Send, status: int, headers: Dict[str, str], body: bytes, method: str, length: Optional[int] = None) -> None:
+        raw = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()]
+        raw.append((b"content-length", str(len(body) if length is None else length).encode("latin-1")))
+        await send({"type": "http.response.start", "status": status, "headers": raw})
+        await send({"type": "http.response.body", "body": b"" if method == "HEAD" else body})
+
+    async def _send_precompressed(self, send: Send, asset: PrecompressedAsset, cache_control: str, headers: Dict[str, str], method: str) -> None:
+        encoding, body = asset.negotiate(headers.get("accept-encoding"))
+        # The ETag names the negotiated variant; any variant of this body revalidates
+        out = response_headers(asset, encoding, cache_control)
+        if etag_matches(headers.get("if-none-match"), asset.etag):
+            self.counters["not_modified"] += 1
+            out.pop("Content-Encoding", None)
+            await self._respond(send, 304, out, b"", "HEAD", length=0)
+            return
+        out["Content-Type"] = asset.media_type
+        await self._respond(send, 200, out, body, method)
+
+    async def _send_file(self, send: Send, scope: Scope, entry: StaticFile, cache_control: str, headers: Dict[str, str], method: str) -> None:
+        out = {
+            "ETag": entry.etag,
+            "Cache-Control": cache_control,
+            "Accept-Ranges": "bytes",
+        }
+        if etag_matches(headers.get("if-none-match"), entry.etag):
+            self.counters["not_modified"] += 1
+            await self._respond(send, 304, out, b"", "HEAD", length=0)
+            return
+        out["Content-Type"] = entry.media_type
+
+        status, start, end = 200, 0, entry.size - 1
+        range_header = headers.get("range")
+        # If-Range: only honour the range while the client's copy is current
+        if range_header and headers.get("if-range", entry.etag) == entry.etag:
+            try:
+                byte_range = parse_range(range_header, entry.size)
+            except ValueError:
+                out["Content-Range"] = f"bytes */{entry.size}"
+                await self._respond(send, 416, out, b"", method)
+                return
+            if byte_range is not None:
+                status, (start, end) = 206, byte_range
+                out["Content-Range"] = f"bytes {start}-{end}/{entry.size}"
+                self.counters["partial"] += 1
+        length = end - start + 1 if entry.size else 0
+
+        if entry.body is not None or method == "HEAD" or length == 0:
+            body = entry.body[start:end + 1] if entry.body is not None else b""
+            await self._respond(send, status, out, body, method, length=length)
+            return
+
+        raw = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in out.items()]
+        raw.append((b"content-length", str(length).encode("latin-1")))
+        await send({"type": "http.response.start", "status": status, "headers": raw})
+        with open(entry.abs_path, "rb") as f:
+            if ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+                self.counters["zerocopy"] += 1
+                await send({"type": ZEROCOPY_EXTENSION, "file": f, "offset": start, "count": length})
+                return
+            self.counters["streamed"] += 1
+            loop = asyncio.get_running_loop()
+            offset, remaining = start, length
+            while remaining > 0:
+                chunk = await loop.run_in_executor(None, os.pread, f.fileno(), min(self.chunk_bytes, remaining), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # File shrank since it was indexed; end the response rather than hang
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counters, files=len(self._files), memory_bytes=self.memory_bytes)
+
@@ -0,0 +1,153 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from livekit import rtc
+
+logger = logging.getLogger("agent-worker")
+
+# Keep packets under LiveKit's recommended reliable data packet size
+MAX_PACKET_BYTES = 14 * 1024
+
+
+def _encode(payload: Dict[str, Any]) -> bytes:
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class StoryPublisher:
+    """
+    Per-room outbound queue for the UI's "story" data messages.
+
+    Scene and caption updates are held for `window_ms` after the first one
+    arrives and then sent together as a single reliable packet. Within a
+    window the last SCENE_SET wins. A window with a single message goes out
+    in the original one-message format; larger ones are sent as
+    {"type": "BATCH", "scene": ..., "captions": [[speaker, text], ...]}.
+
+    Backpressure: at most `max_pending` captions are queued. A producer
+    that would exceed it flushes inline and waits for the publish, so a
+    slow data channel slows the tool calls feeding it instead of growing
+    the queue without bound.
+    """
+
+    def __init__(
+        self,
+        room: rtc.Room,
+        topic: str = "story",
+        window_ms: float = 120.0,
+        max_pending: int = 32,
+        max_packet_bytes: int = MAX_PACKET_BYTES,
+    ) -> None:
+        self.room = room
+        self.topic = topic
+        self.window = window_ms / 1000.0
+        self.max_pending = max_pending
+        self.max_packet_bytes = max_packet_bytes
+
+        self._scene: Optional[str] = None
+        self._captions: List[Tuple[str, str]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._send_lock = asyncio.Lock()
+        self._closed = False
+
+        self.messages = 0
+        self.packets = 0
+        self.bytes = 0
+        self.scene_overwrites = 0
+        self.backpressure_waits = 0
+        self.failures = 0
+
+    async def set_scene(self, scene: str) -> None:
+        if self._scene is not None:
+            self.scene_overwrites += 1
+        self._scene = scene
+        await self._enqueued()
+
+    async def caption(self, speaker: str, text: str) -> None:
+        self._captions.append((speaker, text))
+        await self._enqueued()
+
+    async def _enqueued(self) -> None:
+        self.messages += 1
+        if self._closed:
+            await self.flush()
+        elif len(self._captions) >= self.max_pending:
+            self.backpressure_waits += 1
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._on_window)
+
+    def _on_window(self) -> None:
+        # flush() serializes on the send lock, so an earlier flush still in flight is fine
+        self._timer = None
+        self._flush_task = asyncio.create_task(self.flush(), name="story-flush")
+
+    def _packets(self, scene: Optional[str], captions: List[Tuple[str, str]]) -> List[bytes]:
+        if scene is not None and not captions:
+            return [_encode({"type": "SCENE_SET", "scene": scene})]
+        if scene is None and len(captions) == 1:
+            speaker, text = captions[0]
+            return [_encode({"type": "CAPTION", "speaker": speaker, "text": text})]
+
+        packets: List[bytes] = []
+        batch: Dict[str, Any] = {"type": "BATCH", "captions": []}
+        if scene is not None:
+            batch["scene"] = scene
+        size = len(_encode(batch))
+        for speaker, text in captions:
+            entry = [speaker, text]
+            entry_size = len(_encode(entry)) + 1
+            if batch["captions"] and size + entry_size > self.max_packet_bytes:
+                packets.append(_encode(batch))
+                batch = {"type": "BATCH", "captions": []}
+                size = len(_encode(batch))
+            batch["captions"].append(entry)
+            size += entry_size
+        packets.append(_encode(batch))
+        return packets
+
+    async def flush(self) -> None:
+        """Send everything queued so far; packets go out in queue order"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        async with self._send_lock:
+            scene, captions = self._scene, self._captions
+            self._scene, self._captions = None, []
+            if scene is None and not captions:
+                return
+            if not self.room.local_participant:
+                logger.warning("StoryPublisher: local participant unavailable")
+                return
+            for data in self._packets(scene, captions):
+                try:
+                    await self.room.local_participant.publish_data(
+                        data,
+                        reliable=True,
+                        topic=self.topic,
+                    )
+                    self.packets += 1
+                    self.bytes += len(data)
+                except Exception as e:
+                    self.failures += 1
+                    logger.warning(f"StoryPublisher publish failed: {e}")
+
+    async def aclose(self) -> None:
+        """Flush what is queued; later messages are sent immediately"""
+        self._closed = True
+        await self.flush()
+        if self._flush_task is not None:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        logger.info(f"Story publisher: {self.stats()}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "messages": self.messages,
+            "packets": self.packets,
+            "bytes": self.bytes,
+            "scene_overwrites": self.scene_overwrites,
+            "backpressure_waits": self.backpressure_waits,
+            "failures": self.failures,
+        }
@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("livekit.rtc")
+
+from audio_bank import AudioBank, line_key, write_pack  # noqa: E402
+
+MORIARTY = "cartesia/sonic-2:moriarty"
+WATSON = "cartesia/sonic-2:watson"
+
+
+def _pack(tmp_path):
+    path = str(tmp_path / "lines.pack")
+    clips = {
+        line_key(MORIARTY, "Welcome"): b"\x01\x00" * 480,
+        line_key(WATSON, "Elementary"): b"\x02\x00" * 1000,
+    }
+    size = write_pack(path, clips, sample_rate=16000)
+    return path, clips, size
+
+
+def test_write_then_load_round_trip(tmp_path):
+    path, clips, size = _pack(tmp_path)
+    assert (tmp_path / "lines.pack").stat().st_size == size
+
+    bank = AudioBank(path).load()
+    assert bank.sample_rate == 16000
+    assert bytes(bank.get(MORIARTY, "Welcome")) == clips[line_key(MORIARTY, "Welcome")]
+    assert bytes(bank.get(WATSON, "Elementary")) == clips[line_key(WATSON, "Elementary")]
+    # A line is keyed by voice too
+    assert bank.get(WATSON, "Welcome") is None
+    assert bank.stats() == {"lines": 2, "hits": 2, "misses": 1}
+
+
+def test_missing_pack_falls_back_to_live_tts(tmp_path):
+    bank = AudioBank(str(tmp_path / "absent.pack")).load()
+    assert bank.get(MORIARTY, "Welcome") is None
+
+
+def test_foreign_file_is_rejected(tmp_path):
+    path = tmp_path / "lines.pack"
+    path.write_bytes(b"NOTAPACK" + b"\x00" * 32)
+    with pytest.raises(ValueError):
+        AudioBank(str(path)).load()
+
+
+def test_clip_frames_are_20ms(tmp_path):
+    path, _, _ = _pack(tmp_path)
+    bank = AudioBank(path).load()
+
+    async def collect():
+        return [frame async for frame in bank.frames(bank.get(WATSON, "Elementary"))]
+
+    frames = asyncio.run(collect())
+    assert [f.samples_per_channel for f in frames] == [320, 320, 320, 40]
+    assert all(f.sample_rate == 16000 for f in frames)
@@ -0,0 +1,52 @@
+import numpy as np
+
+from audio_dsp import GainStage, mix_into
+
+
+def _pcm(*samples: int) -> bytes:
+    return np.array(samples, dtype=np.int16).tobytes()
+
+
+def _samples(data) -> list:
+    return np.frombuffer(bytes(data), dtype=np.int16).tolist()
+
+
+def test_unity_gain_is_a_copy():
+    stage = GainStage()
+    assert _samples(stage.process(_pcm(1, -2, 32767, -32768))) == [1, -2, 32767, -32768]
+
+
+def test_boost_saturates_instead_of_wrapping():
+    stage = GainStage(2.0, max_samples=4)
+    assert _samples(stage.process(_pcm(1000, 30000, -30000, -1000))) == [2000, 32767, -32768, -2000]
+
+
+def test_ramp_reaches_target_and_stays():
+    stage = GainStage(1.0, max_samples=4)
+    stage.ramp_to(0.0, 4)
+    ramped = _samples(stage.process(_pcm(1000, 1000, 1000, 1000)))
+    assert ramped == [750, 500, 250, 0]
+    assert not stage.ramping
+    assert _samples(stage.process(_pcm(1000, 1000))) == [0, 0]
+
+
+def test_process_into_grows_for_larger_frames():
+    stage = GainStage(0.5, max_samples=2)
+    out = np.zeros(4, dtype=np.int16)
+    stage.process_into(_pcm(100, 200, 300, 400), out)
+    assert out.tolist() == [50, 100, 150, 200]
+
+
+def test_mix_into_sums_without_clipping():
+    acc = np.zeros(3, dtype=np.float32)
+    mix_into(acc, _pcm(30000, -30000, 10))
+    mix_into(acc, _pcm(30000, -30000, 10), gain=0.5)
+    # The accumulator holds the true sum; the mixer saturates once per frame
+    assert acc.tolist() == [45000.0, -45000.0, 15.0]
+
+
+def test_mix_into_ignores_samples_past_the_accumulator():
+    acc = np.zeros(2, dtype=np.float32)
+    scratch = np.empty(8, dtype=np.float32)
+    mix_into(acc, _pcm(1, 2, 3, 4), scratch=scratch)
+    assert acc.tolist() == [1.0, 2.0]
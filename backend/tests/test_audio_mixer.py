@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("livekit.rtc")
+
+from audio_mixer import AudioMixer, MixerInput  # noqa: E402
+
+
+class _FailingParticipant:
+    async def publish_track(self, track, options):
+        raise RuntimeError("publish_track failed")
+
+
+class _Room:
+    name = "room"
+    local_participant = _FailingParticipant()
+
+    def on(self, event, handler):
+        pass
+
+    def off(self, event, handler):
+        pass
+
+
+def test_wait_resolves_when_the_mixer_never_started():
+    async def run():
+        mixer = AudioMixer(_Room())
+        with pytest.raises(RuntimeError):
+            await mixer.start()
+        assert not mixer.running
+        source = mixer.play_pcm("intro", b"\x01\x00" * 4800)
+        await asyncio.wait_for(source.wait(), timeout=1.0)
+
+    asyncio.run(run())
+
+
+def test_input_missing_read_fails_at_creation():
+    class _NoRead(MixerInput):
+        @property
+        def active(self) -> bool:
+            return True
+
+    with pytest.raises(TypeError):
+        _NoRead(AudioMixer(_Room()), "broken", gain=1.0, duck=False, speech=False)
@@ -0,0 +1,68 @@
+import asyncio
+
+from audio_pacing import FramePacer, Histogram
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_histogram_quantiles_use_bucket_bounds():
+    hist = Histogram(buckets=(1, 5, 10))
+    for value in (0.5, 2, 3, 4, 8, 50):
+        hist.observe(value)
+    assert hist.quantile(0.5) == 5
+    assert hist.quantile(0.8) == 10
+    assert hist.quantile(1.0) == 50
+    assert hist.buckets_dict() == {"le_1": 1, "le_5": 3, "le_10": 1, "inf": 1}
+    summary = hist.summary()
+    assert summary["count"] == 6
+    assert summary["max"] == 50
+
+
+def test_empty_histogram():
+    assert Histogram().quantile(0.5) is None
+    assert Histogram().summary()["avg"] is None
+
+
+def test_pacer_counts_underruns_and_reanchors():
+    async def run():
+        clock = _Clock()
+        pacer = FramePacer(frame_duration=0.02, target_depth=0.06, clock=clock)
+        await pacer.wait()  # first frame anchors the timeline
+        for _ in range(3):
+            pacer.frame_sent()
+        assert abs(pacer.depth() - 0.06) < 1e-9
+
+        clock.now += 0.1  # output ran dry 40 ms ago
+        await pacer.wait()
+        pacer.frame_sent()
+        return pacer
+
+    pacer = asyncio.run(run())
+    stats = pacer.stats()
+    assert stats["frames"] == 4
+    assert stats["underruns"] == 1
+    assert stats["underrun_gap_ms"]["max"] == 40.0
+    # Re-anchored at the resume point: the new frame is all that is buffered
+    assert abs(pacer.depth() - 0.02) < 1e-9
+
+
+def test_reset_is_not_an_underrun():
+    async def run():
+        clock = _Clock()
+        pacer = FramePacer(frame_duration=0.02, clock=clock)
+        await pacer.wait()
+        pacer.frame_sent()
+        pacer.reset()
+        clock.now += 5.0
+        await pacer.wait()
+        return pacer
+
+    pacer = asyncio.run(run())
+    assert pacer.underruns == 0
+    assert pacer.depth() == 0.0
@@ -0,0 +1,60 @@
+import asyncio
+import json
+
+import pytest
+
+from case_director import DEFAULT_CASE, CaseDirector, deduction_solves
+
+
+def test_deduction_matches_whole_words_without_negation():
+    solution = DEFAULT_CASE.solution
+    assert deduction_solves("The riverside warehouse!", solution)
+    assert deduction_solves("warehouses by the docks", solution)
+    assert not deduction_solves("not the warehouse", solution)
+    assert not deduction_solves("It isn't the riverside", solution)
+    assert not deduction_solves("nowhere near the warehouse", solution)
+    assert not deduction_solves("the warehousekeeper did it", solution)
+    assert not deduction_solves("the market", solution)
+
+
+async def _events(subscriber):
+    chunk = await subscriber.next(heartbeat=0.01)
+    return [
+        json.loads(line[len("data: "):])
+        for line in chunk.decode().splitlines()
+        if line.startswith("data: ")
+    ]
+
+
+def test_negated_deduction_costs_time_and_correct_one_solves():
+    async def run():
+        director = CaseDirector()
+        subscriber = director.subscribe("room")
+        director.start("room")
+        wrong = director.action("room", "DEDUCTION", {"answer": "not the warehouse"})
+        solved = director.action("room", "DEDUCTION", {"answer": "the warehouse"})
+        events = await _events(subscriber)
+        await director.aclose()
+        return wrong, solved, events
+
+    wrong, solved, events = asyncio.run(run())
+    assert wrong["phase"] == "running"
+    assert wrong["remaining"] <= DEFAULT_CASE.duration - DEFAULT_CASE.wrong_penalty
+    assert solved["outcome"] == "solved"
+    types = [event["type"] for event in events]
+    assert "DEDUCTION_WRONG" in types and types[-1] == "CASE_END"
+
+
+def test_actions_need_a_running_case():
+    async def run():
+        director = CaseDirector()
+        with pytest.raises(ValueError):
+            director.action("room", "DEDUCTION", {"answer": "warehouse"})
+        director.start("room")
+        with pytest.raises(ValueError):
+            director.action("room", "DANCE", {})
+        with pytest.raises(ValueError):
+            director.action("room", "CHOOSE_CLUE", {"clue": "teacup"})
+        await director.aclose()
+
+    asyncio.run(run())
@@ -0,0 +1,69 @@
+import json
+from dataclasses import dataclass
+from typing import List, Optional
+
+from chat_budget import NOTES_ID, ChatContextBudget, context_tokens
+
+
+@dataclass
+class _Message:
+    role: str
+    text_content: str
+    id: str = ""
+    type: str = "message"
+
+
+@dataclass
+class _Call:
+    name: str
+    arguments: str
+    call_id: str
+    id: str = ""
+    type: str = "function_call"
+
+
+class _ChatContext:
+    def __init__(self, items: List) -> None:
+        self.items = items
+
+    def add_message(self, role: str, content: str, id: Optional[str] = None) -> None:
+        self.items.append(_Message(role=role, text_content=content, id=id or ""))
+
+
+def _turn(i: int) -> List:
+    line = f"Clue {i}: the spice merchant's ledger points past the old fort gate where the pigeons nest at dusk."
+    return [
+        _Message("user", f"Is it somewhere near the harbour, guess number {i}?"),
+        _Message("assistant", line),
+        _Call("send_caption", json.dumps({"speaker": "moriarty", "text": line}), f"call-{i}"),
+    ]
+
+
+def test_long_session_stays_under_budget():
+    budget = ChatContextBudget(max_tokens=1500, keep_turns=4, secret_location="Jaipur")
+    ctx = _ChatContext([_Message("system", "You are Moriarty. " * 40)])
+    for i in range(400):
+        ctx.items.extend(_turn(i))
+        report = budget.compact(ctx)
+        assert report.tokens_after <= budget.max_tokens, (i, report)
+
+    assert len(budget.clues) <= budget.max_clues
+    assert budget.earlier_clues > 0
+    notes = next(item for item in ctx.items if item.id == NOTES_ID)
+    assert "Jaipur" in notes.text_content
+    # The opening clue survives in the condensed line; the latest is still a live turn
+    assert "Clue 0:" in notes.text_content
+    assert any("Clue 399" in (getattr(item, "text_content", "") or "") for item in ctx.items)
+    assert context_tokens(ctx) <= budget.max_tokens
+
+
+def test_system_prompt_stays_first():
+    budget = ChatContextBudget(max_tokens=600, keep_turns=2)
+    ctx = _ChatContext([_Message("system", "persona prompt")])
+    for i in range(30):
+        ctx.items.extend(_turn(i))
+        budget.compact(ctx)
+
+    assert ctx.items[0].text_content == "persona prompt"
+    assert ctx.items[1].id == NOTES_ID
+    assert sum(1 for item in ctx.items if item.id == NOTES_ID) == 1
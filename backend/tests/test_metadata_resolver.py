@@ -0,0 +1,119 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("livekit.api")
+pytest.importorskip("livekit.rtc")
+
+from metadata_resolver import RoomMetadataResolver, _Entry  # noqa: E402
+
+
+class _Client:
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def aclose(self) -> None:
+        self.closed = True
+
+
+class _Room:
+    def __init__(self, name: str, metadata: str = "") -> None:
+        self.name = name
+        self.metadata = metadata
+        self.handlers = {}
+
+    def on(self, event, handler) -> None:
+        self.handlers[event] = handler
+
+    def off(self, event, handler) -> None:
+        self.handlers.pop(event, None)
+
+
+def test_client_closed_after_last_job_releases():
+    async def run():
+        resolver = RoomMetadataResolver()
+        client = _Client()
+        resolver._clients[asyncio.get_running_loop()] = client
+        resolver.attach()
+        resolver.attach()
+        await resolver.release()
+        first = client.closed
+        await resolver.release()
+        return first, client.closed, resolver._clients
+
+    first, last, remaining = asyncio.run(run())
+    assert not first
+    assert last
+    assert remaining == {}
+
+
+def test_each_loop_gets_its_own_client(monkeypatch):
+    monkeypatch.setenv("LIVEKIT_URL", "http://127.0.0.1:7880")
+    monkeypatch.setenv("LIVEKIT_API_KEY", "devkey")
+    monkeypatch.setenv("LIVEKIT_API_SECRET", "devsecret")
+    resolver = RoomMetadataResolver()
+    other = _Client()
+    other_loop = asyncio.new_event_loop()
+    resolver._clients[other_loop] = other
+
+    async def run():
+        resolver.attach()
+        client = await resolver._get_client()
+        await resolver.release()
+        return client
+
+    try:
+        client = asyncio.run(run())
+        # Releasing this loop's job leaves the other loop's client alone
+        assert client is not other
+        assert not other.closed
+        assert resolver._clients == {other_loop: other}
+    finally:
+        other_loop.close()
+
+
+def test_client_from_a_closed_loop_is_closed_on_next_use(monkeypatch):
+    monkeypatch.setenv("LIVEKIT_URL", "http://127.0.0.1:7880")
+    monkeypatch.setenv("LIVEKIT_API_KEY", "devkey")
+    monkeypatch.setenv("LIVEKIT_API_SECRET", "devsecret")
+    resolver = RoomMetadataResolver()
+    old = _Client()
+
+    async def bind():
+        resolver._clients[asyncio.get_running_loop()] = old
+
+    async def replace():
+        return await resolver._get_client()
+
+    asyncio.run(bind())
+    new = asyncio.run(replace())
+    assert old.closed
+    assert new is not old
+    assert list(resolver._clients.values()) == [new]
+    asyncio.run(resolver.aclose())
+
+
+def test_unwatch_evicts_the_room():
+    resolver = RoomMetadataResolver()
+    room = _Room("case-1", '{"crime_type": "heist"}')
+    resolver.watch(room)
+    assert resolver.stats()["entries"] == 1
+
+    resolver.unwatch("case-1")
+    assert resolver.stats()["entries"] == 0
+    assert room.handlers == {}
+
+
+def test_expired_lookups_are_pruned():
+    resolver = RoomMetadataResolver(ttl=5.0)
+    resolver._entries["old"] = _Entry("{}", time.monotonic() - 10)
+    resolver._entries["live"] = _Entry("{}", time.monotonic() - 10, watched=True)
+
+    async def fetch(room_name):
+        return '{"crime_type": "heist"}'
+
+    resolver._fetch = fetch
+    metadata, source = asyncio.run(resolver.resolve("new"))
+    assert source == "api"
+    assert sorted(resolver._entries) == ["live", "new"]
@@ -0,0 +1,77 @@
+import os
+
+import pcm_cache
+from pcm_cache import PCMCache, iter_pcm_frames
+
+PCM = bytes(range(256)) * 40  # 5120 bytes of s16
+
+
+def _fake_decoder(monkeypatch, pcm: bytes = PCM):
+    calls = []
+
+    def decode(file_path, sample_rate=pcm_cache.SAMPLE_RATE):
+        calls.append(file_path)
+        return pcm
+
+    monkeypatch.setattr(pcm_cache, "decode_pcm", decode)
+    return calls
+
+
+def _source(tmp_path, name: str = "intro.wav") -> str:
+    path = tmp_path / name
+    path.write_bytes(b"RIFF")
+    return str(path)
+
+
+def test_sidecar_round_trip_skips_decoding(monkeypatch, tmp_path):
+    calls = _fake_decoder(monkeypatch)
+    path = _source(tmp_path)
+
+    first = PCMCache().preload(path)
+    assert bytes(first) == PCM
+    assert os.path.getsize(PCMCache().sidecar_path(path)) == len(PCM)
+
+    # A fresh process maps the sidecar instead of decoding again
+    cache = PCMCache()
+    again = cache.preload(path)
+    assert bytes(again) == PCM
+    assert len(calls) == 1
+    assert cache.stats()["decodes"] == 0
+
+
+def test_stale_sidecar_is_rebuilt(monkeypatch, tmp_path):
+    path = _source(tmp_path)
+    _fake_decoder(monkeypatch, b"\x00\x00" * 10)
+    PCMCache().preload(path)
+
+    sidecar = PCMCache().sidecar_path(path)
+    os.utime(sidecar, (0, 0))
+    calls = _fake_decoder(monkeypatch)
+    assert bytes(PCMCache().preload(path)) == PCM
+    assert len(calls) == 1
+
+
+def test_hits_and_lru_eviction(monkeypatch, tmp_path):
+    _fake_decoder(monkeypatch)
+    cache = PCMCache(max_bytes=len(PCM) * 2, use_sidecar=False)
+    a, b, c = (_source(tmp_path, f"{name}.wav") for name in "abc")
+
+    cache.preload(a)
+    cache.preload(b)
+    cache.preload(a)
+    cache.preload(c)
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["entries"] == 2
+    assert stats["bytes"] == len(PCM) * 2
+    # b was least recently used
+    cache.preload(a)
+    assert cache.stats()["hits"] == 2
+
+
+def test_frames_are_zero_copy_slices():
+    pcm = bytearray(24000 * 2 // 10 + 3)  # 100 ms, one more sample and a stray byte
+    frames = list(iter_pcm_frames(pcm, sample_rate=24000, frame_ms=20))
+    assert [len(f) for f in frames] == [960] * 5 + [2]
+    pcm[0] = 7
+    assert frames[0][0] == 7
@@ -0,0 +1,60 @@
+import pytest
+
+import persona
+from persona import (
+    INDIAN_TEMPLATE,
+    PersonaTemplate,
+    PromptCache,
+    get_criminal_mindset_prompt,
+    provider_cached_tokens,
+)
+
+CASES = [
+    {"crime_type": "Kidnapping (Indian Edition)", "victim_name": "Asha", "user_role": "inspector"},
+    {"crime_type": "Heist", "victim_name": "Lord {Brackets}", "user_role": "detective"},
+    {"crime_type": "heist"},
+]
+
+
+@pytest.mark.parametrize("metadata", CASES)
+def test_classic_render_matches_str_format(metadata):
+    name, victim, user_role = persona.persona_key(metadata)
+    expected = persona.TEMPLATE_LAYOUTS["classic"][name].source.format(victim=victim, user_role=user_role)
+    assert get_criminal_mindset_prompt(metadata, layout="classic") == expected
+    assert PromptCache().get(metadata) == expected
+
+
+def test_static_prefix_stops_at_first_placeholder():
+    template = PersonaTemplate("indian", INDIAN_TEMPLATE)
+    assert INDIAN_TEMPLATE.startswith(template.static_prefix)
+    assert template.static_prefix.endswith("You have KIDNAPPED ")
+
+
+def test_unknown_placeholder_is_rejected():
+    with pytest.raises(ValueError):
+        PersonaTemplate("bad", "Hello {detective_name}")
+
+
+def test_prompt_cache_hits_and_evicts():
+    cache = PromptCache(max_entries=2)
+    first = cache.get(CASES[0])
+    assert cache.get(dict(CASES[0], unrelated="x")) is first
+    cache.get(CASES[1])
+    cache.get(CASES[2])
+    assert cache.stats() == {"entries": 2, "hits": 1, "misses": 3, "evictions": 1}
+
+
+def test_provider_cache_minimum_and_increments():
+    assert provider_cached_tokens(1023) == 0
+    assert provider_cached_tokens(1024) == 1024
+    assert provider_cached_tokens(1300) == 1280
+
+
+def test_auto_layout_keeps_classic_below_the_cache_minimum():
+    for row in persona.prefix_report():
+        if row["layout"] == "prefix_stable":
+            expected = "prefix_stable" if row["qualifies"] else "classic"
+            assert persona.auto_layout(row["persona"]) == expected
+    metadata = CASES[0]
+    layout = persona.auto_layout(persona.select_persona(metadata))
+    assert get_criminal_mindset_prompt(metadata, layout="auto") == get_criminal_mindset_prompt(metadata, layout=layout)
@@ -0,0 +1,35 @@
+from precompressed import PrecompressedAsset, etag_matches, response_headers, variant_etag
+
+BODY = b"<html><body>" + b"<p>The game is afoot.</p>" * 200 + b"</body></html>"
+
+
+def test_each_encoding_has_its_own_etag():
+    asset = PrecompressedAsset(BODY, "text/html; charset=utf-8")
+    tags = {
+        encoding: response_headers(asset, encoding, "no-cache")["ETag"]
+        for encoding in asset.variants
+    }
+    assert tags["identity"] == asset.etag
+    assert tags["gzip"] == variant_etag(asset.etag, "gzip") != asset.etag
+    assert len(set(tags.values())) == len(tags)
+
+
+def test_if_none_match_accepts_any_variant_of_the_same_body():
+    asset = PrecompressedAsset(BODY, "text/html; charset=utf-8")
+    gz = variant_etag(asset.etag, "gzip")
+    assert etag_matches(gz, asset.etag)
+    assert etag_matches(asset.etag, gz)
+    assert etag_matches(f'"other", W/{gz}', asset.etag)
+    assert etag_matches("*", asset.etag)
+    other = PrecompressedAsset(BODY + b"!", "text/html; charset=utf-8")
+    assert not etag_matches(gz, other.etag)
+    assert not etag_matches(None, asset.etag)
+
+
+def test_negotiate_prefers_accepted_compression():
+    asset = PrecompressedAsset(BODY, "text/html; charset=utf-8")
+    assert asset.negotiate(None)[0] == "identity"
+    assert asset.negotiate("gzip")[0] == "gzip"
+    assert asset.negotiate("gzip;q=0, identity")[0] == "identity"
+    small = PrecompressedAsset(b"tiny", "text/plain")
+    assert small.negotiate("gzip, br")[0] == "identity"
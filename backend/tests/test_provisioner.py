@@ -0,0 +1,89 @@
+import asyncio
+
+from provisioner import MetadataProvisioner
+
+
+def _recorder(fail_times: int = 0, delay: float = 0.0):
+    writes = []
+    failures = {"left": fail_times}
+
+    async def write(room_name: str, meta_json: str) -> None:
+        await asyncio.sleep(delay)
+        if failures["left"] > 0:
+            failures["left"] -= 1
+            raise RuntimeError("server unavailable")
+        writes.append((room_name, meta_json))
+
+    return write, writes
+
+
+def test_submit_coalesces_to_latest_payload():
+    async def run():
+        write, writes = _recorder(delay=0.01)
+        provisioner = MetadataProvisioner(write, workers=1)
+        for i in range(5):
+            provisioner.submit("room", f'{{"v": {i}}}')
+        await provisioner.join()
+        await provisioner.aclose()
+        return writes, provisioner.stats()
+
+    writes, stats = asyncio.run(run())
+    assert writes[-1] == ("room", '{"v": 4}')
+    assert len(writes) <= 2
+    assert stats["coalesced"] >= 3
+
+
+def test_failed_write_is_retried():
+    async def run():
+        write, writes = _recorder(fail_times=2)
+        provisioner = MetadataProvisioner(write, base_delay=0.001, max_delay=0.002)
+        provisioner.submit("room", "{}")
+        await provisioner.join()
+        await provisioner.aclose()
+        return writes, provisioner.stats()
+
+    writes, stats = asyncio.run(run())
+    assert writes == [("room", "{}")]
+    assert stats["retries"] == 2
+    assert stats["failed"] == 0
+
+
+def test_write_now_shares_one_write_per_room():
+    async def run():
+        write, writes = _recorder(delay=0.01)
+        provisioner = MetadataProvisioner(write)
+        results = await asyncio.gather(*(provisioner.write_now("room", "{}") for _ in range(10)))
+        await provisioner.aclose()
+        return results, writes
+
+    results, writes = asyncio.run(run())
+    assert all(results)
+    assert writes == [("room", "{}")]
+
+
+def test_write_now_lands_before_returning():
+    async def run():
+        write, writes = _recorder(fail_times=1)
+        provisioner = MetadataProvisioner(write, base_delay=0.001, max_delay=0.002)
+        ok = await provisioner.write_now("room", '{"crime_type": "theft"}')
+        seen = list(writes)
+        await provisioner.aclose()
+        return ok, seen
+
+    ok, seen = asyncio.run(run())
+    assert ok
+    assert seen == [("room", '{"crime_type": "theft"}')]
+
+
+def test_write_now_falls_back_to_background_retries():
+    async def run():
+        write, writes = _recorder(fail_times=3)
+        provisioner = MetadataProvisioner(write, base_delay=0.001, max_delay=0.002)
+        ok = await provisioner.write_now("room", "{}", max_attempts=2)
+        await provisioner.join()
+        await provisioner.aclose()
+        return ok, writes
+
+    ok, writes = asyncio.run(run())
+    assert not ok
+    assert writes == [("room", "{}")]
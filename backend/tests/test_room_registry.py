@@ -0,0 +1,57 @@
+from room_registry import RoomRegistry, metadata_hash
+
+
+class _Clock(RoomRegistry):
+    def __init__(self, *args, **kwargs) -> None:
+        self.now = 0.0
+        super().__init__(*args, **kwargs)
+
+    def _now(self) -> float:
+        return self.now
+
+
+def test_check_classifies_by_metadata_hash():
+    registry = _Clock(ttl_seconds=60)
+    first, second = metadata_hash('{"v": 1}'), metadata_hash('{"v": 2}')
+    assert registry.check("room", first) == "miss"
+    registry.record("room", first)
+    assert registry.check("room", first) == "hit"
+    assert registry.check("room", second) == "stale"
+    assert registry.stats()["hits"] == 1
+
+
+def test_hits_do_not_extend_expiry():
+    registry = _Clock(ttl_seconds=60)
+    registry.record("room", "h")
+    for registry.now in (20.0, 40.0, 59.0):
+        assert registry.check("room", "h") == "hit"
+    registry.now = 60.0
+    assert registry.check("room", "h") == "miss"
+
+
+def test_record_refreshes_expiry():
+    registry = _Clock(ttl_seconds=60)
+    registry.record("room", "h")
+    registry.now = 50.0
+    registry.record("room", "h2")
+    registry.now = 100.0
+    assert registry.check("room", "h2") == "hit"
+
+
+def test_forget_drops_finished_room():
+    registry = _Clock(ttl_seconds=60)
+    registry.record("room", "h")
+    assert registry.forget("room") is True
+    assert registry.forget("room") is False
+    assert registry.check("room", "h") == "miss"
+
+
+def test_lru_bound():
+    registry = _Clock(ttl_seconds=60, max_rooms=2)
+    registry.record("a", "h")
+    registry.record("b", "h")
+    registry.get("a")
+    registry.record("c", "h")
+    assert registry.get("b") is None
+    assert registry.get("a") is not None
+    assert registry.stats()["evictions"] == 1
@@ -0,0 +1,81 @@
+import asyncio
+
+from scene_timeline import Cue, SceneSchedule, TimelineScheduler, loop_scheduler
+
+SCHEDULE = SceneSchedule(
+    cues=(Cue(0.0, "scene", ("a",)), Cue(0.02, "scene", ("b",)), Cue(0.04, "scene", ("c",))),
+    branches={"JUMP": (Cue(0.0, "scene", ("x",)), Cue(0.01, "scene", ("y",)))},
+)
+
+
+async def _drain(scheduler: TimelineScheduler) -> None:
+    while scheduler.stats()["rooms"]:
+        await asyncio.sleep(0.005)
+
+
+def _recorder(log):
+    return lambda cue: log.append(cue.args[0])
+
+
+def test_rooms_fire_their_cues_in_order():
+    async def run():
+        scheduler = TimelineScheduler()
+        logs = {room: [] for room in ("r1", "r2")}
+        for room, log in logs.items():
+            scheduler.timeline(room, SCHEDULE, _recorder(log)).start()
+        await _drain(scheduler)
+        return logs, scheduler.stats()
+
+    logs, stats = asyncio.run(run())
+    assert logs == {"r1": ["a", "b", "c"], "r2": ["a", "b", "c"]}
+    assert stats["fired"] == 6
+
+
+def test_pause_holds_cues_and_branch_replaces_the_rest():
+    async def run():
+        scheduler = TimelineScheduler()
+        paused, branched = [], []
+        held = scheduler.timeline("held", SCHEDULE, _recorder(paused))
+        held.start()
+        await asyncio.sleep(0.005)
+        held.pause()
+        await asyncio.sleep(0.06)
+        seen_while_paused = list(paused)
+        held.resume()
+        jumping = scheduler.timeline("jump", SCHEDULE, _recorder(branched))
+        jumping.start()
+        assert jumping.branch("JUMP")
+        assert not jumping.branch("UNKNOWN")
+        await _drain(scheduler)
+        return seen_while_paused, paused, branched
+
+    seen_while_paused, paused, branched = asyncio.run(run())
+    assert seen_while_paused == ["a"]
+    assert paused == ["a", "b", "c"]
+    assert branched == ["x", "y"]
+
+
+def test_cancel_stops_a_room():
+    async def run():
+        scheduler = TimelineScheduler()
+        log = []
+        timeline = scheduler.timeline("room", SCHEDULE, _recorder(log))
+        timeline.start()
+        await asyncio.sleep(0.005)
+        timeline.cancel()
+        await asyncio.sleep(0.06)
+        return log, scheduler.stats()
+
+    log, stats = asyncio.run(run())
+    assert log == ["a"]
+    assert stats["rooms"] == 0
+
+
+def test_loop_scheduler_is_per_event_loop():
+    async def get():
+        return loop_scheduler(), loop_scheduler()
+
+    first, same = asyncio.run(get())
+    other, _ = asyncio.run(get())
+    assert first is same
+    assert other is not first
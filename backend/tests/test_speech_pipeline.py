@@ -0,0 +1,21 @@
+import pytest
+
+pytest.importorskip("livekit.agents")
+
+from speech_pipeline import SentenceChunker  # noqa: E402
+
+
+def test_sentences_are_released_as_they_complete():
+    chunker = SentenceChunker(min_chars=10)
+    out = []
+    for delta in ["The wrapper was fo", "lded twice. Dockworkers ", "keep the foil", "! And then"]:
+        out.extend(chunker.push(delta))
+    assert out == ["The wrapper was folded twice.", "Dockworkers keep the foil!"]
+    assert chunker.flush() == "And then"
+    assert chunker.flush() is None
+
+
+def test_short_fragments_merge_into_the_next_sentence():
+    chunker = SentenceChunker(min_chars=20)
+    assert chunker.push("Ah. ") == []
+    assert chunker.push("The game is afoot, Watson. ") == ["Ah. The game is afoot, Watson."]
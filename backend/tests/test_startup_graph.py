@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from startup_graph import StartupGraph
+
+
+def test_dependents_of_a_failed_optional_step_still_run():
+    async def run():
+        graph = StartupGraph()
+
+        async def _mixer(_):
+            raise RuntimeError("publish_track failed")
+
+        async def _intro(results):
+            # Mirrors agent._play_intro: skip instead of waiting on a mixer that never started
+            return "skipped" if results["mixer"] is None else "played"
+
+        graph.add("connect", lambda _: "room")
+        graph.add("mixer", _mixer, deps=["connect"], optional=True)
+        graph.add("intro", _intro, deps=["mixer"], optional=True)
+        graph.add("greeting", lambda results: f"hello after {results['intro']}", deps=["connect", "intro"])
+        results = await asyncio.wait_for(graph.run(), timeout=1.0)
+        return results, graph.trace()
+
+    results, trace = asyncio.run(run())
+    assert results["mixer"] is None
+    assert results["greeting"] == "hello after skipped"
+    assert [step["ok"] for step in trace.steps if step["name"] == "mixer"] == [False]
+
+
+def test_required_failure_cancels_dependents_and_raises():
+    async def run():
+        graph = StartupGraph()
+        ran = []
+
+        async def _fail(_):
+            raise RuntimeError("connect failed")
+
+        graph.add("connect", _fail)
+        graph.add("greeting", lambda _: ran.append("greeting"), deps=["connect"])
+        with pytest.raises(RuntimeError):
+            await graph.run()
+        return ran
+
+    assert asyncio.run(run()) == []
+
+
+def test_steps_start_after_their_deps_and_independent_steps_overlap():
+    async def run():
+        graph = StartupGraph()
+        order = []
+
+        def _step(name, ms):
+            async def _run(_):
+                order.append(f"{name}+")
+                await asyncio.sleep(ms / 1000.0)
+                order.append(f"{name}-")
+                return name
+            return _run
+
+        graph.add("connect", _step("connect", 30))
+        graph.add("metadata", _step("metadata", 10))
+        graph.add("config", _step("config", 1), deps=["metadata"])
+        graph.add("session", lambda results: (results["config"], results["connect"]), deps=["config", "connect"])
+        results = await graph.run()
+        return order, results
+
+    order, results = asyncio.run(run())
+    assert order.index("connect+") < order.index("metadata-")
+    assert order.index("metadata-") < order.index("config+")
+    assert order.index("config-") < order.index("connect-")
+    assert results["session"] == ("config", "connect")
+
+
+def test_unknown_dependency_and_cycles_are_rejected():
+    graph = StartupGraph()
+    graph.add("a", lambda _: None, deps=["missing"])
+    with pytest.raises(ValueError):
+        asyncio.run(graph.run())
+
+    graph = StartupGraph()
+    graph.add("a", lambda _: None, deps=["b"])
+    graph.add("b", lambda _: None, deps=["a"])
+    with pytest.raises(ValueError):
+        asyncio.run(graph.run())
+
+    with pytest.raises(ValueError):
+        graph.add("a", lambda _: None)
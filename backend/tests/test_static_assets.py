@@ -0,0 +1,90 @@
+import asyncio
+import os
+from typing import Dict, Tuple
+
+import pytest
+
+from precompressed import variant_etag
+from static_assets import StaticAssets, parse_range
+
+
+def _get(app: StaticAssets, path: str, headers: Dict[str, str] = None) -> Tuple[int, Dict[str, str], bytes]:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "root_path": "",
+        "headers": [(k.encode(), v.encode()) for k, v in (headers or {}).items()],
+    }
+    status = 0
+    out: Dict[str, str] = {}
+    body = bytearray()
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            out.update((k.decode(), v.decode()) for k, v in message["headers"])
+        else:
+            body.extend(message.get("body", b""))
+
+    asyncio.run(app(scope, receive, send))
+    return status, out, bytes(body)
+
+
+@pytest.fixture
+def assets(tmp_path) -> StaticAssets:
+    (tmp_path / "app.js").write_text("export const scene = 'study';\n" * 200)
+    (tmp_path / "audio").mkdir()
+    (tmp_path / "audio" / "rain.mp3").write_bytes(os.urandom(4096))
+    return StaticAssets(str(tmp_path), url_prefix="/static")
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-99", 1000) == (0, 99)
+    assert parse_range("bytes=900-", 1000) == (900, 999)
+    assert parse_range("bytes=-100", 1000) == (900, 999)
+    assert parse_range("bytes=0-5000", 1000) == (0, 999)
+    assert parse_range("bytes=0-1,5-6", 1000) is None
+    assert parse_range("items=0-1", 1000) is None
+    assert parse_range("bytes=5-1", 1000) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=1000-", 1000)
+    with pytest.raises(ValueError):
+        parse_range("bytes=-0", 1000)
+
+
+def test_text_variants_have_distinct_etags_and_revalidate(assets):
+    status, identity, _ = _get(assets, "/app.js")
+    status_gz, gz, body = _get(assets, "/app.js", {"accept-encoding": "gzip"})
+    assert status == status_gz == 200
+    assert gz["content-encoding"] == "gzip"
+    assert gz["etag"] == variant_etag(identity["etag"], "gzip")
+
+    status, headers, body = _get(assets, "/app.js", {"accept-encoding": "gzip", "if-none-match": gz["etag"]})
+    assert status == 304 and body == b""
+    assert headers["etag"] == gz["etag"]
+    assert "content-encoding" not in headers
+
+
+def test_hashed_urls_are_immutable(assets):
+    url = assets.url("app.js")
+    assert url.startswith("/static/app.") and url != "/static/app.js"
+    status, headers, _ = _get(assets, url[len("/static"):])
+    assert status == 200
+    assert "immutable" in headers["cache-control"]
+
+
+def test_ranges_and_if_range(assets):
+    status, headers, body = _get(assets, "/audio/rain.mp3")
+    etag = headers["etag"]
+    status, headers, part = _get(assets, "/audio/rain.mp3", {"range": "bytes=10-19", "if-range": etag})
+    assert status == 206 and len(part) == 10 and part == body[10:20]
+    assert headers["content-range"] == "bytes 10-19/4096"
+    status, _, whole = _get(assets, "/audio/rain.mp3", {"range": "bytes=10-19", "if-range": '"stale"'})
+    assert status == 200 and whole == body
+    status, headers, _ = _get(assets, "/audio/rain.mp3", {"range": "bytes=5000-"})
+    assert status == 416 and headers["content-range"] == "bytes */4096"
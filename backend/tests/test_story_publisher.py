@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("livekit.rtc")
+
+from story_publisher import StoryPublisher  # noqa: E402
+
+
+class _Participant:
+    def __init__(self) -> None:
+        self.packets = []
+
+    async def publish_data(self, data, reliable=True, topic=""):
+        self.packets.append((topic, json.loads(data)))
+
+
+class _Room:
+    def __init__(self) -> None:
+        self.local_participant = _Participant()
+
+
+def _run(scenario):
+    room = _Room()
+
+    async def run():
+        publisher = StoryPublisher(room, window_ms=10.0)
+        await scenario(publisher)
+        await publisher.aclose()
+        return publisher
+
+    publisher = asyncio.run(run())
+    return [payload for _, payload in room.local_participant.packets], publisher
+
+
+def test_window_batches_into_one_packet_and_last_scene_wins():
+    async def scenario(publisher):
+        await publisher.set_scene("study")
+        await publisher.caption("moriarty", "Welcome.")
+        await publisher.set_scene("market")
+        await publisher.caption("watson", "Careful.")
+        await asyncio.sleep(0.05)
+
+    packets, publisher = _run(scenario)
+    assert packets == [
+        {"type": "BATCH", "scene": "market", "captions": [["moriarty", "Welcome."], ["watson", "Careful."]]}
+    ]
+    assert publisher.stats()["scene_overwrites"] == 1
+
+
+def test_single_message_keeps_the_original_format():
+    async def scenario(publisher):
+        await publisher.caption("moriarty", "Tick tock.")
+        await asyncio.sleep(0.05)
+        await publisher.set_scene("landmark")
+        await asyncio.sleep(0.05)
+
+    packets, _ = _run(scenario)
+    assert packets == [
+        {"type": "CAPTION", "speaker": "moriarty", "text": "Tick tock."},
+        {"type": "SCENE_SET", "scene": "landmark"},
+    ]
+
+
+def test_large_batches_are_split_under_the_packet_limit():
+    room = _Room()
+
+    async def run():
+        publisher = StoryPublisher(room, window_ms=1000.0, max_packet_bytes=200)
+        for i in range(10):
+            await publisher.caption("moriarty", f"Line {i}: " + "x" * 40)
+        await publisher.flush()
+
+    asyncio.run(run())
+    packets = [payload for _, payload in room.local_participant.packets]
+    assert len(packets) > 1
+    assert all(len(json.dumps(p, separators=(",", ":"))) <= 200 for p in packets)
+    captions = [text for p in packets for _, text in p["captions"]]
+    assert captions == [f"Line {i}: " + "x" * 40 for i in range(10)]
+
+
+def test_backpressure_flushes_inline():
+    room = _Room()
+
+    async def run():
+        publisher = StoryPublisher(room, window_ms=1000.0, max_pending=3)
+        for i in range(3):
+            await publisher.caption("watson", str(i))
+        sent_before_window = len(room.local_participant.packets)
+        await publisher.aclose()
+        return publisher, sent_before_window
+
+    publisher, sent = asyncio.run(run())
+    assert sent == 1
+    assert publisher.stats()["backpressure_waits"] == 1
@@ -0,0 +1,40 @@
+import pytest
+
+pytest.importorskip("livekit.api")
+
+from token_cache import TokenMinter  # noqa: E402
+
+API_KEY = "devkey"
+API_SECRET = "devsecret-devsecret-devsecret-0000"
+
+
+def test_same_display_name_gets_distinct_identities():
+    minter = TokenMinter(API_KEY, API_SECRET)
+    first = minter.get("room", "Detective")
+    second = minter.get("room", "Detective")
+    assert first.identity != second.identity
+    assert first.reconnect_id != second.reconnect_id
+
+
+def test_reconnect_id_returns_the_same_token():
+    minter = TokenMinter(API_KEY, API_SECRET)
+    first = minter.get("room", "Detective")
+    again = minter.get("room", "Detective", first.reconnect_id)
+    assert again.jwt == first.jwt
+    assert minter.stats()["hits"] == 1
+
+
+def test_unknown_or_foreign_reconnect_id_gets_new_identity():
+    minter = TokenMinter(API_KEY, API_SECRET)
+    first = minter.get("room", "Detective")
+    assert minter.get("room", "Detective", "guessed").identity != first.identity
+    assert minter.get("other-room", "Detective", first.reconnect_id).identity != first.identity
+    assert minter.get("room", "Watson", first.reconnect_id).identity != first.identity
+
+
+def test_refresh_keeps_identity():
+    minter = TokenMinter(API_KEY, API_SECRET, min_remaining=1.1)
+    first = minter.get("room", "Detective")
+    refreshed = minter.get("room", "Detective", first.reconnect_id)
+    assert refreshed.identity == first.identity
+    assert refreshed.reconnect_id == first.reconnect_id
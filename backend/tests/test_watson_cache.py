@@ -0,0 +1,52 @@
+from watson_cache import AnswerCache, normalize_query, same_question
+
+
+def _cache() -> AnswerCache:
+    cache = AnswerCache()
+    cache.store("Watson, is the victim still alive?", "alive")
+    cache.store("Should we go to the Taj Mahal?", "go")
+    cache.store("Is the arrow pointing north?", "north")
+    return cache
+
+
+def test_negation_does_not_hit_the_positive_answer():
+    cache = _cache()
+    assert cache.lookup("Watson, is the victim still not alive?") is None
+    assert cache.lookup("Isn't the victim alive?") is None
+    assert cache.lookup("Should we not go to the Taj Mahal?") is None
+    assert cache.lookup("Shouldn't we go to the Taj Mahal?") is None
+
+
+def test_different_direction_or_number_misses():
+    cache = _cache()
+    assert cache.lookup("Is the arrow pointing northeast?") is None
+    cache.store("Were there two shots fired?", "two")
+    assert cache.lookup("Were there three shots fired?") is None
+    cache.store("Is the house number 221?", "221")
+    assert cache.lookup("Is the house number 222?") is None
+
+
+def test_paraphrase_and_spelling_variants_hit():
+    cache = _cache()
+    assert cache.lookup("is the victim alive") == "alive"
+    assert cache.lookup("Watson, should we go to the Taj Mahel?") == "go"
+    cache.store("What colour is the ribbon?", "red")
+    assert cache.lookup("What color is the ribbon?") == "red"
+    assert cache.stats()["similar_hits"] == 2
+
+
+def test_word_order_and_pronouns_are_part_of_the_key():
+    cache = AnswerCache()
+    cache.store("Did the butler kill the maid?", "yes")
+    cache.store("Is he alive?", "he is")
+    assert normalize_query("Did the butler kill the maid?") != normalize_query("Did the maid kill the butler?")
+    assert cache.lookup("Did the maid kill the butler?") is None
+    assert cache.lookup("Is she alive?") is None
+    assert cache.lookup("Watson, did the butler kill the maid?") == "yes"
+    assert cache.lookup("Is he alive, Watson?") == "he is"
+
+
+def test_contractions_normalize_to_negation():
+    assert normalize_query("He isn't alive") == normalize_query("He is not alive")
+    assert normalize_query("Can't we go?") == normalize_query("Cannot we go?")
+    assert not same_question("alive victim".split(), "alive not victim".split())
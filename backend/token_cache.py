@@ -0,0 +1,124 @@
+import os
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+
+from livekit import api
+
+# Permissions granted to every participant joining through /token
+DEFAULT_GRANT_FLAGS: Dict[str, bool] = {
+    "room_join": True,
+    "can_publish": True,
+    "can_subscribe": True,
+    "can_publish_data": True,
+}
+
+
+@dataclass
+class CachedToken:
+    identity: str
+    jwt: str
+    issued_at: float
+    expires_at: float
+    name: str = ""
+    # Secret handed to the client with its first token; presenting it again is what earns reuse
+    reconnect_id: str = ""
+
+
+class TokenMinter:
+    """
+    Mints participant JWTs and keeps recently issued ones for reuse.
+
+    Every new token comes with a random `reconnect_id`. A client that
+    presents it again (same room and display name) gets the same token back
+    while at least `min_remaining` of its TTL is left, and a refreshed token
+    for the same identity after that, so reconnect loops replace their own
+    session instead of adding participants. Requests without a known
+    reconnect id always get a new identity: display names are not secret
+    and are shared between players. Grant objects are built once per room
+    and shared between tokens.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        ttl: timedelta = timedelta(hours=2),
+        min_remaining: float = 0.75,
+        max_entries: int = 10_000,
+        max_grant_rooms: int = 1_000,
+    ) -> None:
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.ttl = ttl
+        self.min_remaining = min_remaining
+        self.max_entries = max_entries
+        self.max_grant_rooms = max_grant_rooms
+        self._ttl_seconds = ttl.total_seconds()
+        # (room, participant name, reconnect id) -> last token issued to that client
+        self._tokens: "OrderedDict[Tuple[str, str, str], CachedToken]" = OrderedDict()
+        self._grants: "OrderedDict[str, api.VideoGrants]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def grants_for(self, room_name: str) -> api.VideoGrants:
+        """Shared VideoGrants for a room (tokens only read it when signing)"""
+        grants = self._grants.get(room_name)
+        if grants is None:
+            grants = api.VideoGrants(room=room_name, **DEFAULT_GRANT_FLAGS)
+            self._grants[room_name] = grants
+            if len(self._grants) > self.max_grant_rooms:
+                self._grants.popitem(last=False)
+        else:
+            self._grants.move_to_end(room_name)
+        return grants
+
+    def mint(self, room_name: str, participant_name: str, identity: Optional[str] = None) -> CachedToken:
+        """Sign a new token, bypassing the cache"""
+        identity = identity or f"{participant_name}_{os.urandom(4).hex()}"
+        token = api.AccessToken(self.api_key, self.api_secret)
+        token.with_identity(identity)
+        token.with_name(participant_name)
+        token.with_ttl(self.ttl)
+        token.with_grants(self.grants_for(room_name))
+        now = time.time()
+        return CachedToken(identity, token.to_jwt(), now, now + self._ttl_seconds, name=participant_name)
+
+    def get(self, room_name: str, participant_name: str, reconnect_id: Optional[str] = None) -> CachedToken:
+        """Return the token for a reconnecting client, minting a new identity otherwise"""
+        key = (room_name, participant_name, reconnect_id or "")
+        cached = self._tokens.get(key) if reconnect_id else None
+        now = time.time()
+        if cached is not None:
+            if cached.expires_at - now >= self._ttl_seconds * self.min_remaining:
+                self._tokens.move_to_end(key)
+                self.hits += 1
+                return cached
+            del self._tokens[key]
+
+        self.misses += 1
+        if cached is not None:
+            # Keep the identity stable across refreshes so a reconnect replaces the old session
+            fresh = self.mint(room_name, participant_name, identity=cached.identity)
+            fresh.reconnect_id = cached.reconnect_id
+        else:
+            fresh = self.mint(room_name, participant_name)
+            fresh.reconnect_id = secrets.token_urlsafe(24)
+            key = (room_name, participant_name, fresh.reconnect_id)
+        self._tokens[key] = fresh
+        if len(self._tokens) > self.max_entries:
+            self._tokens.popitem(last=False)
+        return fresh
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._tokens),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "reuse_window_seconds": self._ttl_seconds * (1 - self.min_remaining),
+        }
@@ -0,0 +1,377 @@
+import asyncio
+import hashlib
+import logging
+import math
+import mmap
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+logger = logging.getLogger("agent-worker")
+
+# Words that address Watson rather than change the question
+_FILLER = {
+    "watson", "dr", "doctor", "john", "hey", "oh", "so", "please", "well",
+    "ok", "okay", "um", "uh", "then", "now", "my", "dear", "friend",
+}
+# Articles and hedges that never change what is being asked; pronouns and
+# question words stay, since "is he alive?" and "is she alive?" differ
+_STOP = {"a", "an", "the", "still", "really", "actually", "just"}
+# Words that flip or quantify a question; a fuzzy match must agree on them exactly
+_NEGATIONS = {"not", "no", "never", "none", "nobody", "nothing", "nowhere", "neither", "nor", "without"}
+_NUMBERS = {
+    "zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+    "eleven", "twelve", "twenty", "thirty", "forty", "fifty", "hundred", "thousand",
+    "first", "second", "third", "half", "once", "twice",
+}
+# Contraction stems whose base differs from the word ("can't" -> "can not")
+_CONTRACTED = {"ca": "can", "wo": "will", "sha": "shall"}
+_WORD = re.compile(r"[a-z0-9']+")
+
+
+def _words(query: str) -> List[str]:
+    words: List[str] = []
+    for w in _WORD.findall(query.lower().replace("\u2019", "'")):
+        w = w.strip("'")
+        if w.endswith("n't"):
+            stem = w[:-3]
+            words.extend((_CONTRACTED.get(stem, stem), "not"))
+        elif w == "cannot":
+            words.extend(("can", "not"))
+        elif w:
+            words.append(w)
+    return words
+
+
+def normalize_query(query: str) -> str:
+    """
+    Cache key for a question: its lowercased words in order, without
+    punctuation, forms of address, articles or hedges. Order is kept so
+    "did the butler kill the maid?" and "did the maid kill the butler?"
+    differ; contractions are split so "isn't" keys the same as "is not".
+    """
+    words = [w for w in _words(query) if w not in _FILLER]
+    content = [w for w in words if w not in _STOP]
+    return " ".join(content or words)
+
+
+def _is_pinned(word: str) -> bool:
+    return word in _NEGATIONS or word in _NUMBERS or any(c.isdigit() for c in word)
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, or `limit + 1` once it is known to exceed `limit`"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _spelling_variant(a: str, b: str) -> bool:
+    """Same word up to a plural or a small misspelling ("colour"/"color", "jewelery"/"jewellery")"""
+    if a == b or a + "s" == b or b + "s" == a:
+        return True
+    shorter = min(len(a), len(b))
+    if shorter < 5:
+        return False
+    limit = 1 if shorter < 8 else 2
+    return _edit_distance(a, b, limit) <= limit
+
+
+def same_question(a: Sequence[str], b: Sequence[str]) -> bool:
+    """
+    Whether two normalized keys ask the same thing: the same words in the
+    same order, negations and numbers identical, any other word at most a
+    spelling variant of its counterpart
+    """
+    if len(a) != len(b):
+        return False
+    for x, y in zip(a, b):
+        if _is_pinned(x) or _is_pinned(y):
+            if x != y:
+                return False
+        elif not _spelling_variant(x, y):
+            return False
+    return True
+
+
+def _trigrams(text: str) -> Counter:
+    padded = f"  {text} "
+    return Counter(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+@dataclass
+class _Answer:
+    text: str
+    words: Tuple[str, ...]
+    grams: Counter
+    norm: float
+
+
+class AnswerCache:
+    """
+    Normalized question -> Watson's answer text.
+
+    Exact normalized matches are a dict lookup. Anything else is ranked by
+    cosine similarity of character trigrams, with an inverted trigram index
+    limiting the comparison to entries that share at least one trigram.
+    Every hit, exact or not, is only used when `same_question` holds:
+    trigrams cannot tell "not alive" from "alive" or "northeast" from
+    "north", so the fuzzy path only absorbs spelling differences. Entries
+    are evicted LRU beyond `max_entries`.
+    """
+
+    def __init__(self, max_entries: int = 512, threshold: float = 0.8) -> None:
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._entries: "OrderedDict[str, _Answer]" = OrderedDict()
+        self._index: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def _candidates(self, grams: Iterable[str]) -> Set[str]:
+        keys: Set[str] = set()
+        for gram in grams:
+            keys |= self._index.get(gram, set())
+        return keys
+
+    def lookup(self, query: str) -> Optional[str]:
+        key = normalize_query(query)
+        if not key:
+            self.misses += 1
+            return None
+        words = tuple(key.split())
+        entry = self._entries.get(key)
+        if entry is not None and not same_question(words, entry.words):
+            entry = None
+        if entry is None:
+            grams = _trigrams(key)
+            norm = math.sqrt(sum(v * v for v in grams.values()))
+            best, best_score = None, self.threshold
+            for candidate in self._candidates(grams):
+                other = self._entries[candidate]
+                dot = sum(count * other.grams.get(gram, 0) for gram, count in grams.items())
+                score = dot / (norm * other.norm)
+                if score >= best_score and same_question(words, other.words):
+                    best, best_score = candidate, score
+            if best is None:
+                self.misses += 1
+                return None
+            key, entry = best, self._entries[best]
+            self.similar_hits += 1
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry.text
+
+    def store(self, query: str, answer: str) -> None:
+        key = normalize_query(query)
+        if not key or key in self._entries:
+            return
+        grams = _trigrams(key)
+        self._entries[key] = _Answer(answer, tuple(key.split()), grams, math.sqrt(sum(v * v for v in grams.values())))
+        for gram in grams:
+            self._index.setdefault(gram, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            evicted, old = self._entries.popitem(last=False)
+            for gram in old.grams:
+                keys = self._index.get(gram)
+                if keys is not None:
+                    keys.discard(evicted)
+                    if not keys:
+                        del self._index[gram]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+        }
+
+
+class SpeechCache:
+    """
+    Answer text -> synthesized mono s16 PCM.
+
+    Keys hash the voice, model and sample rate with the text. Clips live in
+    an in-memory LRU bounded by `max_bytes` and, when `directory` is set, in
+    a `.pcm` file per clip shared by every worker process on the host (read
+    back through mmap, written atomically). The directory is pruned oldest
+    first once it holds more than `max_disk_bytes`.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: int = 32 * 1024 * 1024,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: "OrderedDict[str, memoryview]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @staticmethod
+    def key(text: str, voice: str, model: str, sample_rate: int) -> str:
+        return hashlib.sha256(f"{model}\0{voice}\0{sample_rate}\0{text}".encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pcm")
+
+    def _remember(self, key: str, pcm: memoryview) -> None:
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = pcm
+            self._bytes += len(pcm)
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def _read_disk(self, key: str) -> Optional[memoryview]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return None
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except OSError:
+            return None
+        try:
+            # Recently used clips survive pruning
+            os.utime(path)
+        except OSError:
+            pass
+        return memoryview(mapped)
+
+    def _write_disk(self, key: str, pcm: bytes) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(pcm)
+        os.replace(tmp_path, path)
+        self.writes += 1
+        self._prune()
+
+    def _prune(self) -> None:
+        files: List[Tuple[float, int, str]] = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pcm"):
+                st = entry.stat()
+                files.append((st.st_mtime, st.st_size, entry.path))
+                total += st.st_size
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    async def get(self, key: str) -> Optional[memoryview]:
+        with self._lock:
+            pcm = self._entries.get(key)
+            if pcm is not None:
+                self._entries.move_to_end(key)
+        if pcm is None and self.directory:
+            pcm = await asyncio.to_thread(self._read_disk, key)
+            if pcm is not None:
+                self.disk_hits += 1
+                self._remember(key, pcm)
+        if pcm is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return pcm
+
+    async def put(self, key: str, pcm: bytes) -> None:
+        if not pcm:
+            return
+        self._remember(key, memoryview(pcm))
+        if self.directory:
+            try:
+                await asyncio.to_thread(self._write_disk, key, pcm)
+            except OSError as e:
+                logger.warning(f"Could not write speech cache clip {key}: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "writes": self.writes,
+        }
+
+
+class WatsonResponseCache:
+    """
+    Two-level cache for `ask_watson`: question -> text, then text -> PCM.
+
+    Watson's LLM call only sees the player's question, so an answer cached
+    for the same question, up to filler words and spelling, is one a fresh
+    call could have returned. Saved latency is the
+    running mean of uncached first-audio times minus each hit's own.
+    """
+
+    def __init__(self, answers: AnswerCache, speech: SpeechCache) -> None:
+        self.answers = answers
+        self.speech = speech
+        self.requests = 0
+        self.text_hits = 0
+        self.audio_hits = 0
+        self.saved_ms = 0.0
+        self._miss_first_audio_ms = 0.0
+        self._miss_samples = 0
+
+    def record(self, first_audio_ms: Optional[float], text_hit: bool, audio_hit: bool) -> float:
+        """Account one request; returns the latency it saved (0 for misses)"""
+        self.requests += 1
+        self.text_hits += text_hit
+        self.audio_hits += audio_hit
+        if first_audio_ms is None:
+            return 0.0
+        if not text_hit:
+            self._miss_samples += 1
+            self._miss_first_audio_ms += (first_audio_ms - self._miss_first_audio_ms) / self._miss_samples
+            return 0.0
+        if not self._miss_samples:
+            return 0.0
+        saved = max(self._miss_first_audio_ms - first_audio_ms, 0.0)
+        self.saved_ms += saved
+        return saved
+
+    def stats(self) -> Dict[str, float]:
+        requests = self.requests or 1
+        return {
+            "requests": self.requests,
+            "text_hit_rate": round(self.text_hits / requests, 3),
+            "audio_hit_rate": round(self.audio_hits / requests, 3),
+            "saved_ms": round(self.saved_ms, 1),
+            "miss_first_audio_ms": round(self._miss_first_audio_ms, 1),
+            "answers": self.answers.stats(),
+            "speech": self.speech.stats(),
+        }
+
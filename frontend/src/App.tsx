@@ -195,7 +195,20 @@ const App = () => {
         speaker?: string;
         text?: string;
         status?: string;
+        captions?: [string, string][];
       };
+      if (message.type === "BATCH") {
+        // Coalesced updates from the agent: latest scene, then captions in order
+        if (message.scene) {
+          handleSceneEvent(message.scene);
+        }
+        for (const [speaker, text] of message.captions ?? []) {
+          if (speaker && text) {
+            handleCaptionEvent(speaker, text);
+          }
+        }
+        return;
+      }
       if (message.type === "SCENE_SET" && message.scene) {
         handleSceneEvent(message.scene);
         return;
@@ -227,12 +240,15 @@ const App = () => {
       setConnecting(true);
       updateStatus("Opening the case line...", "info");
 
+      // Lets the backend hand this tab its own identity back on reconnect
+      const reconnectKey = `reconnect:${roomNameRef.current}`;
       const response = await fetch("/token", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({
           room_name: roomNameRef.current,
           participant_name: userNameRef.current,
+          reconnect_id: sessionStorage.getItem(reconnectKey) ?? undefined,
           metadata: {
             crime_type: caseDetails.crimeType,
             victim_name: caseDetails.victimName,
@@ -248,6 +264,9 @@ const App = () => {
       }
 
       const data = await response.json();
+      if (data.reconnect_id) {
+        sessionStorage.setItem(reconnectKey, data.reconnect_id);
+      }
 
       const room = new livekitClient.Room({
         adaptiveStream: true,